@@ -0,0 +1,250 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from contextlib import contextmanager
+from datetime import datetime
+from importlib.util import find_spec
+import json
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+import tracemalloc
+
+import click
+import httpx
+
+from benchmarks.server import DEFAULT_HOST, DEFAULT_PORT, FIXTURES_DIR, LocalTransport, run_server
+from boib.downloaders import BulletinDownloader
+from boib.downloaders.composite import CompositeArticleDownloader
+from boib.downloaders.html import HTMLArticleDownloader
+from boib.downloaders.pdf import PDFArticleDownloader
+from boib.extractors.caib import CAIBArticleExtractor, CAIBBulletinExtractor, CAIBSectionExtractor
+from boib.filesystems.local import LocalFilesystem
+from boib.log import set_log_level
+from boib.metrics import HTTP_REQUESTS
+from boib.models import Bulletin, DateRange
+from boib.processors.pdf_text import PDFTextProcessor
+from boib.utils import (
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    HTML_PARSERS,
+    get_async_client,
+    set_html_parser,
+)
+
+
+# Offline benchmarks of the extraction and download pipeline. The CAIB site is
+# replayed from the fixtures by a local server running in its own process, so
+# it doesn't compete with the code being measured for the event loop
+DEFAULT_ITERATIONS = 50
+DEFAULT_LATENCY = 0.02
+DEFAULT_FROM = '2024-01-01'
+DEFAULT_TO = '2024-01-31'
+BULLETIN_URL = 'https://intranet.caib.es/eboibfront/ca/2024/12010/'
+
+
+def read_fixture(name: str, mode: str = 'r') -> str | bytes:
+    with open(os.path.join(FIXTURES_DIR, name), mode) as f:
+        return f.read()
+
+
+def benchmark_parsers(parser: str, iterations: int) -> dict[str, float]:
+    calendar = read_fixture('calendar.html')
+    bulletin = read_fixture('bulletin.html')
+    legacy_bulletin = read_fixture('bulletin_legacy.html')
+    section = read_fixture('section.html')
+    grouped_section = read_fixture('section_grouped.html')
+    article = read_fixture('article.html')
+
+    cases = {
+        'calendar': lambda: CAIBBulletinExtractor.parse_calendar(calendar, 2024, parser),
+        'bulletin': lambda: CAIBSectionExtractor.parse_bulletin(bulletin, BULLETIN_URL, parser),
+        'legacy_bulletin': lambda: CAIBSectionExtractor.parse_bulletin(legacy_bulletin, BULLETIN_URL, parser),
+        'section': lambda: CAIBArticleExtractor.parse_articles(section, parser),
+        'grouped_section': lambda: CAIBArticleExtractor.parse_articles(grouped_section, parser),
+        'article': lambda: HTMLArticleDownloader.parse_content(article, parser),
+    }
+
+    return {name: time_per_call(case, iterations) for name, case in cases.items()}
+
+
+def benchmark_pdf_text(iterations: int) -> dict[str, float]:
+    pdf = read_fixture('article.pdf', 'rb')
+    return {'pdf_text': time_per_call(lambda: PDFTextProcessor.extract_text(pdf), iterations)}
+
+
+def time_per_call(function: Callable, iterations: int) -> float:
+    # Best of the iterations, the least disturbed by the rest of the machine
+    timings = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started_at)
+
+    return min(timings)
+
+
+async def extract(date_range: DateRange, concurrency: int, port: int) -> list[Bulletin]:
+    async with get_client(port) as client:
+        extractor = CAIBBulletinExtractor(concurrency=concurrency, client=client)
+        return [bulletin async for bulletin in extractor.extract_range_iter(date_range)]
+
+
+async def download(bulletins: list[Bulletin], concurrency: int, port: int) -> int:
+    with tempfile.TemporaryDirectory() as data_dir:
+        async with LocalFilesystem(data_dir) as filesystem, get_client(port) as client:
+            downloader = BulletinDownloader(
+                CompositeArticleDownloader([
+                    HTMLArticleDownloader(filesystem, client),
+                    PDFArticleDownloader(filesystem, client),
+                ]),
+                concurrency=concurrency,
+            )
+            await asyncio.gather(*(downloader.download(bulletin) for bulletin in bulletins))
+
+        return directory_size(data_dir)
+
+
+def get_client(port: int) -> httpx.AsyncClient:
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=DEFAULT_MAX_CONNECTIONS,
+            max_keepalive_connections=DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+    )
+
+    return get_async_client(transport=LocalTransport(transport, port=port))
+
+
+def directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(directory, name))
+        for directory, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def run_timed(coroutine: Callable[[], Awaitable], memory: bool) -> tuple[object, float, int, int | None]:
+    requests_before = requests_made()
+    started_at = time.perf_counter()
+    result = asyncio.run(coroutine())
+    elapsed = time.perf_counter() - started_at
+    requests = requests_made() - requests_before
+
+    # Memory is measured on a second run, tracing allocations slows the code
+    # down too much for the timings to be meaningful
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            asyncio.run(coroutine())
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return result, elapsed, requests, peak
+
+
+@contextmanager
+def fixture_server(port: int, latency: float):
+    process = multiprocessing.Process(target=run_server, args=(DEFAULT_HOST, port, latency), daemon=True)
+    process.start()
+
+    try:
+        wait_for_port(port)
+        yield
+    finally:
+        process.terminate()
+        process.join()
+
+
+def wait_for_port(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((DEFAULT_HOST, port), timeout=1):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def requests_made() -> int:
+    return int(sum(HTTP_REQUESTS.values().values()))
+
+
+@click.command()
+@click.option('--from', 'start', type=click.DateTime(['%Y-%m-%d']), default=DEFAULT_FROM, show_default=True, help='First day of the crawled range')
+@click.option('--to', 'end', type=click.DateTime(['%Y-%m-%d']), default=DEFAULT_TO, show_default=True, help='Last day of the crawled range')
+@click.option('--latency', type=float, default=DEFAULT_LATENCY, show_default=True, help='Seconds the fixture server delays every response')
+@click.option('--concurrency', type=int, default=CAIBBulletinExtractor.DEFAULT_CONCURRENCY, show_default=True, help='Maximum concurrent page fetches while extracting')
+@click.option('--download-concurrency', type=int, default=BulletinDownloader.DEFAULT_CONCURRENCY, show_default=True, help='Maximum articles downloaded at the same time')
+@click.option('--iterations', type=int, default=DEFAULT_ITERATIONS, show_default=True, help='Runs of every parser benchmark')
+@click.option('--parser', 'parsers', type=click.Choice(HTML_PARSERS), multiple=True, help='HTML parsers to benchmark, every installed one by default')
+@click.option('--memory/--no-memory', default=True, show_default=True, help='Measure peak memory with tracemalloc')
+@click.option('--port', type=int, default=DEFAULT_PORT, show_default=True, help='Port of the local fixture server')
+@click.option('--json', 'json_path', help='Also write the results to this file')
+def main(start, end, latency, concurrency, download_concurrency, iterations, parsers, memory, port, json_path):
+    set_log_level('WARNING')
+    parsers = parsers or [parser for parser in HTML_PARSERS if parser == 'html.parser' or find_spec(parser)]
+    results = {'parse': {}}
+
+    click.echo(f'Parse time, best of {iterations} (ms)')
+    for parser in parsers:
+        results['parse'][parser] = benchmark_parsers(parser, iterations)
+        for name, seconds in results['parse'][parser].items():
+            click.echo(f'  {parser:<12} {name:<16} {seconds * 1000:8.2f}')
+
+    if find_spec('pypdf') is not None:
+        results['parse']['pypdf'] = benchmark_pdf_text(max(iterations // 10, 1))
+        click.echo(f'  {"pypdf":<12} {"pdf_text":<16} {results["parse"]["pypdf"]["pdf_text"] * 1000:8.2f}')
+
+    date_range = DateRange(start.date(), end.date())
+    with fixture_server(port, latency):
+        for parser in parsers:
+            set_html_parser(parser)
+
+            bulletins, elapsed, requests, peak = run_timed(lambda: extract(date_range, concurrency, port), memory)
+            articles = sum(len(section.articles) for bulletin in bulletins for section in bulletin.sections)
+
+            results[f'extract/{parser}'] = {
+                'bulletins': len(bulletins),
+                'articles': articles,
+                'requests': requests,
+                'seconds': elapsed,
+                'bulletins_per_second': len(bulletins) / elapsed,
+                'requests_per_second': requests / elapsed,
+                'peak_memory_bytes': peak,
+            }
+
+        size, elapsed, requests, peak = run_timed(lambda: download(bulletins, download_concurrency, port), memory)
+        results['download'] = {
+            'articles': articles,
+            'requests': requests,
+            'bytes': size,
+            'seconds': elapsed,
+            'articles_per_second': articles / elapsed,
+            'mib_per_second': size / 1024 / 1024 / elapsed,
+            'peak_memory_bytes': peak,
+        }
+
+    click.echo(f'End to end, {date_range} with {latency}s of latency')
+    for name, result in results.items():
+        if name == 'parse':
+            continue
+
+        click.echo(f'  {name}')
+        for key, value in result.items():
+            if value is not None:
+                click.echo(f'    {key:<22} {value:,.2f}' if isinstance(value, float) else f'    {key:<22} {value:,}')
+
+    if json_path:
+        results['date'] = datetime.now().isoformat()
+        with open(json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+
+import click
+import httpx
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+class FixtureServer:
+    # Minimal HTTP/1.1 server replaying the fixtures of every CAIB page type,
+    # whatever the host asked for. Connections are kept alive like the real
+    # site does, and every response is delayed by `latency` seconds. Fixtures
+    # carry an ETag and are revalidated with If-None-Match, and paths can be
+    # made to fail to exercise the error handling
+    def __init__(self, latency: float = 0.0, fixtures_dir: str = FIXTURES_DIR):
+        self.__latency = latency
+        self.__routes = self.__load_routes(fixtures_dir)
+        self.__requests = 0
+        self.__paths = []
+        self.__failures = []
+
+    @property
+    def requests(self) -> int:
+        return self.__requests
+
+    @property
+    def paths(self) -> list[str]:
+        # Every path requested, in order
+        return self.__paths
+
+    def fail(self, pattern: str, status: int = 503, times: int | None = None):
+        # Requests whose path matches the pattern get this status instead,
+        # the first `times` of them or all of them
+        self.__failures.append([re.compile(pattern), status, times])
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.Server:
+        return await asyncio.start_server(self.__handle_connection, host, port)
+
+    async def __handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+
+                headers = await reader.readuntil(b'\r\n\r\n')
+                _, target, _ = request_line.decode('latin-1').split(' ', 2)
+                path = target.split('?', 1)[0]
+                self.__requests += 1
+                self.__paths.append(path)
+
+                if self.__latency:
+                    await asyncio.sleep(self.__latency)
+
+                status, content_type, body, etag = self.__route(path)
+                if etag is not None and etag in self.__get_header(headers, 'if-none-match'):
+                    status, body = '304 Not Modified', b''
+
+                etag_header = f'ETag: {etag}\r\n' if etag is not None else ''
+                writer.write(
+                    f'HTTP/1.1 {status}\r\n'
+                    f'Content-Type: {content_type}\r\n'
+                    f'{etag_header}'
+                    f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body
+                )
+                await writer.drain()
+
+                if b'connection: close' in headers.lower():
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def __route(self, path: str) -> tuple[str, str, bytes, str | None]:
+        for failure in self.__failures:
+            pattern, status, times = failure
+            if pattern.search(path) and times != 0:
+                if times is not None:
+                    failure[2] = times - 1
+                return f'{status} Error', 'text/plain', b'Error', None
+
+        for pattern, content_type, body in self.__routes:
+            if pattern.search(path):
+                return '200 OK', content_type, body, f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+        return '404 Not Found', 'text/plain', b'Not found', None
+
+    @staticmethod
+    def __get_header(headers: bytes, name: str) -> str:
+        for line in headers.decode('latin-1').split('\r\n'):
+            key, _, value = line.partition(':')
+            if key.strip().lower() == name:
+                return value.strip()
+
+        return ''
+
+    @staticmethod
+    def __load_routes(fixtures_dir: str) -> list[tuple[re.Pattern, str, bytes]]:
+        with open(os.path.join(fixtures_dir, 'routes.json')) as f:
+            routes = json.load(f)
+
+        fixtures = []
+        for pattern, fixture, content_type in routes:
+            with open(os.path.join(fixtures_dir, fixture), 'rb') as f:
+                fixtures.append((re.compile(pattern), content_type, f.read()))
+
+        return fixtures
+
+
+class LocalTransport(httpx.AsyncBaseTransport):
+    # Sends every request to the fixture server, whatever its URL, so the
+    # extractors and downloaders run unchanged against it
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.__transport = transport
+        self.__host = host
+        self.__port = port
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # The request is copied, so retries and dead letters still see its URL
+        local_request = httpx.Request(
+            request.method,
+            request.url.copy_with(scheme='http', host=self.__host, port=self.__port),
+            headers=request.headers,
+            stream=request.stream,
+            extensions=request.extensions,
+        )
+        return await self.__transport.handle_async_request(local_request)
+
+    async def aclose(self):
+        await self.__transport.aclose()
+
+
+def run_server(host: str, port: int, latency: float):
+    async def serve_forever():
+        server = await FixtureServer(latency).serve(host, port)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+@click.command()
+@click.option('--host', default=DEFAULT_HOST, show_default=True)
+@click.option('--port', type=int, default=DEFAULT_PORT, show_default=True)
+@click.option('--latency', type=float, default=0.0, show_default=True, help='Seconds every response is delayed')
+def main(host, port, latency):
+    click.echo(f'Serving fixtures on http://{host}:{port} with {latency}s of latency')
+    run_server(host, port, latency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+from datetime import datetime
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+
+import aiofiles
+from aiofiles import os as aios
+import httpx
+
+from boib.log import logger
+
+
+class HTTPCache:
+    DEFAULT_TTL = 300
+    CACHED_HOSTS = {'intranet.caib.es'}
+
+    # Only calendar, bulletin and section pages are cached, e.g.
+    # /eboibfront/ca/2024, /eboibfront/ca/2024/12049/ and
+    # /eboibfront/ca/2024/12049/650000/anuncis. They carry their year in the
+    # path. Documents are skipped through the manifest instead
+    __PAGE_PATTERN = re.compile(r'/eboibfront/[a-z]{2}/(\d{4})(/\d+(/[^/]+){0,2})?/?')
+
+    def __init__(self, base_dir: str, ttl: float = DEFAULT_TTL):
+        self.__base_dir = base_dir
+        self.__ttl = ttl
+
+    def accepts(self, url: str) -> bool:
+        url = httpx.URL(url)
+        return url.host in self.CACHED_HOSTS and self.__PAGE_PATTERN.fullmatch(url.path) is not None
+
+    async def get(self, url: str) -> tuple[dict, bytes] | None:
+        meta_path, body_path = self.__get_paths(url)
+
+        # The cache is only an optimization, a page that can't be read from it
+        # is fetched again
+        try:
+            async with aiofiles.open(meta_path, 'r') as f:
+                meta = json.loads(await f.read())
+
+            async with aiofiles.open(body_path, 'rb') as f:
+                body = await f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f'Could not read {url} from cache: {e!r}')
+            return None
+
+        return meta, body
+
+    async def put(self, url: str, headers: list[tuple[str, str]], body: bytes):
+        meta_path, body_path = self.__get_paths(url)
+
+        meta = {
+            'url': url,
+            'headers': headers,
+            'stored_at': time.time(),
+        }
+
+        # Body first, so metadata is never found pointing to a missing body
+        try:
+            await aios.makedirs(os.path.dirname(meta_path), exist_ok=True)
+            await self.__write(body_path, body)
+            await self.__write(meta_path, json.dumps(meta).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f'Could not store {url} in cache: {e!r}')
+
+    async def touch(self, url: str, meta: dict):
+        meta_path, _ = self.__get_paths(url)
+        meta = {**meta, 'stored_at': time.time()}
+
+        try:
+            await self.__write(meta_path, json.dumps(meta).encode('utf-8'))
+        except OSError as e:
+            logger.warning(f'Could not refresh {url} in cache: {e!r}')
+
+    def is_fresh(self, url: str, meta: dict) -> bool:
+        if self.__is_immutable(url, meta['stored_at']):
+            return True
+
+        return time.time() - meta['stored_at'] < self.__ttl
+
+    def __is_immutable(self, url: str, stored_at: float) -> bool:
+        # Pages of past years are never republished, as long as they were
+        # stored once their year was over. A page stored on the last day of
+        # its year may still miss that day's bulletins
+        match = self.__PAGE_PATTERN.fullmatch(httpx.URL(url).path)
+        if match is None:
+            return False
+
+        year_end = datetime(int(match.group(1)) + 1, 1, 1).timestamp()
+        return stored_at >= year_end
+
+    def __get_paths(self, url: str) -> tuple[str, str]:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base_path = os.path.join(self.__base_dir, key[:2], key)
+
+        return f'{base_path}.json', f'{base_path}.body'
+
+    async def __write(self, path: str, content: bytes):
+        # Concurrent fetches of the same page each write their own temporary
+        # file, the last one renamed in place wins
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            async with aiofiles.open(tmp_path, 'wb') as f:
+                await f.write(content)
+
+            await aios.replace(tmp_path, path)
+        except BaseException:
+            if await aios.path.exists(tmp_path):
+                await aios.remove(tmp_path)
+            raise
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    # Caches calendar, bulletin and section pages on disk and revalidates them
+    # with conditional requests once they are no longer fresh. Everything
+    # else, article documents included, goes straight to the wrapped
+    # transport
+
+    __HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'transfer-encoding'}
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, cache: HTTPCache):
+        self.__transport = transport
+        self.__cache = cache
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        if request.method != 'GET' or not self.__cache.accepts(url):
+            return await self.__transport.handle_async_request(request)
+
+        cached = await self.__cache.get(url)
+
+        if cached is not None:
+            meta, body = cached
+            # `Cache-Control: no-cache` asks for the page to be revalidated
+            # even if it is still fresh
+            no_cache = 'no-cache' in request.headers.get('cache-control', '')
+            if not no_cache and self.__cache.is_fresh(url, meta):
+                logger.debug(f'Serving {url} from cache')
+                return self.__build_response(meta, body, request)
+
+            headers = httpx.Headers(meta['headers'])
+            if 'etag' in headers:
+                request.headers['If-None-Match'] = headers['etag']
+            if 'last-modified' in headers:
+                request.headers['If-Modified-Since'] = headers['last-modified']
+
+        response = await self.__transport.handle_async_request(request)
+
+        if cached is not None and response.status_code == 304:
+            await response.aclose()
+            logger.debug(f'Revalidated {url} from cache')
+            await self.__cache.touch(url, meta)
+            return self.__build_response(meta, body, request)
+
+        if response.status_code != 200 or not self.__is_html(response):
+            return response
+
+        # The raw body is stored, so the cached headers still describe its
+        # content encoding
+        body = b''.join([chunk async for chunk in response.stream])
+        await response.aclose()
+
+        headers = [
+            (key, value) for key, value in response.headers.multi_items()
+            if key.lower() not in self.__HOP_BY_HOP_HEADERS
+        ]
+        await self.__cache.put(url, headers, body)
+
+        return httpx.Response(200, headers=headers, content=body, request=request)
+
+    async def aclose(self):
+        await self.__transport.aclose()
+
+    def __build_response(self, meta: dict, body: bytes, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers=meta['headers'], content=body, request=request)
+
+    def __is_html(self, response: httpx.Response) -> bool:
+        return response.headers.get('content-type', '').startswith('text/html')
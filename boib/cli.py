@@ -1,54 +1,615 @@
 import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AsyncExitStack, asynccontextmanager
 from datetime import date as datetype
+from importlib.util import find_spec
+import os
+import re
+import sqlite3
 
 import click
+import httpx
 
+from boib.cache import HTTPCache
 from boib.downloaders import BulletinDownloader
 from boib.downloaders.composite import CompositeArticleDownloader
 from boib.downloaders.html import HTMLArticleDownloader
 from boib.downloaders.pdf import PDFArticleDownloader
+from boib.exporters import MetadataExporter
+from boib.exporters.jsonl import JSONLExporter
+from boib.exporters.parquet import ParquetExporter
 from boib.extractors.caib import CAIBBulletinExtractor
-from boib.filesystems.local import LocalFilesystem
-from boib.models import Date
+from boib.filesystems import Filesystem
+from boib.filesystems.archive import ArchiveFilesystem, ArchiveGrouping
+from boib.filesystems.content_addressed import ContentAddressedFilesystem
+from boib.filesystems.local import FsyncPolicy, LocalFilesystem
+from boib.filesystems.s3 import S3Filesystem
+from boib.filters import ExtractionFilter
+from boib.log import LOG_LEVELS, logger, set_log_level
+from boib.manifest import Manifest
+from boib.metrics import DEFAULT_EXPORT_INTERVAL, exporting
+from boib.models import BulletinType, Date, DateRange, SectionType, URLType
+from boib.pipeline import Pipeline
+from boib.processors import DocumentProcessor
+from boib.processors.pdf_text import PDFTextProcessor
+from boib.queues import WorkQueue
+from boib.queues.redis import RedisWorkQueue
+from boib.queues.sqlite import SQLiteWorkQueue
+from boib.ratelimit import HostRateLimiter
+from boib.retry import CircuitBreaker, DeadLetters, RetryPolicy
+from boib.search import SearchIndex
+from boib.warc import WARCWriter
+from boib.utils import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    DEFAULT_READ_TIMEOUT,
+    HTML_PARSERS,
+    get_async_client,
+    get_html_parser,
+    set_html_parser,
+)
+from boib.watch import Watcher
+from boib.worker import Worker, bulletin_items
+
+
+DATA_DIR = '/data'
+DEFAULT_MANIFEST_PATH = f'{DATA_DIR}/manifest.sqlite3'
+DEFAULT_CACHE_DIR = f'{DATA_DIR}/.cache/http'
+DEFAULT_DEAD_LETTERS_PATH = f'{DATA_DIR}/dead-letters.jsonl'
+DEFAULT_INDEX_PATH = f'{DATA_DIR}/search.sqlite3'
+DEFAULT_QUEUE_PATH = f'{DATA_DIR}/queue.sqlite3'
+REDIS_URL_SCHEMES = ('redis://', 'rediss://', 'unix://')
+
+EXPORTERS = {
+    JSONLExporter.FORMAT: JSONLExporter,
+    ParquetExporter.FORMAT: ParquetExporter,
+}
+
+
+def build_filesystem(
+    s3_bucket: str | None,
+    s3_prefix: str,
+    s3_endpoint_url: str | None,
+    upload_concurrency: int,
+    writer_threads: int,
+    fsync: str,
+    dedupe: bool,
+    archive: str | None,
+) -> Filesystem:
+    if dedupe and archive is not None:
+        raise click.UsageError('--archive can\'t be combined with --dedupe')
+
+    # S3 has no links, every path would be a full copy of its blob
+    if dedupe and s3_bucket is not None:
+        raise click.UsageError('--dedupe can\'t be combined with --s3-bucket')
+
+    if s3_bucket is None:
+        filesystem = LocalFilesystem(DATA_DIR, writer_threads=writer_threads, fsync=fsync)
+    else:
+        # Credentials and region come from the standard AWS environment
+        # variables
+        filesystem = S3Filesystem(
+            s3_bucket,
+            endpoint_url=s3_endpoint_url,
+            prefix=s3_prefix,
+            upload_concurrency=upload_concurrency,
+        )
+
+    if dedupe:
+        return ContentAddressedFilesystem(filesystem)
+
+    if archive is not None:
+        return ArchiveFilesystem(filesystem, grouping=archive)
+
+    return filesystem
+
+
+def build_downloader(
+    filesystem: Filesystem,
+    client: httpx.AsyncClient,
+    concurrency: int,
+    manifest: Manifest | None,
+    executor: Executor | None,
+    processors: list[DocumentProcessor],
+) -> BulletinDownloader:
+    return BulletinDownloader(
+        CompositeArticleDownloader([
+            HTMLArticleDownloader(filesystem, client, executor),
+            PDFArticleDownloader(filesystem, client),
+        ]),
+        concurrency=concurrency,
+        manifest=manifest,
+        processors=processors,
+    )
+
+
+def build_exporters(filesystem: Filesystem, formats: tuple[str]) -> list[MetadataExporter]:
+    return [EXPORTERS[format](filesystem) for format in formats]
+
+
+def require_module(name: str, feature: str, when: Callable[[object], bool] = bool, package: str | None = None) -> Callable:
+    # Option callback failing when the option asks for a feature whose
+    # optional dependency isn't installed
+    package = package or name
+
+    def callback(ctx, param, value):
+        if when(value) and find_spec(name) is None:
+            raise click.BadParameter(f'{feature} requires {package}, install it with `pip install {package}`')
+
+        return value
+
+    return callback
+
+
+def parse_rate_limits(ctx, param, values: tuple[str]) -> dict[str, float]:
+    rates = dict(HostRateLimiter.DEFAULT_RATES)
+    for value in values:
+        host, separator, rate = value.partition('=')
+        try:
+            rates[host] = float(rate)
+        except ValueError:
+            separator = None
+
+        if not separator:
+            raise click.BadParameter(f'Expected HOST=REQUESTS_PER_SECOND, got {value}')
+
+    return rates
+
+
+def compile_organization(ctx, param, value: str | None) -> re.Pattern | None:
+    if value is None:
+        return None
+
+    try:
+        return re.compile(value, re.IGNORECASE)
+    except re.error as e:
+        raise click.BadParameter(f'Invalid regular expression: {e}')
 
 
-extractor = CAIBBulletinExtractor()
+def get_extraction_filter(options: dict) -> ExtractionFilter:
+    # Taken out of the command options, like the date range, so the commands
+    # can tell whether they crawl every article
+    extraction_filter = ExtractionFilter(
+        bulletin_types=frozenset(options.pop('bulletin_types')),
+        section_types=frozenset(SectionType(section) for section in options.pop('sections')),
+        organization=options.pop('organization'),
+        min_number=options.pop('min_number'),
+        max_number=options.pop('max_number'),
+        url_types=frozenset(options.pop('document_types')),
+    )
 
-filesystem = LocalFilesystem('/data')
-downloader = BulletinDownloader(
-    CompositeArticleDownloader([
-        HTMLArticleDownloader(filesystem),
-        PDFArticleDownloader(filesystem),
-    ])
+    if (
+        extraction_filter.min_number is not None
+        and extraction_filter.max_number is not None
+        and extraction_filter.min_number > extraction_filter.max_number
+    ):
+        raise click.UsageError(f'--min-number {extraction_filter.min_number} is above --max-number {extraction_filter.max_number}')
+
+    # A filtered export would overwrite the complete day files of earlier runs
+    if not extraction_filter.is_empty and (options['export_formats'] or options['metadata_only']):
+        raise click.UsageError('Metadata can\'t be exported while filtering, the day files would only hold part of each bulletin')
+
+    return extraction_filter
+
+
+def build_queue(queue: str, queue_name: str, item_attempts: int) -> WorkQueue:
+    if queue.startswith(REDIS_URL_SCHEMES):
+        return RedisWorkQueue(queue, name=queue_name, max_attempts=item_attempts)
+
+    return SQLiteWorkQueue(queue, max_attempts=item_attempts)
+
+
+def option_group(*options: Callable) -> Callable:
+    # Decorator applying the options, or other groups, in the order they are
+    # listed, so commands share them instead of repeating them
+    def decorator(command):
+        for option in reversed(options):
+            command = option(command)
+
+        return command
+
+    return decorator
+
+
+date_range_options = option_group(
+    click.argument('year', type=int, required=False),
+    click.argument('month', type=int, required=False),
+    click.argument('day', type=int, required=False),
+    click.option('--from', 'start', type=click.DateTime(['%Y-%m-%d']), help='First day of the range, instead of YEAR [MONTH] [DAY]'),
+    click.option('--to', 'end', type=click.DateTime(['%Y-%m-%d']), help='Last day of the range  [default: today]'),
+)
+
+
+filter_options = option_group(
+    click.option('--bulletin-type', 'bulletin_types', type=click.Choice([BulletinType.ORDINARY, BulletinType.EXTRAORDINARY], case_sensitive=False), multiple=True, help='Only crawl bulletins of this type (repeatable)'),
+    click.option('--section', 'sections', type=click.Choice([section_type.value for section_type in SectionType], case_sensitive=False), multiple=True, help='Only crawl this section, the pages of the others are never fetched (repeatable)'),
+    click.option('--organization', callback=compile_organization, metavar='REGEX', help='Only download the articles whose organization matches this case insensitive regular expression'),
+    click.option('--min-number', type=int, help='Only download the articles with a registry number from this one'),
+    click.option('--max-number', type=int, help='Only download the articles with a registry number up to this one'),
+    click.option('--document-type', 'document_types', type=click.Choice([URLType.PDF, URLType.HTML], case_sensitive=False), multiple=True, help='Only download documents of this type (repeatable)'),
+)
+
+
+queue_options = option_group(
+    click.option('--queue', envvar='BOIB_QUEUE', default=DEFAULT_QUEUE_PATH, show_default=True, callback=require_module('redis', 'Redis work queues', lambda value: value.startswith(REDIS_URL_SCHEMES)), help='Work queue shared by the workers, a SQLite file or a redis:// URL'),
+    click.option('--queue-name', envvar='BOIB_QUEUE_NAME', default=RedisWorkQueue.DEFAULT_NAME, show_default=True, help='Prefix of the Redis keys of the queue'),
+    click.option('--item-attempts', type=int, default=WorkQueue.DEFAULT_MAX_ATTEMPTS, show_default=True, help='Times an item is processed before it is marked as failed'),
+)
+
+
+storage_options = option_group(
+    click.option('--s3-bucket', envvar='BOIB_S3_BUCKET', help='Store documents in this S3 bucket instead of the local data directory'),
+    click.option('--s3-prefix', envvar='BOIB_S3_PREFIX', default='', help='Key prefix for documents stored in S3'),
+    click.option('--s3-endpoint-url', envvar='BOIB_S3_ENDPOINT_URL', help='Custom S3 endpoint, e.g. a local S3 stand-in'),
+    click.option('--upload-concurrency', type=int, default=S3Filesystem.DEFAULT_UPLOAD_CONCURRENCY, show_default=True, help='Maximum concurrent uploads to S3'),
+    click.option('--writer-threads', type=int, default=LocalFilesystem.DEFAULT_WRITER_THREADS, show_default=True, help='Threads writing documents to the local data directory'),
+    click.option('--fsync', type=click.Choice([FsyncPolicy.NONE, FsyncPolicy.FILE, FsyncPolicy.FULL]), default=FsyncPolicy.NONE, show_default=True, help='Sync local documents to disk before renaming them in place (file), and their directory after (full)'),
+    click.option('--dedupe', is_flag=True, help=f'Store each distinct document once under {ContentAddressedFilesystem.DEFAULT_BLOB_DIR}/, keyed by its SHA-256, and link its paths to it'),
+    click.option('--archive', type=click.Choice([ArchiveGrouping.BULLETIN, ArchiveGrouping.DAY]), callback=require_module('zstandard', 'Archive output'), help='Pack the documents of each bulletin or day into a single zstd archive with an index. Documents added to an existing archive are appended to it, on S3 the whole archive is rewritten'),
 )
 
 
+crawl_options = option_group(
+    storage_options,
+    filter_options,
+    click.option('--concurrency', type=int, default=CAIBBulletinExtractor.DEFAULT_CONCURRENCY, show_default=True, help='Maximum concurrent page fetches while extracting'),
+    click.option('--max-connections', type=int, default=DEFAULT_MAX_CONNECTIONS, show_default=True, help='Maximum open connections in the HTTP pool'),
+    click.option('--max-keepalive-connections', type=int, default=DEFAULT_MAX_KEEPALIVE_CONNECTIONS, show_default=True, help='Maximum idle connections kept alive in the HTTP pool'),
+    click.option('--connect-timeout', type=float, default=DEFAULT_CONNECT_TIMEOUT, show_default=True, help='Seconds to wait for a connection to be established'),
+    click.option('--read-timeout', type=float, default=DEFAULT_READ_TIMEOUT, show_default=True, help='Seconds to wait for data on an established connection'),
+    click.option('--max-attempts', type=int, default=RetryPolicy.DEFAULT_MAX_ATTEMPTS, show_default=True, help='Attempts per request on connection errors, 429 and 5xx responses'),
+    click.option('--dead-letters', 'dead_letters_path', default=DEFAULT_DEAD_LETTERS_PATH, show_default=True, help='File the permanently failed URLs are appended to at the end of the run'),
+    click.option('--http2/--no-http2', default=False, show_default=True, help='Negotiate HTTP/2 when the server supports it'),
+    click.option('--workers', type=int, default=Pipeline.DEFAULT_WORKERS, show_default=True, help='Bulletins downloaded in parallel'),
+    click.option('--queue-size', type=int, default=Pipeline.DEFAULT_QUEUE_SIZE, show_default=True, help='Extracted bulletins buffered ahead of the download workers'),
+    click.option('--download-concurrency', type=int, default=BulletinDownloader.DEFAULT_CONCURRENCY, show_default=True, help='Maximum articles downloaded at the same time'),
+    click.option('--rate-limit', 'rate_limits', multiple=True, callback=parse_rate_limits, metavar='HOST=RATE', help='Requests per second allowed to a host, 0 disables the limit (repeatable)'),
+    click.option('--manifest', 'manifest_path', default=DEFAULT_MANIFEST_PATH, show_default=True, help='Manifest of downloaded articles used to skip completed work, empty to disable'),
+    click.option('--cache-dir', default=DEFAULT_CACHE_DIR, show_default=True, help='On-disk HTTP cache for bulletin pages, empty to disable'),
+    click.option('--cache-ttl', type=float, default=HTTPCache.DEFAULT_TTL, show_default=True, help='Seconds a current-year page is served from cache before revalidating it'),
+    click.option('--parser', type=click.Choice(HTML_PARSERS), default=get_html_parser, show_default='lxml when installed', callback=require_module('lxml', 'The lxml parser', lambda value: value == 'lxml'), help='HTML parser backend'),
+    click.option('--export', 'export_formats', type=click.Choice(list(EXPORTERS)), multiple=True, callback=require_module('pyarrow', 'Parquet export', lambda values: ParquetExporter.FORMAT in values), help='Export bulletin, section and article metadata under metadata/ in this format (repeatable)'),
+    click.option('--metadata-only', is_flag=True, help='Only export metadata, without downloading documents. Exports JSONL unless --export is given'),
+    click.option('--pdf-text', is_flag=True, callback=require_module('pypdf', 'PDF text extraction'), help='Extract the text of downloaded PDFs into a .txt next to them, including the PDFs of articles downloaded by earlier runs'),
+    click.option('--pdf-text-processes', type=int, help='Processes extracting PDF text  [default: number of CPUs]'),
+    click.option('--metrics-file', help='Write metrics in the Prometheus text format to this file, periodically and at the end of the run'),
+    click.option('--metrics-port', type=int, help='Serve metrics in the Prometheus text format on this port while running'),
+    click.option('--metrics-interval', type=float, default=DEFAULT_EXPORT_INTERVAL, show_default=True, help='Seconds between writes of --metrics-file'),
+    click.option('--warc', 'warc_path', help='Append every HTTP response read during the crawl to this WARC file'),
+    click.option('--parse-processes', type=int, default=0, show_default=True, help='Processes parsing pages off the event loop, 0 parses inline'),
+)
+
+
+async def run(
+    job: Callable[[Pipeline, Manifest | None], Awaitable],
+    parser: str,
+    dead_letters_path: str,
+    metrics_file: str | None,
+    metrics_port: int | None,
+    metrics_interval: float,
+    **options,
+):
+    set_html_parser(parser)
+    dead_letters = DeadLetters()
+
+    try:
+        async with (
+            exporting(metrics_file, metrics_port, metrics_interval),
+            open_pipeline(dead_letters, **options) as (pipeline, manifest),
+        ):
+            await job(pipeline, manifest)
+    finally:
+        if dead_letters:
+            logger.warning(f'{len(dead_letters)} URLs failed permanently, see {dead_letters_path}')
+            await dead_letters.write(dead_letters_path)
+
+
+@asynccontextmanager
+async def open_pipeline(
+    dead_letters: DeadLetters,
+    concurrency: int,
+    max_connections: int,
+    max_keepalive_connections: int,
+    connect_timeout: float,
+    read_timeout: float,
+    max_attempts: int,
+    http2: bool,
+    workers: int,
+    queue_size: int,
+    download_concurrency: int,
+    rate_limits: dict[str, float],
+    manifest_path: str,
+    cache_dir: str,
+    cache_ttl: float,
+    parse_processes: int,
+    pdf_text: bool,
+    pdf_text_processes: int | None,
+    s3_bucket: str | None,
+    s3_prefix: str,
+    s3_endpoint_url: str | None,
+    upload_concurrency: int,
+    writer_threads: int,
+    fsync: str,
+    dedupe: bool,
+    archive: str | None,
+    warc_path: str | None,
+    export_formats: tuple[str],
+    metadata_only: bool,
+    extraction_filter: ExtractionFilter,
+) -> AsyncIterator[tuple[Pipeline, Manifest | None]]:
+    async with AsyncExitStack() as stack:
+        filesystem = await stack.enter_async_context(
+            build_filesystem(s3_bucket, s3_prefix, s3_endpoint_url, upload_concurrency, writer_threads, fsync, dedupe, archive)
+        )
+
+        warc = None
+        if warc_path:
+            warc = await stack.enter_async_context(WARCWriter(warc_path))
+
+        # One pooled client lives for the whole run and is shared by every
+        # extractor and downloader
+        client = await stack.enter_async_context(get_async_client(
+            http2=http2,
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            rate_limiter=HostRateLimiter(rate_limits),
+            cache=HTTPCache(cache_dir, cache_ttl) if cache_dir else None,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+            retry_policy=RetryPolicy(max_attempts=max_attempts),
+            circuit_breaker=CircuitBreaker(),
+            dead_letters=dead_letters,
+            warc=warc,
+        ))
+
+        executor = None
+        if parse_processes > 0:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=parse_processes))
+
+        if metadata_only and not export_formats:
+            export_formats = (JSONLExporter.FORMAT,)
+
+        # Exporters write their last buffered day when the stack unwinds
+        exporters = [
+            await stack.enter_async_context(exporter)
+            for exporter in build_exporters(filesystem, export_formats)
+        ]
+
+        downloader = None
+        manifest = None
+        if not metadata_only:
+            if manifest_path:
+                manifest = await stack.enter_async_context(Manifest(manifest_path, filesystem))
+
+            processors = []
+            if pdf_text:
+                pdf_text_executor = stack.enter_context(ProcessPoolExecutor(max_workers=pdf_text_processes))
+                processors.append(await stack.enter_async_context(PDFTextProcessor(filesystem, pdf_text_executor)))
+
+            downloader = build_downloader(filesystem, client, download_concurrency, manifest, executor, processors)
+
+        pipeline = Pipeline(
+            CAIBBulletinExtractor(
+                concurrency=concurrency,
+                client=client,
+                executor=executor,
+                extraction_filter=extraction_filter,
+            ),
+            downloader,
+            workers=workers,
+            queue_size=queue_size,
+            exporters=exporters,
+        )
+
+        yield pipeline, manifest
+
+
+def crawl(date_range: DateRange, extraction_filter: ExtractionFilter) -> Callable[[Pipeline, Manifest | None], Awaitable]:
+    async def job(pipeline: Pipeline, manifest: Manifest | None):
+        bulletins = await pipeline.run(date_range)
+
+        # Recorded so a later watch doesn't download them again. Filtered
+        # runs only download part of each bulletin
+        if manifest is not None and extraction_filter.is_empty:
+            for bulletin in bulletins:
+                await manifest.record_bulletin(bulletin)
+
+    return job
+
+
 @click.group()
-def cli():
-    pass
+@click.option('--log-level', type=click.Choice(LOG_LEVELS, case_sensitive=False), default='INFO', show_default=True, help='Minimum level of the log messages shown')
+def cli(log_level):
+    set_log_level(log_level)
 
 
 @cli.command()
-@click.argument('year', type=int)
-@click.argument('month', type=int, required=False)
-@click.argument('day', type=int, required=False)
-def fetch(year, month=None, day=None):
-    date = Date(year, month, day)
-    bulletins = asyncio.run(extractor.extract(date))
+@date_range_options
+@crawl_options
+def fetch(year, month, day, start, end, **options):
+    date_range = get_date_range(year, month, day, start, end)
+    extraction_filter = get_extraction_filter(options)
+    asyncio.run(run(crawl(date_range, extraction_filter), extraction_filter=extraction_filter, **options))
+
+
+def get_date_range(year: int | None, month: int | None, day: int | None, start, end) -> DateRange:
+    if year is not None:
+        if start is not None or end is not None:
+            raise click.UsageError('Pass either YEAR [MONTH] [DAY] or --from/--to, not both')
+
+        date_range = Date(year, month, day).as_range()
+    elif start is not None:
+        date_range = DateRange(start.date(), end.date() if end is not None else datetype.today())
+    else:
+        raise click.UsageError('Missing YEAR or --from')
+
+    if date_range.start > date_range.end:
+        raise click.UsageError(f'--from {date_range.start} is after --to {date_range.end}')
 
-    for bulletin in bulletins:
-        asyncio.run(downloader.download(bulletin))
+    return date_range
 
 
 @cli.command()
-def today():
+@crawl_options
+def today(**options):
     today = datetype.today()
     date = Date(today.year, today.month, today.day)
+    extraction_filter = get_extraction_filter(options)
+
+    asyncio.run(run(crawl(date.as_range(), extraction_filter), extraction_filter=extraction_filter, **options))
+
+
+@cli.command()
+@click.option('--interval', type=float, default=Watcher.DEFAULT_INTERVAL, show_default=True, help='Seconds between two polls of the calendar')
+@click.option('--since', type=click.DateTime(['%Y-%m-%d']), help='Download the bulletins published since this day  [default: today]')
+@crawl_options
+def watch(interval, since, **options):
+    if options['export_formats'] or options['metadata_only']:
+        raise click.UsageError('Metadata can\'t be exported while watching, each poll would overwrite the day files with the new bulletins only')
+
+    since = since.date() if since is not None else datetype.today()
+    extraction_filter = get_extraction_filter(options)
+
+    async def job(pipeline: Pipeline, manifest: Manifest | None):
+        # Bulletins crawled with a filter are only remembered until exit, a
+        # later unfiltered watch must still download the rest of them
+        if not extraction_filter.is_empty:
+            manifest = None
+
+        await Watcher(pipeline, since, interval, manifest).run()
+
+    try:
+        asyncio.run(run(job, extraction_filter=extraction_filter, **options))
+    except KeyboardInterrupt:
+        logger.info('Stopped watching')
+
+
+@cli.command()
+@date_range_options
+@click.option('--manifest', 'manifest_path', default=DEFAULT_MANIFEST_PATH, show_default=True, help='Skip the bulletins this manifest records as completed, empty to disable')
+@click.option('--bulletin-type', 'bulletin_types', type=click.Choice([BulletinType.ORDINARY, BulletinType.EXTRAORDINARY], case_sensitive=False), multiple=True, help='Only plan bulletins of this type (repeatable)')
+@queue_options
+def plan(year, month, day, start, end, manifest_path, bulletin_types, **options):
+    date_range = get_date_range(year, month, day, start, end)
+    extraction_filter = ExtractionFilter(bulletin_types=frozenset(bulletin_types))
+    asyncio.run(enqueue_bulletins(date_range, manifest_path, extraction_filter, **options))
+
+
+async def enqueue_bulletins(date_range: DateRange, manifest_path: str, extraction_filter: ExtractionFilter, **options):
+    skip = None
+    if manifest_path and os.path.exists(manifest_path):
+        async with Manifest(manifest_path) as manifest:
+            skip = (await manifest.completed_bulletins()).__contains__
+
+    # Only the yearly calendars are fetched, the bulletins are left to the
+    # workers
+    async with get_async_client() as client, build_queue(**options) as queue:
+        bulletins = await CAIBBulletinExtractor(client=client, extraction_filter=extraction_filter).plan(date_range, skip)
+        added = await queue.put(bulletin_items(bulletins))
+        stats = await queue.stats()
+
+    logger.info(f'Planned {len(bulletins)} bulletins for {date_range}, {added} new. Queue: {stats}')
+
+
+@cli.command()
+@click.option('--visibility-timeout', type=float, default=WorkQueue.DEFAULT_VISIBILITY_TIMEOUT, show_default=True, help='Seconds a leased item is hidden from other workers before it is handed out again')
+@click.option('--poll-interval', type=float, default=Worker.DEFAULT_POLL_INTERVAL, show_default=True, help='Seconds to wait when there is nothing to lease')
+@click.option('--exit-when-drained', is_flag=True, help='Exit once no item is pending, instead of waiting for new ones')
+@queue_options
+@crawl_options
+def worker(visibility_timeout, poll_interval, exit_when_drained, queue, queue_name, item_attempts, **options):
+    if options['export_formats'] or options['metadata_only']:
+        raise click.UsageError('Metadata can\'t be exported by workers, every worker only sees part of each day')
+
+    extraction_filter = get_extraction_filter(options)
+
+    async def job(pipeline: Pipeline, manifest: Manifest | None):
+        async with build_queue(queue, queue_name, item_attempts) as work_queue:
+            await Worker(
+                work_queue,
+                pipeline.extractor,
+                pipeline.downloader,
+                workers=options['workers'],
+                visibility_timeout=visibility_timeout,
+                poll_interval=poll_interval,
+                exit_when_drained=exit_when_drained,
+            ).run()
+
+    try:
+        asyncio.run(run(job, extraction_filter=extraction_filter, **options))
+    except KeyboardInterrupt:
+        logger.info('Worker stopped, its leased items are handed out again after the visibility timeout')
+
+
+@cli.command()
+@click.option('--manifest', 'manifest_path', default=DEFAULT_MANIFEST_PATH, show_default=True, help='Manifest of the downloaded articles to index')
+@click.option('--index', 'index_path', default=DEFAULT_INDEX_PATH, show_default=True, help='Search index, created if missing and updated incrementally')
+@storage_options
+def index(manifest_path, index_path, **options):
+    asyncio.run(update_index(manifest_path, index_path, **options))
+
+
+async def update_index(
+    manifest_path: str,
+    index_path: str,
+    s3_bucket: str | None,
+    s3_prefix: str,
+    s3_endpoint_url: str | None,
+    upload_concurrency: int,
+    writer_threads: int,
+    fsync: str,
+    dedupe: bool,
+    archive: str | None,
+):
+    async with (
+        build_filesystem(s3_bucket, s3_prefix, s3_endpoint_url, upload_concurrency, writer_threads, fsync, dedupe, archive) as filesystem,
+        Manifest(manifest_path) as manifest,
+        SearchIndex(index_path) as search_index,
+    ):
+        count = await search_index.update(manifest, filesystem)
+
+    logger.info(f'Indexed {count} documents')
+
+
+@cli.command()
+@click.argument('query', required=False)
+@click.option('--index', 'index_path', default=DEFAULT_INDEX_PATH, show_default=True, help='Search index built by the index command')
+@click.option('--organization', help='Only articles published by this organization')
+@click.option('--section', 'sections', type=click.Choice([section_type.value for section_type in SectionType]), multiple=True, help='Only articles of this section (repeatable)')
+@click.option('--from', 'start', type=click.DateTime(['%Y-%m-%d']), help='Only articles published on or after this day')
+@click.option('--to', 'end', type=click.DateTime(['%Y-%m-%d']), help='Only articles published on or before this day')
+@click.option('--limit', type=int, default=SearchIndex.DEFAULT_LIMIT, show_default=True, help='Maximum results shown')
+def search(query, index_path, organization, sections, start, end, limit):
+    if query is None and organization is None:
+        raise click.UsageError('Missing QUERY or --organization')
+
+    if not os.path.exists(index_path):
+        raise click.UsageError(f'No search index at {index_path}, build it with the index command')
+
+    search_index = SearchIndex(index_path)
+    search_index.open()
 
-    bulletins = asyncio.run(extractor.extract(date))
+    try:
+        results = search_index.search(
+            query,
+            organization=organization,
+            sections=sections,
+            start=start.date() if start is not None else None,
+            end=end.date() if end is not None else None,
+            limit=limit,
+        )
+    except sqlite3.OperationalError as e:
+        raise click.UsageError(f'Invalid query: {e}')
+    finally:
+        search_index.close()
 
-    for bulletin in bulletins:
-        asyncio.run(downloader.download(bulletin))
+    for result in results:
+        click.echo(f'{result.bulletin_date} - {result.bulletin_number} - {result.section} - {result.organization} - {result.path}')
+        click.echo(f'\t{result.summary}')
+        if result.snippet:
+            click.echo(f'\t{" ".join(result.snippet.split())}')
 
 if __name__ == '__main__':
-    cli()
\ No newline at end of file
+    cli()
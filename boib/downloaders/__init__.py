@@ -1,37 +1,164 @@
 from abc import ABC, abstractmethod
+import asyncio
 import os
 import uuid
 
-from boib.filesystems import Filesystem
-from boib.models import Article, Bulletin
+from boib.manifest import ArticleStatus, Manifest
+from boib.models import Article, Bulletin, Document, Section
 from boib.log import logger
+from boib.metrics import ARTICLES, timed
+from boib.processors import DocumentNotProcessableError, DocumentProcessor
 
 class ArticleDownloader(ABC):
 
     @abstractmethod
-    async def download(self, bulletin: Bulletin, article: Article):
+    async def download(self, bulletin: Bulletin, article: Article) -> Document:
+        pass
+
+    @abstractmethod
+    def get_url(self, article: Article) -> str | None:
+        # URL of the document downloaded for the article, if any
         pass
 
 
 class BulletinDownloader:
+    DEFAULT_CONCURRENCY = 8
 
-    def __init__(self, article_downloader: ArticleDownloader):
+    def __init__(
+        self,
+        article_downloader: ArticleDownloader,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        manifest: Manifest | None = None,
+        processors: list[DocumentProcessor] | None = None,
+    ):
         self.__article_downloader = article_downloader
+        self.__manifest = manifest
+        self.__processors = processors or []
+        # Shared by every bulletin being downloaded so the limit holds even
+        # when several bulletins are processed at the same time
+        self.__semaphore = asyncio.Semaphore(concurrency)
 
-    async def download(self, bulletin: Bulletin): 
+    def get_url(self, article: Article) -> str | None:
+        return self.__article_downloader.get_url(article)
+
+    async def download(self, bulletin: Bulletin) -> bool:
+        # True when every article of the bulletin is downloaded
         logger.info(f'Starting download for bulletin {bulletin.number} ({bulletin.date})')
-        for section in bulletin.sections:
-            logger.debug(f'Processing section: {section.type}')
-            for article in section.articles:
-                try:
-                    logger.debug(f'Downloading article: {article.number}')
-                    await self.__article_downloader.download(bulletin, article)
-                except DocumentNotAvailableError as e:
-                    logger.warning(f'Document not available for article: {article.number}. Error: {str(e)}')
-                    continue
+        results = await asyncio.gather(*(
+            self.__download_article(bulletin, section, article)
+            for section in bulletin.sections
+            for article in section.articles
+        ))
         
         logger.info(f'Completed download for bulletin {bulletin.number} ({bulletin.date})')
 
+        return all(results)
+
+    async def __download_article(self, bulletin: Bulletin, section: Section, article: Article) -> bool:
+        async with self.__semaphore:
+            # Completion is checked for the document this run would download,
+            # an article downloaded before as another document type isn't
+            # skipped
+            url = self.__article_downloader.get_url(article)
+            if self.__manifest is not None and await self.__manifest.is_completed(bulletin, article, url):
+                logger.debug(f'Skipping already downloaded article: {article.number}')
+                ARTICLES.inc(status='SKIPPED')
+                pending = await self.__get_unprocessed(bulletin, article)
+            else:
+                document = await self.__download_document(bulletin, section, article)
+                if document is None:
+                    return False
+
+                pending = [
+                    (processor, document) for processor in self.__processors if processor.accepts(document)
+                ]
+
+        # Processing happens outside of the download slot, the processors
+        # bound their own work
+        for processor, document in pending:
+            await self.__process_document(processor, bulletin, article, document)
+
+        return True
+
+    async def __download_document(self, bulletin: Bulletin, section: Section, article: Article) -> Document | None:
+        try:
+            logger.debug(f'Downloading article: {article.number}')
+            with timed('download'):
+                document = await self.__article_downloader.download(bulletin, article)
+        except (DocumentNotAvailableError, URLNotAvailableError) as e:
+            logger.warning(f'Document not available for article: {article.number}. Error: {str(e)}')
+            ARTICLES.inc(status=ArticleStatus.FAILED)
+            if self.__manifest is not None:
+                await self.__manifest.record_failed(bulletin, section, article, repr(e))
+            return None
+        except Exception as e:
+            # Whatever else goes wrong with a document, e.g. a page that
+            # can't be parsed or a storage error, fails that article only
+            # instead of the downloads running next to it
+            logger.exception(f'Could not download article: {article.number}. Error: {e!r}')
+            ARTICLES.inc(status=ArticleStatus.FAILED)
+            if self.__manifest is not None:
+                await self.__manifest.record_failed(bulletin, section, article, repr(e))
+            return None
+
+        ARTICLES.inc(status=ArticleStatus.COMPLETED)
+        if self.__manifest is not None:
+            await self.__manifest.record_completed(bulletin, section, article, document)
+
+        return document
+
+    async def __get_unprocessed(self, bulletin: Bulletin, article: Article) -> list[tuple[DocumentProcessor, Document]]:
+        # Documents of skipped articles, downloaded by an earlier run, e.g.
+        # before a processor was enabled, are processed if the manifest has
+        # none of the documents derived from them
+        if not self.__processors:
+            return []
+
+        documents = await self.__manifest.get_article_documents(bulletin, article)
+        paths = {document.path for document in documents}
+
+        return [
+            (processor, document)
+            for document in documents
+            for processor in self.__processors
+            if processor.accepts(document) and not paths.issuperset(processor.get_paths(document))
+        ]
+
+    async def __process_document(
+        self,
+        processor: DocumentProcessor,
+        bulletin: Bulletin,
+        article: Article,
+        document: Document,
+    ):
+        try:
+            with timed('process'):
+                documents = await processor.process(bulletin, article, document)
+        except DocumentNotProcessableError as e:
+            logger.warning(f'Could not process {document.path}. Error: {str(e)}')
+            return
+        except Exception as e:
+            logger.exception(f'Unexpected error processing {document.path}: {e!r}')
+            return
+
+        if self.__manifest is not None:
+            for derived_document in documents:
+                await self.__manifest.add_document(bulletin, article, derived_document)
+
+
+def get_article_path(bulletin: Bulletin, article: Article, url: str, extension: str) -> str:
+    # Articles without a registry number are named after their document URL,
+    # so re-running a download writes to the same path
+    name = article.number or uuid.uuid5(uuid.NAMESPACE_URL, url)
+
+    return os.path.join(
+        str(bulletin.date.year),
+        str(bulletin.date.month),
+        str(bulletin.date.day),
+        str(bulletin.number),
+        f'{name}.{extension}'
+    )
+
 
 class URLNotAvailableError(Exception):
     pass
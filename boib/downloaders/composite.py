@@ -1,5 +1,5 @@
 from boib.downloaders import ArticleDownloader, URLNotAvailableError
-from boib.models import Article, Bulletin
+from boib.models import Article, Bulletin, Document
 
 
 class CompositeArticleDownloader(ArticleDownloader):
@@ -7,10 +7,19 @@ class CompositeArticleDownloader(ArticleDownloader):
     def __init__(self, article_downloaders: list[ArticleDownloader]):
         self.__article_downloaders = article_downloaders
     
-    async def download(self, bulletin: Bulletin, article: Article):
+    async def download(self, bulletin: Bulletin, article: Article) -> Document:
         for article_downloader in self.__article_downloaders:
             try:
-                await article_downloader.download(bulletin, article)
-                return
+                return await article_downloader.download(bulletin, article)
             except URLNotAvailableError: 
-                pass
\ No newline at end of file
+                pass
+
+        raise URLNotAvailableError()
+
+    def get_url(self, article: Article) -> str | None:
+        for article_downloader in self.__article_downloaders:
+            url = article_downloader.get_url(article)
+            if url is not None:
+                return url
+
+        return None
\ No newline at end of file
@@ -1,38 +1,66 @@
-import os
-import uuid
+import asyncio
+from concurrent.futures import Executor
+import hashlib
 
-from boib.downloaders import ArticleDownloader, URLNotAvailableError
+from bs4 import SoupStrainer
+import httpx
+
+from boib.downloaders import ArticleDownloader, DocumentNotAvailableError, URLNotAvailableError, get_article_path
 from boib.filesystems import Filesystem
-from boib.models import Article, Bulletin, URLType
-from boib.utils import get_soup
+from boib.metrics import timed
+from boib.models import Article, Bulletin, Document
+from boib.utils import get_html_parser, get_page, parse_html
 
 class HTMLArticleDownloader(ArticleDownloader):
+    CONTENT_STRAINER = SoupStrainer('div', id='contenidoEdicto')
 
-    def __init__(self, filesystem: Filesystem):
+    def __init__(
+        self,
+        filesystem: Filesystem,
+        client: httpx.AsyncClient | None = None,
+        executor: Executor | None = None,
+    ):
         self.__filesystem = filesystem
+        self.__client = client
+        self.__executor = executor
     
-    async def download(self, bulletin: Bulletin, article: Article):
-        path = self.__get_path(bulletin, article)
-        content = await self.__get_content(article)
-
-        await self.__filesystem.write(path, bytes(content, 'utf-8'))
-
-    async def __get_content(self, article: Article):
-        article_url = article.urls.get(URLType.HTML, None)
+    async def download(self, bulletin: Bulletin, article: Article) -> Document:
+        article_url = self.get_url(article)
         if article_url is None:
             raise URLNotAvailableError()
 
-        soup = await get_soup(article_url)
+        path = get_article_path(bulletin, article, article_url, 'txt')
+        content = bytes(await self.__get_content(article_url), 'utf-8')
+
+        with timed('write'):
+            await self.__filesystem.write(path, content)
+
+        return Document(
+            path=path,
+            url=article_url,
+            size=len(content),
+            sha256=hashlib.sha256(content).hexdigest(),
+        )
+
+    def get_url(self, article: Article) -> str | None:
+        return article.html_url
+
+    async def __get_content(self, article_url: str) -> str:
+        try:
+            page = await get_page(article_url, self.__client)
+        except httpx.HTTPError as e:
+            raise DocumentNotAvailableError() from e
+
+        if self.__executor is None:
+            return self.parse_content(page, get_html_parser())
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, self.parse_content, page, get_html_parser())
+
+    @classmethod
+    def parse_content(cls, page: str, parser: str) -> str:
+        soup = parse_html(page, cls.CONTENT_STRAINER, parser)
 
         content_div = soup.find('div', {'id' : 'contenidoEdicto'})
 
         return content_div.text
-
-    def __get_path(self, bulletin: Bulletin, article: Article) -> str:
-        return os.path.join(
-            str(bulletin.date.year),
-            str(bulletin.date.month),
-            str(bulletin.date.day),
-            str(bulletin.number),
-            f'{article.number or uuid.uuid4()}.txt'
-        )
\ No newline at end of file
@@ -1,46 +1,61 @@
-import os
-import uuid
+from collections.abc import AsyncIterator
+import hashlib
 
-from httpx import HTTPStatusError
+import httpx
 
-from boib.downloaders import ArticleDownloader, DocumentNotAvailableError, URLNotAvailableError
+from boib.downloaders import ArticleDownloader, DocumentNotAvailableError, URLNotAvailableError, get_article_path
 from boib.filesystems import Filesystem
-from boib.models import Article, Bulletin, URLType
+from boib.models import Article, Bulletin, Document
 from boib.utils import get_async_client
 
 
 class PDFArticleDownloader(ArticleDownloader):
 
-    def __init__(self, filesystem: Filesystem):
+    def __init__(self, filesystem: Filesystem, client: httpx.AsyncClient | None = None):
         self.__filesystem = filesystem
+        self.__client = client
     
-    async def download(self, bulletin: Bulletin, article: Article):
-        path = self.__get_path(bulletin, article)
-        content = await self.__get_content(article)
-
-        await self.__filesystem.write(path, content)
-
-    async def __get_content(self, article: Article):
-        article_url = article.urls.get(URLType.PDF, None)
+    async def download(self, bulletin: Bulletin, article: Article) -> Document:
+        article_url = self.get_url(article)
         if article_url is None:
             raise URLNotAvailableError()
 
+        path = get_article_path(bulletin, article, article_url, 'pdf')
+
+        if self.__client is None:
+            async with get_async_client() as client:
+                return await self.__download(client, article_url, path)
+
+        return await self.__download(self.__client, article_url, path)
+
+    def get_url(self, article: Article) -> str | None:
+        return article.pdf_url
+
+    async def __download(self, client: httpx.AsyncClient, url: str, path: str) -> Document:
+        # The body is streamed straight to the filesystem and hashed on the
+        # way
+        digest = hashlib.sha256()
+        size = 0
 
-        async with get_async_client() as client:
-            response = await client.get(article_url)
+        async def chunks(response: httpx.Response) -> AsyncIterator[bytes]:
+            nonlocal size
+            async for chunk in response.aiter_bytes():
+                digest.update(chunk)
+                size += len(chunk)
+                yield chunk
 
-            try:
+        # Transient errors have already been retried by the client, whatever
+        # reaches this point is a permanent failure
+        try:
+            async with client.stream('GET', url) as response:
                 response.raise_for_status()
-            except HTTPStatusError as e:
-                raise DocumentNotAvailableError() from e
-
-            return response.content
-
-    def __get_path(self, bulletin: Bulletin, article: Article) -> str:
-        return os.path.join(
-            str(bulletin.date.year),
-            str(bulletin.date.month),
-            str(bulletin.date.day),
-            str(bulletin.number),
-            f'{article.number or uuid.uuid4()}.pdf'
-        )
\ No newline at end of file
+                await self.__filesystem.write_stream(path, chunks(response))
+        except httpx.HTTPError as e:
+            raise DocumentNotAvailableError() from e
+
+        return Document(
+            path=path,
+            url=url,
+            size=size,
+            sha256=digest.hexdigest(),
+        )
@@ -0,0 +1,127 @@
+from abc import ABC, abstractmethod
+from datetime import date
+import os
+
+from boib.filesystems import Filesystem
+from boib.log import logger
+from boib.models import Article, Bulletin, Section
+
+
+class MetadataExporter(ABC):
+    FORMAT = None
+
+    def __init__(self, filesystem: Filesystem, directory: str = 'metadata'):
+        self.__filesystem = filesystem
+        self.__directory = directory
+        self.__date = None
+        self.__bulletins = []
+        self.__complete = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, *args):
+        # The day being buffered when the run failed may be missing bulletins
+        if exc_type is not None:
+            self.__discard('the run failed')
+            return
+
+        await self.flush()
+
+    async def export(self, bulletin: Bulletin):
+        # Bulletins arrive in calendar order, so they are buffered by day and
+        # each day is written as a whole once the next one starts. A day is
+        # never split across runs, so re-exporting it overwrites its file.
+        # Days with a bulletin or section that could not be extracted are not
+        # written, so they don't overwrite a complete earlier export
+        if bulletin.date != self.__date:
+            await self.flush()
+            self.__date = bulletin.date
+
+        self.__complete = self.__complete and bulletin.complete
+        self.__bulletins.append(bulletin)
+
+    async def flush(self):
+        if not self.__bulletins:
+            return
+
+        if not self.__complete:
+            self.__discard('some of its bulletins could not be extracted')
+            return
+
+        path = self.__get_path(self.__date)
+        await self.__filesystem.write(path, self.serialize(self.__bulletins))
+        logger.debug(f'Exported {len(self.__bulletins)} bulletins to {path}')
+
+        self.__bulletins = []
+
+    def __discard(self, reason: str):
+        if self.__bulletins:
+            logger.warning(f'Not exporting {self.__date}, {reason}')
+
+        self.__bulletins = []
+        self.__complete = True
+
+    @abstractmethod
+    def serialize(self, bulletins: list[Bulletin]) -> bytes:
+        pass
+
+    def __get_path(self, date: date) -> str:
+        # Hive style partitions, so analytics engines can prune by year and
+        # month
+        return os.path.join(
+            self.__directory,
+            self.FORMAT,
+            f'year={date.year}',
+            f'month={date.month:02}',
+            f'{date.isoformat()}.{self.FORMAT}',
+        )
+
+
+def bulletin_to_dict(bulletin: Bulletin) -> dict:
+    return {
+        'number': str(bulletin.number),
+        'type': bulletin.type,
+        'date': bulletin.date.isoformat(),
+        'url': bulletin.url,
+        'sections': [section_to_dict(section) for section in bulletin.sections],
+    }
+
+
+def section_to_dict(section: Section) -> dict:
+    return {
+        'type': section.type.value,
+        'url': section.url,
+        'articles': [article_to_dict(article) for article in section.articles],
+    }
+
+
+def article_to_dict(article: Article) -> dict:
+    return {
+        'number': article.number,
+        'organization': article.organization,
+        'summary': article.summary,
+        'pdf_url': article.pdf_url,
+        'html_url': article.html_url,
+    }
+
+
+def article_rows(bulletin: Bulletin) -> list[dict]:
+    # One flat row per article with its bulletin and section denormalized
+    return [
+        {
+            'bulletin_number': str(bulletin.number),
+            'bulletin_type': bulletin.type,
+            'bulletin_date': bulletin.date,
+            'bulletin_url': bulletin.url,
+            'section_type': section.type.value,
+            'section_url': section.url,
+            'article_number': article.number,
+            'organization': article.organization,
+            'summary': article.summary,
+            'pdf_url': article.pdf_url,
+            'html_url': article.html_url,
+        }
+        for section in bulletin.sections
+        for article in section.articles
+    ]
@@ -0,0 +1,17 @@
+import json
+
+from boib.exporters import MetadataExporter, bulletin_to_dict
+from boib.models import Bulletin
+
+
+class JSONLExporter(MetadataExporter):
+    # One bulletin per line, with its sections and articles nested
+    FORMAT = 'jsonl'
+
+    def serialize(self, bulletins: list[Bulletin]) -> bytes:
+        lines = [
+            json.dumps(bulletin_to_dict(bulletin), ensure_ascii=False)
+            for bulletin in bulletins
+        ]
+
+        return bytes(''.join(f'{line}\n' for line in lines), 'utf-8')
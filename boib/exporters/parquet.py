@@ -0,0 +1,48 @@
+import io
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+from boib.exporters import MetadataExporter, article_rows
+from boib.filesystems import Filesystem
+from boib.models import Bulletin
+
+
+class ParquetExporter(MetadataExporter):
+    # One row per article, with the bulletin and section columns repeated so
+    # the files can be queried without joins
+    FORMAT = 'parquet'
+
+    def __init__(self, filesystem: Filesystem, directory: str = 'metadata'):
+        if pyarrow is None:
+            raise RuntimeError('Parquet export requires pyarrow, install it with `pip install pyarrow`')
+
+        super().__init__(filesystem, directory)
+
+    def serialize(self, bulletins: list[Bulletin]) -> bytes:
+        rows = [row for bulletin in bulletins for row in article_rows(bulletin)]
+        table = pyarrow.Table.from_pylist(rows, schema=self.__get_schema())
+
+        buffer = io.BytesIO()
+        pyarrow.parquet.write_table(table, buffer, compression='zstd')
+
+        return buffer.getvalue()
+
+    @staticmethod
+    def __get_schema():
+        return pyarrow.schema([
+            ('bulletin_number', pyarrow.string()),
+            ('bulletin_type', pyarrow.string()),
+            ('bulletin_date', pyarrow.date32()),
+            ('bulletin_url', pyarrow.string()),
+            ('section_type', pyarrow.string()),
+            ('section_url', pyarrow.string()),
+            ('article_number', pyarrow.int64()),
+            ('organization', pyarrow.string()),
+            ('summary', pyarrow.string()),
+            ('pdf_url', pyarrow.string()),
+            ('html_url', pyarrow.string()),
+        ])
@@ -1,7 +1,8 @@
 
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Callable
 
-from boib.models import Article, Bulletin, Date, Section
+from boib.models import Article, Bulletin, Date, DateRange, Section
 
 
 class BulletinExtractor(ABC):
@@ -10,6 +11,40 @@ class BulletinExtractor(ABC):
     async def extract(self, date: Date) -> list[Bulletin]:
         pass
 
+    async def extract_iter(self, date: Date) -> AsyncIterator[Bulletin]:
+        for bulletin in await self.extract(date):
+            yield bulletin
+
+    async def extract_range_iter(
+        self,
+        date_range: DateRange,
+        skip: Callable[[str], bool] | None = None,
+    ) -> AsyncIterator[Bulletin]:
+        # Extractors without their own range support extract every year of
+        # the range and drop the bulletins outside of it, or whose URL has to
+        # be skipped
+        for year in date_range.years:
+            async for bulletin in self.extract_iter(Date(year, None, None)):
+                if bulletin.date in date_range and not (skip and skip(bulletin.url)):
+                    yield bulletin
+
+    async def plan(
+        self,
+        date_range: DateRange,
+        skip: Callable[[str], bool] | None = None,
+    ) -> list[Bulletin]:
+        # Bulletins of the range without their number nor sections, to be
+        # completed later with `extract_bulletin`
+        raise NotImplementedError('Planning bulletins is not supported')
+
+    async def extract_bulletin(self, bulletin: Bulletin) -> Bulletin:
+        raise NotImplementedError('Extracting a planned bulletin is not supported')
+
+    async def calendar_changed(self, year: int) -> bool:
+        # Whether bulletins may have been published in the year since the last
+        # call. Without a cheap way to tell, they always may
+        return True
+
 
 class SectionExtractor(ABC): 
     
@@ -17,6 +52,11 @@ class SectionExtractor(ABC):
     async def extract(self, bulletin: Bulletin) -> list[Section]:
         pass
 
+    async def extract_from_sections(self, bulletin: Bulletin, sections: list[Section]) -> list[Section]:
+        # Sections already parsed from the bulletin page, without their
+        # articles. Extractors that can't complete them fetch the page again
+        return await self.extract(bulletin)
+
 
 class ArticleExtractor:
     
@@ -1,192 +1,415 @@
+import asyncio
+import hashlib
+from collections import deque
+from concurrent.futures import Executor
+from collections.abc import AsyncIterator, Callable
+from dataclasses import replace
 from datetime import date as datetype
 import re
+from typing import TypeVar
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+import httpx
 
 from boib.extractors import ArticleExtractor, BulletinExtractor, SectionExtractor
 from boib.factories import BulletinTypeFactory, SectionTypeFactory
-from boib.models import Article, Bulletin, Date, Section, SectionType, URLType
-from boib.utils import get_soup, month_to_number, url_is_absolute
+from boib.filters import ExtractionFilter
+from boib.models import Article, Bulletin, Date, DateRange, Section, SectionType
+from boib.utils import get_async_client, get_html_parser, get_page, month_to_number, parse_html, url_is_absolute
 from boib.log import logger
+from boib.metrics import BULLETINS, QUEUE_DEPTH, timed
 
 
+T = TypeVar('T')
+
 class CAIBBaseExtractor:
     BASE_DOMAIN = 'https://intranet.caib.es'
     BASE_URL = f'{BASE_DOMAIN}/eboibfront'
+    DEFAULT_CONCURRENCY = 8
+
+    def __init__(
+        self,
+        semaphore: asyncio.Semaphore | None = None,
+        client: httpx.AsyncClient | None = None,
+        executor: Executor | None = None,
+        extraction_filter: ExtractionFilter | None = None,
+    ):
+        # A single semaphore and HTTP client are shared by every extractor of
+        # the tree so the concurrency limit is global, not per level, and
+        # connections are reused between pages. So is the filter, each level
+        # applies its part of it
+        self._semaphore = semaphore or asyncio.Semaphore(self.DEFAULT_CONCURRENCY)
+        self._client = client
+        self._executor = executor
+        self._filter = extraction_filter or ExtractionFilter()
+
+    async def _get_page(self, url: str) -> str:
+        async with self._semaphore:
+            return await get_page(url, self._client)
+
+    async def _run_parser(self, parser: Callable[..., T], *args) -> T:
+        # Parsers run in the executor, when there is one, so large pages don't
+        # block the event loop. They must be picklable and return plain models
+        if self._executor is None:
+            return parser(*args)
+
+        loop = asyncio.get_running_loop()
+        with timed('parse'):
+            return await loop.run_in_executor(self._executor, parser, *args)
 
 
 class CAIBBulletinExtractor(CAIBBaseExtractor, BulletinExtractor):
+    CALENDAR_STRAINER = SoupStrainer('div', class_='calendario_anual_mes')
 
-    def __init__(self,  section_extractor: SectionExtractor = None):
-            self.__section_extractor = section_extractor or CAIBSectionExtractor()
+    def __init__(
+        self,
+        section_extractor: SectionExtractor = None,
+        concurrency: int = CAIBBaseExtractor.DEFAULT_CONCURRENCY,
+        client: httpx.AsyncClient | None = None,
+        prefetch: int | None = None,
+        executor: Executor | None = None,
+        extraction_filter: ExtractionFilter | None = None,
+    ):
+        super().__init__(asyncio.Semaphore(concurrency), client, executor, extraction_filter)
+        self.__prefetch = prefetch or concurrency
+        self.__calendar_states = {}
+        self.__section_extractor = section_extractor or CAIBSectionExtractor(
+            semaphore=self._semaphore,
+            client=self._client,
+            executor=self._executor,
+            extraction_filter=self._filter,
+        )
         
     async def extract(self, date: Date) -> list[Bulletin]:
-        logger.info(f'Starting bulletin extraction')
-        yearly_calendar_url = f'{self.BASE_URL}/ca/{date.year}'
-        soup = await get_soup(yearly_calendar_url)
-
-        table_containers = soup.find_all('div', {'class': 'calendario_anual_mes'})
-
-        base_date = datetype(date.year, 1, 1)
-        if date.month is None:
-            logger.debug(f'Extracting all bulletins for year {date.year}')
-            bulletins = []
-            for table_container in table_containers:
-                month_bulletins = await self.__extract_month_bulletins(table_container, base_date)
-                bulletins.extend(month_bulletins) 
-            
-            logger.info(f'Completed extraction of {len(bulletins)} bulletins for year {date.year}')
-            return bulletins
-        
-
-        base_date = base_date.replace(month=date.month)
-        month_table = table_containers[date.month - 1]
+        return [bulletin async for bulletin in self.extract_iter(date)]
+
+    async def extract_iter(self, date: Date) -> AsyncIterator[Bulletin]:
+        async for bulletin in self.extract_range_iter(date.as_range()):
+            yield bulletin
+
+    async def extract_range_iter(
+        self,
+        date_range: DateRange,
+        skip: Callable[[str], bool] | None = None,
+    ) -> AsyncIterator[Bulletin]:
+        logger.info(f'Starting bulletin extraction for {date_range}')
+
+        # The whole range is planned up front, so bulletins are scheduled
+        # across year and month boundaries instead of one period at a time
+        planned = await self.plan(date_range, skip)
+
+        count = 0
+        async for bulletin in self.__extract_bulletins(planned):
+            if bulletin.extracted:
+                count += 1
+                BULLETINS.inc()
+            yield bulletin
+
+        logger.info(f'Completed extraction of {count} bulletins for {date_range}')
+
+    async def plan(
+        self,
+        date_range: DateRange,
+        skip: Callable[[str], bool] | None = None,
+    ) -> list[Bulletin]:
+        # Every yearly calendar of the range is fetched once
+        with timed('calendar'):
+            pages = await asyncio.gather(*(
+                self._get_page(self.get_calendar_url(year)) for year in date_range.years
+            ))
+
+        calendars = await asyncio.gather(*(
+            self._run_parser(self.parse_calendar, page, year, get_html_parser())
+            for year, page in zip(date_range.years, pages)
+        ))
 
-        if date.day is None:
-            logger.debug(f'Extracting all bulletins for month {date.year}-{date.month}')
-            bulletins = await self.__extract_month_bulletins(month_table, base_date)
-            logger.info(f'Completed extraction of {len(bulletins)} bulletins for month {date.year}-{date.month}')
-            return bulletins
-
-        base_date = base_date.replace(day=date.day)
-        day_anchors = month_table.find_all('a', text=re.compile(f'^{date.day}(\\*E)?$'))
-        
-        logger.debug(f'Extracting bulletins for day {date.year}-{date.month}-{date.day}')
         bulletins = [
-            await self.__extract_bulletin(day_anchor, base_date) for day_anchor in day_anchors
+            bulletin
+            for calendar in calendars
+            for bulletin in calendar
+            if bulletin.date in date_range
         ]
-        logger.info(f'Completed extraction of {len(bulletins)} bulletins for day {date.year}-{date.month}-{date.day}')
+
+        # Bulletins of the types left out are never fetched
+        bulletins = [bulletin for bulletin in bulletins if self._filter.accepts_bulletin(bulletin)]
+
+        if skip is not None:
+            bulletins = [bulletin for bulletin in bulletins if not skip(bulletin.url)]
+
+        logger.debug(f'Planned {len(bulletins)} bulletins for {date_range}')
+
         return bulletins
-    
-    async def __extract_month_bulletins(self, table_container, base_date: datetype) -> list[Bulletin]:
-        bulletins = []
-        
+
+    async def __extract_bulletins(self, planned: list[Bulletin]) -> AsyncIterator[Bulletin]:
+        # Bulletins are crawled concurrently but yielded in calendar order. Only
+        # a window of them is scheduled ahead of the consumer so a slow
+        # consumer does not make the whole year pile up in memory
+        pending = deque()
+        try:
+            for bulletin in planned:
+                pending.append(asyncio.create_task(self.__try_extract_bulletin(bulletin)))
+                QUEUE_DEPTH.set(len(pending), queue='prefetch')
+                if len(pending) >= self.__prefetch:
+                    bulletin = await pending.popleft()
+                    QUEUE_DEPTH.set(len(pending), queue='prefetch')
+                    yield bulletin
+
+            while pending:
+                bulletin = await pending.popleft()
+                QUEUE_DEPTH.set(len(pending), queue='prefetch')
+                yield bulletin
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @classmethod
+    def parse_calendar(cls, page: str, year: int, parser: str) -> list[Bulletin]:
+        # Bulletins of the year without their number nor sections
+        soup = parse_html(page, cls.CALENDAR_STRAINER, parser)
+
+        return [
+            Bulletin(
+                number=None,
+                type=BulletinTypeFactory.from_anchor_class(anchor['class']),
+                date=bulletin_date,
+                url=cls.__get_bulletin_url(anchor),
+                sections=[],
+            )
+            for table_container in soup.find_all('div', {'class': 'calendario_anual_mes'})
+            for anchor, bulletin_date in cls.__find_month_anchors(table_container, year)
+        ]
+
+    @staticmethod
+    def __find_month_anchors(table_container, year: int) -> list:
         month_str = table_container.find('h3').text
         month = month_to_number(month_str)
-        monthly_date = base_date.replace(month=month)
 
         bulletin_divs = table_container.find_all('div', {'class': 'boib'})
-        logger.debug(f'Found {len(bulletin_divs)} bulletin divs for month {base_date.year}-{month}')
-        
-        for bulletin_div in bulletin_divs:
-            anchors = bulletin_div.find_all('a')
-            for anchor in anchors:
-                bulletins.append(
-                    await self.__extract_bulletin(anchor, monthly_date)
-                )
+        logger.debug(f'Found {len(bulletin_divs)} bulletin divs for month {year}-{month}')
 
-        return bulletins
+        return [
+            (anchor, datetype(year, month, int(re.match(r'\d+', anchor.text).group(0))))
+            for bulletin_div in bulletin_divs
+            for anchor in bulletin_div.find_all('a')
+        ]
     
-    async def __extract_bulletin(self, anchor_element, base_date):
-        bulletin_type = BulletinTypeFactory.from_anchor_class(anchor_element['class'])
-        day = re.match(r'\d+', anchor_element.text).group(0)
+    async def __try_extract_bulletin(self, bulletin: Bulletin) -> Bulletin:
+        # A bulletin whose page can't be fetched, even after the client
+        # retries, is yielded as not extracted so the rest of the period is
+        # still extracted and consumers know the period is incomplete
+        try:
+            return await self.extract_bulletin(bulletin)
+        except httpx.HTTPError as e:
+            logger.error(f'Could not extract bulletin {bulletin.url}: {e!r}')
+            return replace(bulletin, extracted=False)
+
+    async def extract_bulletin(self, bulletin: Bulletin) -> Bulletin:
+        # The bulletin page holds both its number and its sections, so it is
+        # fetched once and shared with the section extractor. Bulletins planned
+        # without the filter, e.g. queued by another node, are left empty
+        if not self._filter.accepts_bulletin(bulletin):
+            logger.debug(f'Skipping {bulletin.type} bulletin {bulletin.url}')
+            return bulletin
+
+        with timed('bulletin'):
+            page = await self._get_page(bulletin.url)
+
+        number, sections = await self._run_parser(
+            CAIBSectionExtractor.parse_bulletin, page, bulletin.url, get_html_parser(),
+        )
+        bulletin = replace(bulletin, number=number)
+        if number is None:
+            logger.warning(f'Could not extract bulletin number from {bulletin.url}')
 
-        bulletin_date = base_date.replace(day=int(day))
+        # Kept as not extracted, so it is crawled again instead of being
+        # recorded without its articles
+        if sections is None:
+            logger.warning(f'Unknown layout of bulletin page {bulletin.url}, no sections found')
+            return replace(bulletin, extracted=False)
 
-        url = f'{self.BASE_DOMAIN}{anchor_element['href']}'
-        number = await self.__get_bulletin_number(url)
+        logger.debug(f'Extracting bulletin {bulletin.number} from {bulletin.date}')
 
-        logger.debug(f'Extracting bulletin {number} from {bulletin_date}')
+        sections = await self.__section_extractor.extract_from_sections(bulletin, sections)
 
-        bulletin = Bulletin(
-            number=number,
-            type=bulletin_type, 
-            date=bulletin_date, 
-            url=url,
-            sections=[]
-        )
+        return replace(bulletin, sections=sections)
 
-        bulletin.sections = await self.__section_extractor.extract(bulletin)
+    async def calendar_changed(self, year: int) -> bool:
+        # Conditional request, the validators and a hash of the last calendar
+        # seen are kept per year. `no-cache` makes the HTTP cache revalidate
+        # the page instead of serving it while it is fresh
+        url = self.get_calendar_url(year)
+        validators, last_digest = self.__calendar_states.get(year, ({}, None))
 
-        return bulletin
+        async with self._semaphore:
+            client = self._client or get_async_client()
+            try:
+                response = await client.get(url, headers={'Cache-Control': 'no-cache', **validators})
+            finally:
+                if self._client is None:
+                    await client.aclose()
 
-    async def __get_bulletin_number(self, url: str) -> int | None:
-        soup = await get_soup(url)
-        number_container = soup.find('a', {'class': 'fijo'})
-        strong = number_container.find('strong')
-        matches = re.findall(r'\d+', strong.text.strip())
-        if not matches:
-            logger.warning(f'Could not extract bulletin number from {url}')
-            return None
-        
-        return matches[0]
+        if response.status_code == 304:
+            return False
+
+        response.raise_for_status()
+
+        digest = hashlib.sha256(response.content).hexdigest()
+        validators = {
+            header: response.headers[key]
+            for key, header in (('etag', 'If-None-Match'), ('last-modified', 'If-Modified-Since'))
+            if key in response.headers
+        }
+        self.__calendar_states[year] = (validators, digest)
+
+        return digest != last_digest
+
+    def get_calendar_url(self, year: int) -> str:
+        return f'{self.BASE_URL}/ca/{year}'
+
+    @classmethod
+    def __get_bulletin_url(cls, anchor_element) -> str:
+        return f'{cls.BASE_DOMAIN}{anchor_element['href']}'
 
 
 class CAIBSectionExtractor(CAIBBaseExtractor, SectionExtractor):
+    # Bulletin number, sections list and legacy articles list
+    BULLETIN_STRAINER = SoupStrainer(['a', 'ul'], class_=['fijo', 'primerosHijos', 'llistat'])
 
     def __init__(
         self, 
         article_extractor: ArticleExtractor = None,
+        semaphore: asyncio.Semaphore | None = None,
+        client: httpx.AsyncClient | None = None,
+        executor: Executor | None = None,
+        extraction_filter: ExtractionFilter | None = None,
     ):
-        self.__article_extractor = article_extractor or CAIBArticleExtractor()
-        self.__legacy_article_extractor = CAIBLegacyArticleExtractor()
-
+        super().__init__(semaphore, client, executor, extraction_filter)
+        self.__article_extractor = article_extractor or CAIBArticleExtractor(
+            semaphore=self._semaphore,
+            client=self._client,
+            executor=self._executor,
+            extraction_filter=self._filter,
+        )
     async def extract(self, bulletin: Bulletin) -> list[Section]:
+        page = await self._get_page(bulletin.url)
+        _, sections = await self._run_parser(self.parse_bulletin, page, bulletin.url, get_html_parser())
+        if sections is None:
+            logger.warning(f'Unknown layout of bulletin page {bulletin.url}, no sections found')
+            return []
+
+        return await self.extract_from_sections(bulletin, sections)
+
+    async def extract_from_sections(self, bulletin: Bulletin, sections: list[Section]) -> list[Section]:
         logger.debug(f'Extracting sections for bulletin {bulletin.number}')
-        soup = await get_soup(bulletin.url)
+        # The pages of the sections left out are never fetched
+        sections = [section for section in sections if self._filter.accepts_section(section.type)]
+        logger.debug(f'Found {len(sections)} sections for bulletin {bulletin.number}')
+
+        return list(await asyncio.gather(*(self.__extract_section(section) for section in sections)))
+
+    async def __extract_section(self, section: Section) -> Section:
+        # Legacy bulletins list their only article on the bulletin page itself
+        if section.type is SectionType.LEGACY:
+            section = replace(section, articles=self._filter.filter_articles(section.articles))
+            logger.debug(f'Found {len(section.articles)} articles in legacy section')
+            return section
+
+        logger.debug(f'Building section {section.type}')
+        try:
+            articles = await self.__article_extractor.extract(section)
+        except httpx.HTTPError as e:
+            # Kept as incomplete, so the bulletin is crawled again later
+            # instead of being recorded without these articles
+            logger.error(f'Could not extract articles of section {section.type} from {section.url}: {e!r}')
+            return replace(section, complete=False)
+
+        logger.debug(f'Found {len(articles)} articles in section {section.type}')
+
+        return replace(section, articles=articles)
+
+    @classmethod
+    def parse_bulletin(cls, page: str, url: str, parser: str) -> tuple[int | None, list[Section] | None]:
+        # The bulletin number and its sections, whose articles are still to be
+        # extracted but for legacy bulletins. Sections are None when the page
+        # layout is unknown
+        soup = parse_html(page, cls.BULLETIN_STRAINER, parser)
+        number = cls.__get_bulletin_number(soup)
 
         sections_list = soup.find('ul', {'class': 'primerosHijos'})
         if sections_list is not None:
-           sections = await self.__build_sections(sections_list)
-           logger.debug(f'Found {len(sections)} sections for bulletin {bulletin.number}')
-           return sections
-        elif self.__is_legacy(soup):
-            logger.debug(f'Found legacy format for bulletin {bulletin.number}')
-            return await self.__build_legacy_sections(bulletin, soup)
-    
-    async def __build_sections(self, sections_list) -> list[Section]:
-        section_items = sections_list.find_all('a', {'rel': 'section'})
-        sections = []
-        for section_item in section_items:
-            section_em = section_item.find('em')
-            section_type = SectionTypeFactory.from_section_text(section_em.text)
-            
-            logger.debug(f'Building section {section_type}')
-            section = Section(
-                type=section_type,
-                url=f'{self.BASE_DOMAIN}{section_item['href']}',
-                articles=[]
-            )
+            return number, [
+                Section(
+                    type=cls.__get_section_type(section_item),
+                    url=f'{cls.BASE_DOMAIN}{section_item['href']}',
+                    articles=[],
+                )
+                for section_item in sections_list.find_all('a', {'rel': 'section'})
+            ]
+        elif cls.__is_legacy(soup):
+            return number, [
+                Section(
+                    type=SectionType.LEGACY,
+                    url=url,
+                    articles=CAIBLegacyArticleExtractor.parse_soup(soup),
+                )
+            ]
 
-            section.articles = await self.__article_extractor.extract(section)
-            logger.debug(f'Found {len(section.articles)} articles in section {section_type}')
+        return number, None
 
-            sections.append(section)
+    @staticmethod
+    def __get_bulletin_number(soup: BeautifulSoup) -> int | None:
+        number_container = soup.find('a', {'class': 'fijo'})
+        strong = number_container.find('strong') if number_container is not None else None
+        matches = re.findall(r'\d+', strong.text.strip()) if strong is not None else []
+        if not matches:
+            return None
         
-        return sections
-    
-    async def __build_legacy_sections(self, bulletin: Bulletin, soup) -> list[Section]:
-        section = Section(
-            type=SectionType.LEGACY,
-            url=bulletin.url,
-            articles=[]
-        )
+        return matches[0]
 
-        section.articles = await self.__legacy_article_extractor.extract_from_soup(soup)
-        logger.debug(f'Found {len(section.articles)} articles in legacy section')
-         
-        return [section]
+    @staticmethod
+    def __get_section_type(section_item) -> SectionType:
+        section_em = section_item.find('em')
+        return SectionTypeFactory.from_section_text(section_em.text)
 
-    def __is_legacy(self, soup) -> bool:
-        return soup.find('div', {'class': 'caja'})
+    @staticmethod
+    def __is_legacy(soup) -> bool:
+        return soup.find('div', {'class': 'caja'}) is not None
 
 
 class CAIBArticleExtractor(CAIBBaseExtractor, ArticleExtractor):
 
-    def __init__(self):
-        self.__grouped_article_extractor = CAIBGroupedArticleExtractor()
-    
     async def extract(self, section: Section) -> list[Article]:
         logger.debug(f'Extracting articles from section {section.type}')
-        soup = await get_soup(section.url)
+        with timed('section'):
+            page = await self._get_page(section.url)
+
+        # The parser is passed along because executor processes don't share
+        # the parent process configuration
+        with timed('article_list'):
+            articles = await self._run_parser(self.parse_articles, page, get_html_parser())
+
+        # Only the documents of the articles kept are downloaded
+        return self._filter.filter_articles(articles)
+
+    @classmethod
+    def parse_articles(cls, page: str, parser: str) -> list[Article]:
+        # Articles make up most of a section page, restricting the parse to
+        # them with a strainer costs more than it saves. Grouped pages nest
+        # list items directly inside list items, which only html.parser keeps
+        # as is, so they are told apart on the raw page and parsed once
+        if 'grupoPrincipal' in page:
+            parser = 'html.parser'
 
-        if self.__is_grouped(soup):
+        soup = parse_html(page, parser=parser)
+
+        if cls.__is_grouped(soup):
             logger.debug('Found grouped articles format')
-            return await self.__grouped_article_extractor.extract_from_soup(soup)
+            return CAIBGroupedArticleExtractor.parse_soup(soup)
         else: 
-            return await self.__build_articles(soup)
+            return cls.__build_articles(soup)
     
-    async def __build_articles(self, soup) -> list[Article]:
+    @classmethod
+    def __build_articles(cls, soup) -> list[Article]:
         articles_list = soup.find('ul', {'class': 'llistat'})
         article_items = articles_list.find_all('div', {'class': 'caja'})
 
@@ -203,30 +426,29 @@ class CAIBArticleExtractor(CAIBBaseExtractor, ArticleExtractor):
             pdf_url = pdf_url_anchor['href']
 
             if not url_is_absolute(pdf_url):
-                pdf_url = f'{self.BASE_DOMAIN}{pdf_url}'
+                pdf_url = f'{cls.BASE_DOMAIN}{pdf_url}'
 
             html_url_anchor = article_item.find('ul', {'class': 'documents'}).find('a', {'aria-label': 'Exportar a HTML'})
             html_url = html_url_anchor['href']
 
             if not url_is_absolute(html_url):
-                html_url = f'{self.BASE_DOMAIN}{html_url}'
+                html_url = f'{cls.BASE_DOMAIN}{html_url}'
             
             logger.debug(f'Extracted article {registry_number} from {organization}')
             article = Article(
                 number=registry_number,
                 organization=organization,
                 summary=summary,
-                urls={
-                    URLType.PDF: pdf_url,
-                    URLType.HTML: html_url,
-                },
+                pdf_url=pdf_url,
+                html_url=html_url,
             )
 
             articles.append(article)
 
         return articles
 
-    def __is_grouped(self, soup) -> bool:
+    @staticmethod
+    def __is_grouped(soup) -> bool:
         return soup.find('div', {'class': 'grupoPrincipal'}) is not None
 
 
@@ -236,6 +458,10 @@ class CAIBGroupedArticleExtractor(CAIBBaseExtractor, ArticleExtractor):
         raise NotImplementedError('Grouped article extraction from section is not supported yet')
 
     async def extract_from_soup(self, soup: BeautifulSoup) -> list[Article]:
+        return self.parse_soup(soup)
+
+    @classmethod
+    def parse_soup(cls, soup: BeautifulSoup) -> list[Article]:
         logger.debug('Starting grouped articles extraction')
         div_container = soup.find('div', {'class': 'grupoPrincipal'})
 
@@ -284,9 +510,7 @@ class CAIBGroupedArticleExtractor(CAIBBaseExtractor, ArticleExtractor):
                                     number=registry_number,
                                     organization=organization,
                                     summary=summary,
-                                    urls={
-                                        URLType.PDF: f'{self.BASE_DOMAIN}{url_anchor['href']}',
-                                    }
+                                    pdf_url=f'{cls.BASE_DOMAIN}{url_anchor['href']}',
                                 )
 
                                 articles.append(article)
@@ -301,6 +525,10 @@ class CAIBLegacyArticleExtractor(CAIBBaseExtractor, ArticleExtractor):
         raise NotImplementedError('Legacy article extraction from section is not supported yet')
 
     async def extract_from_soup(self, soup: BeautifulSoup) -> list[Article]:
+        return self._filter.filter_articles(self.parse_soup(soup))
+
+    @classmethod
+    def parse_soup(cls, soup: BeautifulSoup) -> list[Article]:
         logger.debug('Extracting legacy article')
         articles_list = soup.find('ul', {'class': 'llistat'})
         article = articles_list.find('div', {'class': 'caja'})
@@ -310,9 +538,7 @@ class CAIBLegacyArticleExtractor(CAIBBaseExtractor, ArticleExtractor):
             number=None,
             organization=None,
             summary=None,
-            urls={
-                URLType.PDF: f'{self.BASE_DOMAIN}{url_anchor['href']}',
-            }
+            pdf_url=f'{cls.BASE_DOMAIN}{url_anchor['href']}',
         )
 
         return [article]
\ No newline at end of file
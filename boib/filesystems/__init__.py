@@ -1,8 +1,62 @@
-from abc import ABC, abstractmethod
+from abc import abstractmethod
+from collections.abc import AsyncIterator
 
 
 class Filesystem:
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
     @abstractmethod
     async def write(self, path: str, bytes: bytes):
         pass
+
+    async def write_stream(self, path: str, chunks: AsyncIterator[bytes]):
+        # Filesystems able to write chunk by chunk override this, so documents
+        # streamed to them are never held in memory as a whole
+        await self.write(path, b''.join([chunk async for chunk in chunks]))
+
+    async def append(self, path: str, bytes: bytes) -> int:
+        # Adds `bytes` at the end of the file, created if missing, and returns
+        # the offset they start at. Filesystems able to append in place
+        # override this, the file is rewritten as a whole otherwise
+        try:
+            content = await self.read(path)
+        except FileNotFoundError:
+            content = b''
+
+        await self.write(path, content + bytes)
+        return len(content)
+
+    @abstractmethod
+    async def read(self, path: str) -> bytes:
+        pass
+
+    def get_local_path(self, path: str) -> str | None:
+        # Where the file is on the local disk, for filesystems storing it as a
+        # regular file, so other processes can read it themselves
+        return None
+
+    async def read_range(self, path: str, offset: int, length: int) -> bytes:
+        # Filesystems able to read part of a file override this
+        return (await self.read(path))[offset:offset + length]
+
+    @abstractmethod
+    async def exists(self, path: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def move(self, source: str, path: str):
+        pass
+
+    @abstractmethod
+    async def link(self, target: str, path: str):
+        # Makes `path` resolve to the content of `target`
+        pass
+
+    @abstractmethod
+    async def delete(self, path: str):
+        pass
@@ -0,0 +1,251 @@
+import asyncio
+from collections import OrderedDict
+import json
+import re
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from boib.filesystems import Filesystem
+from boib.log import logger
+
+
+class ArchiveGrouping:
+    BULLETIN = 'bulletin'
+    DAY = 'day'
+
+
+class ArchiveFilesystem(Filesystem):
+    # Packs the documents of each bulletin, or of each day, into a single
+    # archive of concatenated zstd frames, one per document, next to a JSON
+    # index of their offsets. A document is read back by fetching and
+    # decompressing its frame alone. Archives are built in memory and written
+    # once their group is evicted, when too many are open, or on exit. Writing
+    # to a group already archived appends the new frames and rewrites its
+    # index only, the frames of replaced or deleted documents are left in the
+    # archive unreferenced. Filesystems unable to append, like S3, rewrite the
+    # whole archive instead
+    ARCHIVE_EXTENSION = 'zst'
+    INDEX_EXTENSION = 'zst.idx'
+    DEFAULT_LEVEL = 3
+    DEFAULT_MAX_OPEN_ARCHIVES = 16
+    DEFAULT_MAX_BUFFERED_BYTES = 256 * 1024 * 1024
+    INDEX_CACHE_SIZE = 256
+
+    # Documents are stored under YYYY/M/D/NUMBER/NAME, anything else (metadata
+    # exports, blobs) is written to the wrapped filesystem as is
+    ARCHIVED_PATH = re.compile(r'\d{4}/\d{1,2}/\d{1,2}/[^/]+/[^/]+')
+    GROUP_DEPTHS = {
+        ArchiveGrouping.BULLETIN: 4,
+        ArchiveGrouping.DAY: 3,
+    }
+
+    def __init__(
+        self,
+        filesystem: Filesystem,
+        grouping: str = ArchiveGrouping.BULLETIN,
+        level: int = DEFAULT_LEVEL,
+        max_open_archives: int = DEFAULT_MAX_OPEN_ARCHIVES,
+        max_buffered_bytes: int = DEFAULT_MAX_BUFFERED_BYTES,
+    ):
+        if zstandard is None:
+            raise RuntimeError('Archive output requires zstandard, install it with `pip install zstandard`')
+
+        self.__filesystem = filesystem
+        self.__depth = self.GROUP_DEPTHS[grouping]
+        self.__level = level
+        self.__max_open_archives = max_open_archives
+        self.__max_buffered_bytes = max_buffered_bytes
+        # Group: name -> (compressed frame, size), None for deleted documents
+        self.__open_archives = OrderedDict()
+        self.__buffered_bytes = 0
+        self.__flushing = {}
+        self.__indexes = OrderedDict()
+        self.__flush_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.__filesystem.__aenter__()
+        return self
+
+    async def __aexit__(self, *args):
+        try:
+            while self.__open_archives:
+                await self.__flush(next(iter(self.__open_archives)))
+        finally:
+            await self.__filesystem.__aexit__(*args)
+
+    async def write(self, path: str, bytes: bytes):
+        if not self.__is_archived(path):
+            await self.__filesystem.write(path, bytes)
+            return
+
+        frame = await asyncio.to_thread(zstandard.ZstdCompressor(level=self.__level).compress, bytes)
+        await self.__add(path, (frame, len(bytes)))
+
+    async def read(self, path: str) -> bytes:
+        if not self.__is_archived(path):
+            return await self.__filesystem.read(path)
+
+        group, name = self.__split(path)
+        archive = self.__get_buffered(group)
+        if name in archive:
+            if archive[name] is None:
+                raise FileNotFoundError(path)
+
+            frame, _ = archive[name]
+        else:
+            index = await self.__get_index(group)
+            if name not in index:
+                raise FileNotFoundError(path)
+
+            offset, length, _ = index[name]
+            frame = await self.__filesystem.read_range(self.__get_archive_path(group), offset, length)
+
+        return zstandard.ZstdDecompressor().decompress(frame)
+
+    async def read_range(self, path: str, offset: int, length: int) -> bytes:
+        if not self.__is_archived(path):
+            return await self.__filesystem.read_range(path, offset, length)
+
+        return (await self.read(path))[offset:offset + length]
+
+    async def exists(self, path: str) -> bool:
+        if not self.__is_archived(path):
+            return await self.__filesystem.exists(path)
+
+        group, name = self.__split(path)
+        archive = self.__get_buffered(group)
+        if name in archive:
+            return archive[name] is not None
+
+        return name in await self.__get_index(group)
+
+    async def move(self, source: str, path: str):
+        await self.link(source, path)
+        await self.delete(source)
+
+    async def link(self, target: str, path: str):
+        # Archived documents are copied, a frame can't be shared by two
+        # archives
+        if not self.__is_archived(target) and not self.__is_archived(path):
+            await self.__filesystem.link(target, path)
+            return
+
+        await self.write(path, await self.read(target))
+
+    async def delete(self, path: str):
+        if not self.__is_archived(path):
+            await self.__filesystem.delete(path)
+            return
+
+        if not await self.exists(path):
+            raise FileNotFoundError(path)
+
+        await self.__add(path, None)
+
+    async def __add(self, path: str, entry: tuple[bytes, int] | None):
+        group, name = self.__split(path)
+
+        archive = self.__open_archives.setdefault(group, {})
+        self.__open_archives.move_to_end(group)
+        if archive.get(name) is not None:
+            self.__buffered_bytes -= len(archive[name][0])
+
+        archive[name] = entry
+        if entry is not None:
+            self.__buffered_bytes += len(entry[0])
+
+        # The least recently written archives are the ones whose bulletins are
+        # most likely complete
+        while len(self.__open_archives) > 1 and (
+            len(self.__open_archives) > self.__max_open_archives
+            or self.__buffered_bytes > self.__max_buffered_bytes
+        ):
+            await self.__flush(next(iter(self.__open_archives)))
+
+    async def __flush(self, group: str):
+        # Taken out before writing, documents written meanwhile start a new
+        # archive of the group that is merged into this one when flushed
+        archive = self.__open_archives.pop(group)
+        self.__buffered_bytes -= sum(len(entry[0]) for entry in archive.values() if entry is not None)
+        self.__flushing.setdefault(group, []).append(archive)
+
+        try:
+            await self.__write_archive(group, archive)
+        finally:
+            self.__flushing[group].remove(archive)
+            if not self.__flushing[group]:
+                del self.__flushing[group]
+
+    async def __write_archive(self, group: str, archive: dict):
+        async with self.__flush_lock:
+            index = dict(await self.__get_index(group))
+
+            content = bytearray()
+            entries = {}
+            for name, entry in sorted(archive.items()):
+                index.pop(name, None)
+                if entry is None:
+                    continue
+
+                frame, size = entry
+                entries[name] = (len(content), len(frame), size)
+                content += frame
+
+            # The index goes last, a crash never leaves an index behind for
+            # frames that weren't written. Frames appended by a run that
+            # crashed before its index are skipped over
+            if content:
+                offset = await self.__filesystem.append(self.__get_archive_path(group), bytes(content))
+                index.update({
+                    name: (offset + frame_offset, length, size)
+                    for name, (frame_offset, length, size) in entries.items()
+                })
+
+            await self.__filesystem.write(self.__get_index_path(group), json.dumps(index).encode('utf-8'))
+            self.__cache_index(group, index)
+
+        logger.debug(f'Archived {len(index)} documents in {self.__get_archive_path(group)}')
+
+    def __get_buffered(self, group: str) -> dict:
+        # Documents not archived yet, including those of an archive being
+        # written
+        buffered = {}
+        for archive in (*self.__flushing.get(group, []), self.__open_archives.get(group, {})):
+            buffered.update(archive)
+
+        return buffered
+
+    async def __get_index(self, group: str) -> dict[str, tuple[int, int, int]]:
+        if group in self.__indexes:
+            self.__indexes.move_to_end(group)
+            return self.__indexes[group]
+
+        try:
+            index = json.loads(await self.__filesystem.read(self.__get_index_path(group)))
+        except FileNotFoundError:
+            index = {}
+
+        self.__cache_index(group, index)
+        return index
+
+    def __cache_index(self, group: str, index: dict):
+        self.__indexes[group] = index
+        self.__indexes.move_to_end(group)
+        while len(self.__indexes) > self.INDEX_CACHE_SIZE:
+            self.__indexes.popitem(last=False)
+
+    def __is_archived(self, path: str) -> bool:
+        return self.ARCHIVED_PATH.fullmatch(path) is not None
+
+    def __split(self, path: str) -> tuple[str, str]:
+        parts = path.split('/')
+        return '/'.join(parts[:self.__depth]), '/'.join(parts[self.__depth:])
+
+    def __get_archive_path(self, group: str) -> str:
+        return f'{group}.{self.ARCHIVE_EXTENSION}'
+
+    def __get_index_path(self, group: str) -> str:
+        return f'{group}.{self.INDEX_EXTENSION}'
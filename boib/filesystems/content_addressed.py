@@ -0,0 +1,89 @@
+from collections.abc import AsyncIterator
+import hashlib
+import os
+import uuid
+
+from boib.filesystems import Filesystem
+from boib.log import logger
+
+
+class ContentAddressedFilesystem(Filesystem):
+    # Stores every document once, as a blob named after its SHA-256, and
+    # links the requested path to it. Writing a document whose content is
+    # already stored only updates the link. The wrapped filesystem must have
+    # cheap links, on S3 a link is a full copy
+    DEFAULT_BLOB_DIR = 'blobs'
+
+    def __init__(self, filesystem: Filesystem, blob_dir: str = DEFAULT_BLOB_DIR):
+        self.__filesystem = filesystem
+        self.__blob_dir = blob_dir
+
+    async def __aenter__(self):
+        await self.__filesystem.__aenter__()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.__filesystem.__aexit__(*args)
+
+    async def write(self, path: str, bytes: bytes):
+        blob_path = self.__get_blob_path(hashlib.sha256(bytes).hexdigest(), path)
+
+        if await self.__filesystem.exists(blob_path):
+            logger.debug(f'Blob {blob_path} already stored, linking {path}')
+        else:
+            await self.__filesystem.write(blob_path, bytes)
+
+        await self.__filesystem.link(blob_path, path)
+
+    async def write_stream(self, path: str, chunks: AsyncIterator[bytes]):
+        # The hash is only known once the whole document went through, so it
+        # is written to a temporary blob first and moved in place afterwards
+        digest = hashlib.sha256()
+
+        async def hashed_chunks() -> AsyncIterator[bytes]:
+            async for chunk in chunks:
+                digest.update(chunk)
+                yield chunk
+
+        tmp_path = os.path.join(self.__blob_dir, 'tmp', uuid.uuid4().hex)
+        await self.__filesystem.write_stream(tmp_path, hashed_chunks())
+
+        blob_path = self.__get_blob_path(digest.hexdigest(), path)
+        try:
+            if await self.__filesystem.exists(blob_path):
+                logger.debug(f'Blob {blob_path} already stored, linking {path}')
+                await self.__filesystem.delete(tmp_path)
+            else:
+                await self.__filesystem.move(tmp_path, blob_path)
+        except BaseException:
+            if await self.__filesystem.exists(tmp_path):
+                await self.__filesystem.delete(tmp_path)
+            raise
+
+        await self.__filesystem.link(blob_path, path)
+
+    async def read(self, path: str) -> bytes:
+        return await self.__filesystem.read(path)
+
+    async def read_range(self, path: str, offset: int, length: int) -> bytes:
+        return await self.__filesystem.read_range(path, offset, length)
+
+    async def exists(self, path: str) -> bool:
+        return await self.__filesystem.exists(path)
+
+    def get_local_path(self, path: str) -> str | None:
+        return self.__filesystem.get_local_path(path)
+
+    async def move(self, source: str, path: str):
+        await self.__filesystem.move(source, path)
+
+    async def link(self, target: str, path: str):
+        await self.__filesystem.link(target, path)
+
+    async def delete(self, path: str):
+        # Only the link is removed, the blob may be shared with other paths
+        await self.__filesystem.delete(path)
+
+    def __get_blob_path(self, sha256: str, path: str) -> str:
+        _, extension = os.path.splitext(path)
+        return os.path.join(self.__blob_dir, sha256[:2], sha256[2:4], f'{sha256}{extension}')
@@ -1,18 +1,194 @@
-import aiofiles
-from aiofiles import os as aios
+import asyncio
+from collections.abc import AsyncIterator, Callable
+from concurrent.futures import ThreadPoolExecutor
 import os
+from typing import BinaryIO, TypeVar
+import uuid
 
 from boib.filesystems import Filesystem
 
 
+T = TypeVar('T')
+
+
+class FsyncPolicy:
+    # No fsync, the OS flushes the files whenever it sees fit
+    NONE = 'none'
+    # Files are synced before being renamed in place, a crash never leaves an
+    # empty or partial document behind the final name
+    FILE = 'file'
+    # The directory is synced as well after the rename, so the new name itself
+    # survives a crash
+    FULL = 'full'
+
+
 class LocalFilesystem(Filesystem):
+    # Every file operation runs in a dedicated, bounded pool of writer threads
+    # as a single blocking call, instead of one default pool hop per syscall.
+    # Directories already created are remembered so they are not created again
+    # for every document
+    DEFAULT_WRITER_THREADS = 8
+    # Streamed chunks are coalesced up to this size before being written
+    WRITE_BUFFER_SIZE = 1024 * 1024
 
-    def __init__(self, base_dir: str):
+    def __init__(
+        self,
+        base_dir: str,
+        writer_threads: int = DEFAULT_WRITER_THREADS,
+        fsync: str = FsyncPolicy.NONE,
+    ):
         self.__base_dir = base_dir
-    
+        self.__fsync = fsync
+        self.__executor = ThreadPoolExecutor(writer_threads, thread_name_prefix='boib-writer')
+        self.__directories = set()
+
+    async def __aexit__(self, *args):
+        self.__executor.shutdown()
+
     async def write(self, path: str, bytes: bytes):
-        full_path =  os.path.join(self.__base_dir, path)
-        await aios.makedirs(os.path.dirname(full_path), exist_ok=True)
-        
-        async with aiofiles.open(full_path, 'wb') as f:
-            await f.write(bytes)
+        await self.__run(self.__write, self.__get_full_path(path), bytes)
+
+    async def write_stream(self, path: str, chunks: AsyncIterator[bytes]):
+        full_path = self.__get_full_path(path)
+        f, tmp_path = await self.__run(self.__open_tmp, full_path)
+
+        # Written to a temporary file and renamed once complete, so an
+        # interrupted download never leaves a truncated document behind
+        try:
+            buffer = bytearray()
+            async for chunk in chunks:
+                buffer += chunk
+                if len(buffer) >= self.WRITE_BUFFER_SIZE:
+                    await self.__run(f.write, bytes(buffer))
+                    buffer.clear()
+
+            await self.__run(self.__commit, f, bytes(buffer), tmp_path, full_path)
+        except BaseException:
+            await self.__run(self.__discard, f, tmp_path)
+            raise
+
+    async def append(self, path: str, bytes: bytes) -> int:
+        return await self.__run(self.__append, self.__get_full_path(path), bytes)
+
+    async def read(self, path: str) -> bytes:
+        return await self.__run(self.__read, self.__get_full_path(path))
+
+    async def read_range(self, path: str, offset: int, length: int) -> bytes:
+        return await self.__run(self.__read_range, self.__get_full_path(path), offset, length)
+
+    async def exists(self, path: str) -> bool:
+        return await self.__run(os.path.exists, self.__get_full_path(path))
+
+    def get_local_path(self, path: str) -> str | None:
+        return self.__get_full_path(path)
+
+    async def move(self, source: str, path: str):
+        await self.__run(self.__move, self.__get_full_path(source), self.__get_full_path(path))
+
+    async def link(self, target: str, path: str):
+        await self.__run(self.__link, self.__get_full_path(target), self.__get_full_path(path))
+
+    async def delete(self, path: str):
+        await self.__run(os.remove, self.__get_full_path(path))
+
+    async def __run(self, function: Callable[..., T], *args) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.__executor, function, *args)
+
+    def __get_full_path(self, path: str) -> str:
+        return os.path.join(self.__base_dir, path)
+
+    # The methods below run in the writer threads
+
+    def __write(self, full_path: str, bytes: bytes):
+        f, tmp_path = self.__open_tmp(full_path)
+        try:
+            self.__commit(f, bytes, tmp_path, full_path)
+        except BaseException:
+            self.__discard(f, tmp_path)
+            raise
+
+    def __open_tmp(self, full_path: str) -> tuple[BinaryIO, str]:
+        tmp_path = f'{full_path}.{uuid.uuid4().hex}.tmp'
+        self.__makedirs(os.path.dirname(full_path))
+
+        try:
+            return open(tmp_path, 'wb'), tmp_path
+        except FileNotFoundError:
+            # The directory was removed since it was created
+            self.__makedirs(os.path.dirname(full_path), cached=False)
+            return open(tmp_path, 'wb'), tmp_path
+
+    def __commit(self, f: BinaryIO, bytes: bytes, tmp_path: str, full_path: str):
+        with f:
+            f.write(bytes)
+            if self.__fsync != FsyncPolicy.NONE:
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.__replace(tmp_path, full_path)
+
+    def __discard(self, f: BinaryIO, tmp_path: str):
+        f.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    def __append(self, full_path: str, bytes: bytes) -> int:
+        self.__makedirs(os.path.dirname(full_path))
+
+        with open(full_path, 'ab') as f:
+            offset = f.tell()
+            f.write(bytes)
+            if self.__fsync != FsyncPolicy.NONE:
+                f.flush()
+                os.fsync(f.fileno())
+
+        # The file may have just been created
+        if self.__fsync == FsyncPolicy.FULL:
+            self.__sync_directory(os.path.dirname(full_path))
+
+        return offset
+
+    def __read(self, full_path: str) -> bytes:
+        with open(full_path, 'rb') as f:
+            return f.read()
+
+    def __read_range(self, full_path: str, offset: int, length: int) -> bytes:
+        with open(full_path, 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def __move(self, full_source: str, full_path: str):
+        self.__makedirs(os.path.dirname(full_path))
+        self.__replace(full_source, full_path)
+
+    def __link(self, full_target: str, full_path: str):
+        self.__makedirs(os.path.dirname(full_path))
+
+        # Relative links keep working when the data directory is moved or
+        # mounted somewhere else. The link is created aside and renamed over
+        # the path so an existing file is replaced atomically
+        relative_target = os.path.relpath(full_target, os.path.dirname(full_path))
+        tmp_path = f'{full_path}.{uuid.uuid4().hex}.tmp'
+        os.symlink(relative_target, tmp_path)
+        self.__replace(tmp_path, full_path)
+
+    def __replace(self, source: str, full_path: str):
+        os.replace(source, full_path)
+
+        if self.__fsync == FsyncPolicy.FULL:
+            self.__sync_directory(os.path.dirname(full_path))
+
+    def __sync_directory(self, directory: str):
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def __makedirs(self, directory: str, cached: bool = True):
+        if cached and directory in self.__directories:
+            return
+
+        os.makedirs(directory, exist_ok=True)
+        self.__directories.add(directory)
@@ -1,10 +1,21 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+
 from boib.filesystems import Filesystem
 
 import aioboto3
-from aiofiles import os
+from botocore.config import Config
+from botocore.exceptions import ClientError
+import os
 
 
 class S3Filesystem(Filesystem): 
+    # S3 requires every part of a multipart upload but the last one to be at
+    # least 5 MiB
+    MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+    DEFAULT_UPLOAD_CONCURRENCY = 16
+    DEFAULT_MAX_POOL_CONNECTIONS = 32
      
     def __init__(
         self,
@@ -14,26 +25,167 @@ class S3Filesystem(Filesystem):
         region_name: str | None = None,
         endpoint_url: str | None = None,
         prefix: str = '',
+        upload_concurrency: int = DEFAULT_UPLOAD_CONCURRENCY,
+        max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
     ):
             self.__bucket_name = bucket_name
-            self.__aws_access_key_id = aws_access_key_id
-            self.__aws_secret_access_key = aws_secret_access_key
-            self.__region_name = region_name
             self.__endpoint_url = endpoint_url
             self.__prefix = prefix.rstrip('/') + '/' if prefix else ''
+            self.__config = Config(max_pool_connections=max_pool_connections)
+            self.__upload_semaphore = asyncio.Semaphore(upload_concurrency)
 
-    async def write(self, path: str, bytes):
-        session = aioboto3.Session(
-            aws_access_key_id=self.__aws_access_key_id,
-            aws_secret_access_key=self.__aws_secret_access_key,
-            region_name=self.__region_name,
-        )
+            # Credentials are resolved once for the lifetime of the filesystem
+            self.__session = aioboto3.Session(
+                aws_access_key_id=aws_access_key_id,
+                aws_secret_access_key=aws_secret_access_key,
+                region_name=region_name,
+            )
+            self.__exit_stack = None
+            self.__s3 = None
+
+    async def __aenter__(self):
+        self.__exit_stack = AsyncExitStack()
+        self.__s3 = await self.__exit_stack.enter_async_context(self.__create_client())
+        return self
 
+    async def __aexit__(self, *args):
+        await self.__exit_stack.aclose()
+        self.__exit_stack = None
+        self.__s3 = None
+
+    async def write(self, path: str, bytes):
         full_path = os.path.join(self.__prefix, path)
         
-        async with session.client('s3', endpoint_url=self.__endpoint_url) as s3:
+        async with self.__upload_semaphore, self.__get_client() as s3:
             await s3.put_object(
                 Bucket=self.__bucket_name,
                 Key=full_path,
                 Body=bytes,
             )
+
+    async def write_stream(self, path: str, chunks: AsyncIterator[bytes]):
+        full_path = os.path.join(self.__prefix, path)
+
+        async with self.__upload_semaphore, self.__get_client() as s3:
+            buffer = bytearray()
+            upload_id = None
+            parts = []
+
+            try:
+                async for chunk in chunks:
+                    buffer.extend(chunk)
+                    if len(buffer) < self.MULTIPART_CHUNK_SIZE:
+                        continue
+
+                    if upload_id is None:
+                        upload = await s3.create_multipart_upload(Bucket=self.__bucket_name, Key=full_path)
+                        upload_id = upload['UploadId']
+
+                    parts.append(await self.__upload_part(s3, full_path, upload_id, len(parts) + 1, bytes(buffer)))
+                    buffer.clear()
+
+                # Documents smaller than a part are uploaded in a single request
+                if upload_id is None:
+                    await s3.put_object(Bucket=self.__bucket_name, Key=full_path, Body=bytes(buffer))
+                    return
+
+                if buffer:
+                    parts.append(await self.__upload_part(s3, full_path, upload_id, len(parts) + 1, bytes(buffer)))
+
+                await s3.complete_multipart_upload(
+                    Bucket=self.__bucket_name,
+                    Key=full_path,
+                    UploadId=upload_id,
+                    MultipartUpload={'Parts': parts},
+                )
+            except BaseException:
+                if upload_id is not None:
+                    await s3.abort_multipart_upload(Bucket=self.__bucket_name, Key=full_path, UploadId=upload_id)
+                raise
+
+    async def read(self, path: str) -> bytes:
+        full_path = os.path.join(self.__prefix, path)
+
+        async with self.__get_client() as s3:
+            try:
+                response = await s3.get_object(Bucket=self.__bucket_name, Key=full_path)
+            except ClientError as e:
+                if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                    raise FileNotFoundError(path) from e
+                raise
+
+            async with response['Body'] as body:
+                return await body.read()
+
+    async def read_range(self, path: str, offset: int, length: int) -> bytes:
+        full_path = os.path.join(self.__prefix, path)
+
+        async with self.__get_client() as s3:
+            try:
+                response = await s3.get_object(
+                    Bucket=self.__bucket_name,
+                    Key=full_path,
+                    Range=f'bytes={offset}-{offset + length - 1}',
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                    raise FileNotFoundError(path) from e
+                raise
+
+            async with response['Body'] as body:
+                return await body.read()
+
+    async def exists(self, path: str) -> bool:
+        full_path = os.path.join(self.__prefix, path)
+
+        async with self.__get_client() as s3:
+            try:
+                await s3.head_object(Bucket=self.__bucket_name, Key=full_path)
+            except ClientError as e:
+                if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                    return False
+                raise
+
+        return True
+
+    async def move(self, source: str, path: str):
+        await self.link(source, path)
+        await self.delete(source)
+
+    async def link(self, target: str, path: str):
+        # S3 has no links, the object is copied server side instead
+        async with self.__upload_semaphore, self.__get_client() as s3:
+            await s3.copy_object(
+                Bucket=self.__bucket_name,
+                Key=os.path.join(self.__prefix, path),
+                CopySource={'Bucket': self.__bucket_name, 'Key': os.path.join(self.__prefix, target)},
+            )
+
+    async def delete(self, path: str):
+        async with self.__get_client() as s3:
+            await s3.delete_object(Bucket=self.__bucket_name, Key=os.path.join(self.__prefix, path))
+
+    async def __upload_part(self, s3, key: str, upload_id: str, part_number: int, body: bytes) -> dict:
+        part = await s3.upload_part(
+            Bucket=self.__bucket_name,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+
+        return {'PartNumber': part_number, 'ETag': part['ETag']}
+
+    @asynccontextmanager
+    async def __get_client(self):
+        # Outside of an `async with` block a short-lived client is opened for
+        # each operation
+        if self.__s3 is not None:
+            yield self.__s3
+            return
+
+        async with self.__create_client() as s3:
+            yield s3
+
+    def __create_client(self):
+        return self.__session.client('s3', endpoint_url=self.__endpoint_url, config=self.__config)
@@ -0,0 +1,59 @@
+from dataclasses import dataclass, replace
+import re
+
+from boib.models import Article, Bulletin, SectionType, URLType
+
+
+@dataclass(frozen=True, slots=True)
+class ExtractionFilter:
+    # Parts of the bulletins to crawl. Extractors check it before fetching
+    # each page, so the bulletins and sections left out are never requested,
+    # and neither are the documents of the articles left out. Empty fields
+    # keep everything
+    bulletin_types: frozenset[str] = frozenset()
+    section_types: frozenset[SectionType] = frozenset()
+    organization: re.Pattern | None = None
+    min_number: int | None = None
+    max_number: int | None = None
+    url_types: frozenset[str] = frozenset()
+
+    @property
+    def is_empty(self) -> bool:
+        return self == ExtractionFilter()
+
+    def accepts_bulletin(self, bulletin: Bulletin) -> bool:
+        return not self.bulletin_types or bulletin.type in self.bulletin_types
+
+    def accepts_section(self, section_type: SectionType) -> bool:
+        return not self.section_types or section_type in self.section_types
+
+    def filter_articles(self, articles: list[Article]) -> list[Article]:
+        filtered = (self.filter_article(article) for article in articles)
+        return [article for article in filtered if article is not None]
+
+    def filter_article(self, article: Article) -> Article | None:
+        # Articles without a registry number or an organization, e.g. legacy
+        # ones, can't match a filter on them
+        if self.min_number is not None or self.max_number is not None:
+            if article.number is None:
+                return None
+            if self.min_number is not None and article.number < self.min_number:
+                return None
+            if self.max_number is not None and article.number > self.max_number:
+                return None
+
+        if self.organization is not None:
+            if article.organization is None or self.organization.search(article.organization) is None:
+                return None
+
+        if not self.url_types:
+            return article
+
+        # The URLs of the other document types are dropped so the downloaders
+        # don't fetch them
+        article = replace(
+            article,
+            pdf_url=article.pdf_url if URLType.PDF in self.url_types else None,
+            html_url=article.html_url if URLType.HTML in self.url_types else None,
+        )
+        return article if article.urls else None
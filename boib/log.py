@@ -1,7 +1,10 @@
 import logging
 import sys
 
-def setup_logging(level: str = 'DEBUG'):
+LOG_LEVELS = ['DEBUG', 'INFO', 'WARNING', 'ERROR']
+
+
+def setup_logging(level: str = 'INFO'):
     # Create logger
 
     logger = logging.getLogger('boib')
@@ -18,5 +21,9 @@ def setup_logging(level: str = 'DEBUG'):
 
     return logger
 
+def set_log_level(level: str):
+    logger.setLevel(getattr(logging, level.upper()))
+
+
 # Create a default logger instance
 logger = setup_logging() 
\ No newline at end of file
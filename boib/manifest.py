@@ -0,0 +1,282 @@
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+import sqlite3
+from typing import TypeVar
+
+from boib.filesystems import Filesystem
+from boib.models import Article, Bulletin, Document, Section
+
+
+T = TypeVar('T')
+
+
+class ArticleStatus:
+    COMPLETED = 'COMPLETED'
+    FAILED = 'FAILED'
+
+
+@dataclass
+class DocumentMetadata:
+    bulletin_number: str
+    article_number: int | None
+    bulletin_date: str
+    section: str | None
+    organization: str | None
+    summary: str | None
+
+
+class Manifest:
+    # Persistent index of the downloaded articles and documents, used to skip
+    # completed work and resume interrupted runs. Another process writing to
+    # it, e.g. `index` next to `watch`, can make a call wait up to the busy
+    # timeout, so every call runs in a thread, one at a time, instead of
+    # blocking the event loop
+    DEFAULT_BUSY_TIMEOUT = 30.0
+
+    __SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS articles (
+            bulletin_number TEXT NOT NULL,
+            article_key TEXT NOT NULL,
+            article_number INTEGER,
+            bulletin_date TEXT NOT NULL,
+            section TEXT,
+            organization TEXT,
+            summary TEXT,
+            status TEXT NOT NULL,
+            error TEXT,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (bulletin_number, article_key)
+        );
+
+        CREATE TABLE IF NOT EXISTS documents (
+            path TEXT PRIMARY KEY,
+            bulletin_number TEXT NOT NULL,
+            article_key TEXT NOT NULL,
+            url TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            sha256 TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+
+        CREATE INDEX IF NOT EXISTS documents_article
+            ON documents (bulletin_number, article_key);
+
+        CREATE TABLE IF NOT EXISTS bulletins (
+            url TEXT PRIMARY KEY,
+            bulletin_number TEXT,
+            bulletin_date TEXT NOT NULL,
+            bulletin_type TEXT NOT NULL,
+            completed_at TEXT NOT NULL
+        );
+    '''
+
+    def __init__(self, path: str, filesystem: Filesystem | None = None):
+        self.__path = path
+        self.__filesystem = filesystem
+        self.__connection = None
+        self.__lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.__run(self.__open)
+        return self
+
+    async def __aexit__(self, *args):
+        if self.__connection is not None:
+            await self.__run(self.__connection.close)
+            self.__connection = None
+
+    async def is_completed(self, bulletin: Bulletin, article: Article, url: str | None = None) -> bool:
+        paths = await self.__run(self.__get_completed_paths, bulletin, article, url)
+        if paths is None:
+            return False
+
+        if self.__filesystem is None:
+            return True
+
+        # Files removed from the filesystem after being recorded have to be
+        # downloaded again
+        for path in paths:
+            if not await self.__filesystem.exists(path):
+                return False
+
+        return True
+
+    async def record_completed(self, bulletin: Bulletin, section: Section, article: Article, document: Document):
+        await self.__run(self.__record_completed, bulletin, section, article, document)
+
+    async def record_failed(self, bulletin: Bulletin, section: Section, article: Article, error: str):
+        await self.__run(self.__record_failed, bulletin, section, article, error)
+
+    async def add_document(self, bulletin: Bulletin, article: Article, document: Document):
+        await self.__run(self.__add_document_and_commit, bulletin, article, document)
+
+    async def get_article_documents(self, bulletin: Bulletin, article: Article) -> list[Document]:
+        return await self.__run(self.__get_article_documents, bulletin, article)
+
+    async def record_bulletin(self, bulletin: Bulletin):
+        await self.__run(self.__record_bulletin, bulletin)
+
+    async def completed_bulletins(self) -> set[str]:
+        return await self.__run(self.__completed_bulletins)
+
+    async def get_documents(self, extension: str | None = None) -> list[tuple[Document, DocumentMetadata]]:
+        # Documents of the completed articles along with the article metadata,
+        # optionally only those whose path ends with the given extension
+        return await self.__run(self.__get_documents, extension)
+
+    async def __run(self, function: Callable[..., T], *args) -> T:
+        async with self.__lock:
+            return await asyncio.to_thread(function, *args)
+
+    # The methods below run in a thread
+
+    def __open(self):
+        self.__connection = sqlite3.connect(self.__path, timeout=self.DEFAULT_BUSY_TIMEOUT, check_same_thread=False)
+        self.__connection.execute('PRAGMA journal_mode=WAL')
+        self.__connection.execute('PRAGMA synchronous=NORMAL')
+        self.__connection.executescript(self.__SCHEMA)
+
+    def __get_completed_paths(self, bulletin: Bulletin, article: Article, url: str | None) -> list[str] | None:
+        # Paths of the documents of a completed article, None when it isn't.
+        # With a URL, the article is only completed once the document of that
+        # URL was downloaded, not another type of document of the article
+        key = (str(bulletin.number), article_key(article))
+
+        row = self.__connection.execute(
+            'SELECT status FROM articles WHERE bulletin_number = ? AND article_key = ?',
+            key,
+        ).fetchone()
+
+        if row is None or row[0] != ArticleStatus.COMPLETED:
+            return None
+
+        if url is not None:
+            document = self.__connection.execute(
+                'SELECT 1 FROM documents WHERE bulletin_number = ? AND article_key = ? AND url = ?',
+                (*key, url),
+            ).fetchone()
+            if document is None:
+                return None
+
+        return [
+            path for (path,) in self.__connection.execute(
+                'SELECT path FROM documents WHERE bulletin_number = ? AND article_key = ?',
+                key,
+            )
+        ]
+
+    def __record_completed(self, bulletin: Bulletin, section: Section, article: Article, document: Document):
+        with self.__connection:
+            self.__upsert_article(bulletin, section, article, ArticleStatus.COMPLETED)
+            self.__add_document(bulletin, article, document)
+
+    def __record_failed(self, bulletin: Bulletin, section: Section, article: Article, error: str):
+        with self.__connection:
+            self.__upsert_article(bulletin, section, article, ArticleStatus.FAILED, error)
+
+    def __add_document_and_commit(self, bulletin: Bulletin, article: Article, document: Document):
+        with self.__connection:
+            self.__add_document(bulletin, article, document)
+
+    def __add_document(self, bulletin: Bulletin, article: Article, document: Document):
+        self.__connection.execute(
+            '''
+            INSERT OR REPLACE INTO documents
+                (path, bulletin_number, article_key, url, size, sha256, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''',
+            (
+                document.path,
+                str(bulletin.number),
+                article_key(article),
+                document.url,
+                document.size,
+                document.sha256,
+                now(),
+            ),
+        )
+
+    def __get_article_documents(self, bulletin: Bulletin, article: Article) -> list[Document]:
+        return [
+            Document(*row) for row in self.__connection.execute(
+                'SELECT path, url, size, sha256 FROM documents WHERE bulletin_number = ? AND article_key = ?',
+                (str(bulletin.number), article_key(article)),
+            )
+        ]
+
+    def __record_bulletin(self, bulletin: Bulletin):
+        with self.__connection:
+            self.__connection.execute(
+                '''
+                INSERT OR REPLACE INTO bulletins
+                    (url, bulletin_number, bulletin_date, bulletin_type, completed_at)
+                VALUES (?, ?, ?, ?, ?)
+                ''',
+                (bulletin.url, str(bulletin.number), bulletin.date.isoformat(), bulletin.type, now()),
+            )
+
+    def __completed_bulletins(self) -> set[str]:
+        return {url for (url,) in self.__connection.execute('SELECT url FROM bulletins')}
+
+    def __get_documents(self, extension: str | None) -> list[tuple[Document, DocumentMetadata]]:
+        cursor = self.__connection.execute(
+            '''
+            SELECT d.path, d.url, d.size, d.sha256,
+                   d.bulletin_number, a.article_number, a.bulletin_date, a.section,
+                   a.organization, a.summary
+            FROM documents d
+            JOIN articles a USING (bulletin_number, article_key)
+            WHERE a.status = ? AND d.path LIKE ?
+            ORDER BY a.bulletin_date, d.bulletin_number, d.path
+            ''',
+            (ArticleStatus.COMPLETED, f'%{extension or ""}'),
+        )
+
+        return [
+            (Document(path, url, size, sha256), DocumentMetadata(*metadata))
+            for path, url, size, sha256, *metadata in cursor
+        ]
+
+    def __upsert_article(
+        self,
+        bulletin: Bulletin,
+        section: Section,
+        article: Article,
+        status: str,
+        error: str | None = None,
+    ):
+        self.__connection.execute(
+            '''
+            INSERT OR REPLACE INTO articles
+                (bulletin_number, article_key, article_number, bulletin_date, section,
+                 organization, summary, status, error, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            (
+                str(bulletin.number),
+                article_key(article),
+                article.number,
+                bulletin.date.isoformat(),
+                section.type.value,
+                article.organization,
+                article.summary,
+                status,
+                error,
+                now(),
+            ),
+        )
+
+
+def article_key(article: Article) -> str:
+    # Some grouped and legacy articles have no registry number, their document
+    # URL is the only stable identifier they have
+    if article.number is not None:
+        return str(article.number)
+
+    return article.pdf_url or article.html_url
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).isoformat()
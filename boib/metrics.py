@@ -0,0 +1,330 @@
+import asyncio
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+import os
+import time
+import uuid
+
+import httpx
+
+from boib.log import logger
+
+
+# In-process metrics rendered in the Prometheus text format. Work done in the
+# parse and PDF text process pools is measured from the event loop side, the
+# worker processes don't report their own metrics
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DEFAULT_EXPORT_INTERVAL = 15.0
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Metric:
+    TYPE = None
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.help}'
+        yield f'# TYPE {self.name} {self.TYPE}'
+
+        for name, labels, value in self.samples():
+            yield f'{name}{format_labels(labels)} {format_value(value)}'
+
+    def samples(self) -> Iterator[tuple[str, Labels, float]]:
+        return iter(())
+
+
+class Counter(Metric):
+    TYPE = 'counter'
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self.__values = defaultdict(float)
+
+    def inc(self, amount: float = 1.0, **labels):
+        self.__values[labels_key(labels)] += amount
+
+    def get(self, **labels) -> float:
+        return self.__values.get(labels_key(labels), 0.0)
+
+    def values(self) -> dict[Labels, float]:
+        return dict(self.__values)
+
+    def samples(self) -> Iterator[tuple[str, Labels, float]]:
+        for labels, value in sorted(self.__values.items()):
+            yield self.name, labels, value
+
+
+class Gauge(Counter):
+    TYPE = 'gauge'
+
+    def set(self, value: float, **labels):
+        self.inc(value - self.get(**labels), **labels)
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, help: str, buckets: tuple[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.__buckets = buckets
+        # Per label set: count per bucket (the last one is +Inf), sum
+        self.__values = {}
+
+    def observe(self, value: float, **labels):
+        key = labels_key(labels)
+        if key not in self.__values:
+            self.__values[key] = [[0] * (len(self.__buckets) + 1), 0.0]
+
+        counts, _ = self.__values[key]
+        counts[bisect_left(self.__buckets, value)] += 1
+        self.__values[key][1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def stats(self) -> dict[Labels, tuple[int, float, float, float]]:
+        # Count, sum and the 50th and 95th percentiles estimated from the
+        # buckets, by label set
+        return {
+            labels: (sum(counts), total, self.__quantile(counts, 0.5), self.__quantile(counts, 0.95))
+            for labels, (counts, total) in sorted(self.__values.items())
+        }
+
+    def samples(self) -> Iterator[tuple[str, Labels, float]]:
+        for labels, (counts, total) in sorted(self.__values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.__buckets, float('inf')), counts):
+                cumulative += count
+                yield f'{self.name}_bucket', (*labels, ('le', format_value(bound))), cumulative
+
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+    def __quantile(self, counts: list[int], quantile: float) -> float:
+        target = sum(counts) * quantile
+        cumulative = 0
+        for index, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= target:
+                return self.__buckets[index] if index < len(self.__buckets) else float('inf')
+
+        return 0.0
+
+
+class Metrics:
+
+    def __init__(self):
+        self.__metrics = {}
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self.__register(Counter(name, help))
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self.__register(Gauge(name, help))
+
+    def histogram(self, name: str, help: str, buckets: tuple[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.__register(Histogram(name, help, buckets))
+
+    def render(self) -> str:
+        return ''.join(f'{line}\n' for metric in self.__metrics.values() for line in metric.render())
+
+    def write(self, path: str):
+        # Written aside and renamed, so a collector never reads half a file
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.render())
+
+        os.replace(tmp_path, path)
+
+    def summary(self) -> str:
+        lines = ['Run summary:']
+
+        for labels, (count, total, p50, p95) in STAGE_DURATION.stats().items():
+            stage = dict(labels)['stage']
+            errors = int(STAGE_ERRORS.get(stage=stage))
+            lines.append(
+                f'  {stage:<12} {count:>7} calls {errors:>5} errors  '
+                f'mean {total / count:.3f}s  p50 <{p50}s  p95 <{p95}s'
+            )
+
+        hosts = defaultdict(lambda: defaultdict(int))
+        for labels, value in HTTP_REQUESTS.values().items():
+            labels = dict(labels)
+            hosts[labels['host']][labels['status']] += int(value)
+
+        for host, statuses in sorted(hosts.items()):
+            statuses_str = ', '.join(f'{status}: {count}' for status, count in sorted(statuses.items()))
+            lines.append(
+                f'  {host}: {sum(statuses.values())} requests ({statuses_str}), '
+                f'{HTTP_RESPONSE_BYTES.get(host=host) / 1024 / 1024:.1f} MiB, '
+                f'{int(HTTP_RETRIES.get(host=host))} retries, '
+                f'{RATE_LIMIT_WAIT.get(host=host):.1f}s waiting for the rate limit'
+            )
+
+        for labels, value in ARTICLES.values().items():
+            lines.append(f'  articles {dict(labels)["status"].lower()}: {int(value)}')
+
+        return '\n'.join(lines)
+
+    def __register(self, metric: Metric) -> Metric:
+        return self.__metrics.setdefault(metric.name, metric)
+
+
+metrics = Metrics()
+
+STAGE_DURATION = metrics.histogram('boib_stage_duration_seconds', 'Time spent per pipeline stage')
+STAGE_ERRORS = metrics.counter('boib_stage_errors_total', 'Pipeline stage runs that raised an error')
+HTTP_REQUESTS = metrics.counter('boib_http_requests_total', 'HTTP responses received, by host and status code')
+HTTP_ERRORS = metrics.counter('boib_http_errors_total', 'HTTP requests that failed without a response, by host and error')
+HTTP_RESPONSE_BYTES = metrics.counter('boib_http_response_bytes_total', 'HTTP response body bytes received, by host')
+HTTP_DURATION = metrics.histogram('boib_http_request_duration_seconds', 'Time until the HTTP response headers are received, by host')
+HTTP_RETRIES = metrics.counter('boib_http_retries_total', 'HTTP requests retried, by host')
+RATE_LIMIT_WAIT = metrics.counter('boib_rate_limit_wait_seconds_total', 'Time requests waited for the rate limiter, by host')
+QUEUE_DEPTH = metrics.gauge('boib_queue_depth', 'Items waiting in a pipeline queue')
+BULLETINS = metrics.counter('boib_bulletins_total', 'Bulletins extracted')
+ARTICLES = metrics.counter('boib_articles_total', 'Articles processed by the downloader, by status')
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    try:
+        with STAGE_DURATION.time(stage=stage):
+            yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+
+
+class MetricsTransport(httpx.AsyncBaseTransport):
+    # Measures every attempt that actually goes to the network
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.__transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+
+        try:
+            with HTTP_DURATION.time(host=host):
+                response = await self.__transport.handle_async_request(request)
+        except httpx.HTTPError as e:
+            HTTP_ERRORS.inc(host=host, error=type(e).__name__)
+            raise
+
+        HTTP_REQUESTS.inc(host=host, status=str(response.status_code))
+        response.stream = CountingStream(response.stream, host)
+
+        return response
+
+    async def aclose(self):
+        await self.__transport.aclose()
+
+
+class CountingStream(httpx.AsyncByteStream):
+
+    def __init__(self, stream: httpx.AsyncByteStream, host: str):
+        self.__stream = stream
+        self.__host = host
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self.__stream:
+            HTTP_RESPONSE_BYTES.inc(len(chunk), host=self.__host)
+            yield chunk
+
+    async def aclose(self):
+        await self.__stream.aclose()
+
+
+@asynccontextmanager
+async def exporting(
+    path: str | None = None,
+    port: int | None = None,
+    interval: float = DEFAULT_EXPORT_INTERVAL,
+) -> AsyncIterator[None]:
+    # Serves the metrics over HTTP and/or rewrites them to a file every
+    # `interval` seconds, e.g. for the node_exporter textfile collector
+    server = None
+    writer = None
+
+    if port is not None:
+        server = await asyncio.start_server(serve, port=port)
+        logger.info(f'Serving metrics on port {port}')
+
+    if path is not None:
+        writer = asyncio.create_task(write_periodically(path, interval))
+
+    try:
+        yield
+    finally:
+        if writer is not None:
+            writer.cancel()
+            metrics.write(path)
+
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+        logger.info(metrics.summary())
+
+
+async def write_periodically(path: str, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        metrics.write(path)
+
+
+async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        # Whatever was requested, the metrics are returned
+        await reader.readuntil(b'\r\n\r\n')
+        body = metrics.render().encode('utf-8')
+        writer.write(
+            b'HTTP/1.1 200 OK\r\n'
+            b'Content-Type: text/plain; version=0.0.4\r\n'
+            b'Content-Length: ' + str(len(body)).encode() + b'\r\n'
+            b'Connection: close\r\n\r\n' + body
+        )
+        await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def labels_key(labels: dict[str, str]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+
+    escaped = (
+        (name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+
+    if float(value).is_integer():
+        return str(int(value))
+
+    return repr(float(value))
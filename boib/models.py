@@ -1,10 +1,11 @@
+import calendar
 from dataclasses import dataclass
 from datetime import date
 from enum import Enum
-from typing import Dict
+import sys
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Date: 
     year: int
     month: int | None
@@ -13,6 +14,32 @@ class Date:
     def as_date(self):
         return date(self.year, self.month, self.day)
 
+    def as_range(self) -> 'DateRange':
+        if self.month is None:
+            return DateRange(date(self.year, 1, 1), date(self.year, 12, 31))
+
+        if self.day is None:
+            _, last_day = calendar.monthrange(self.year, self.month)
+            return DateRange(date(self.year, self.month, 1), date(self.year, self.month, last_day))
+
+        return DateRange(self.as_date(), self.as_date())
+
+
+@dataclass(frozen=True, slots=True)
+class DateRange:
+    start: date
+    end: date
+
+    def __contains__(self, value: date) -> bool:
+        return self.start <= value <= self.end
+
+    def __str__(self) -> str:
+        return f'{self.start.isoformat()}..{self.end.isoformat()}'
+
+    @property
+    def years(self) -> range:
+        return range(self.start.year, self.end.year + 1)
+
 
 class BulletinType: 
     ORDINARY = 'ORDINARY'
@@ -34,25 +61,93 @@ class SectionType(Enum):
     ANNOUNCEMENTS = 'ANNOUNCEMENTS'
 
 
-@dataclass
+# Models are slotted, a yearly crawl holds tens of thousands of articles at
+# once. They pickle without their class dictionaries, so they are cheap to
+# pass to and from the process pools, and `as_tuple` gives their plain values
+# for other serializers
+@dataclass(frozen=True, slots=True)
 class Article:
     number: int | None
     organization: str | None
     summary: str | None
-    urls: Dict[URLType, str]
+    pdf_url: str | None = None
+    html_url: str | None = None
+
+    def __post_init__(self):
+        # Thousands of articles share a few hundred organizations
+        if self.organization is not None:
+            object.__setattr__(self, 'organization', sys.intern(self.organization))
+
+    @property
+    def urls(self) -> dict[str, str]:
+        urls = {URLType.PDF: self.pdf_url, URLType.HTML: self.html_url}
+        return {url_type: url for url_type, url in urls.items() if url is not None}
 
+    def as_tuple(self) -> tuple:
+        return (self.number, self.organization, self.summary, self.pdf_url, self.html_url)
 
-@dataclass
+    @classmethod
+    def from_tuple(cls, values: tuple) -> 'Article':
+        return cls(*values)
+
+
+@dataclass(frozen=True, slots=True)
 class Section:  
     type: SectionType
     url: str
     articles: list[Article]
+    # False when the articles of the section could not be extracted
+    complete: bool = True
+
+    def as_tuple(self) -> tuple:
+        return (self.type.value, self.url, [article.as_tuple() for article in self.articles], self.complete)
 
+    @classmethod
+    def from_tuple(cls, values: tuple) -> 'Section':
+        type, url, articles, complete = values
+        return cls(SectionType(type), url, [Article.from_tuple(article) for article in articles], complete)
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Bulletin:
     number: int
     type: BulletinType
     date: date
     url: str
     sections: list[Section]
+    # False when the bulletin page itself could not be extracted
+    extracted: bool = True
+
+    @property
+    def complete(self) -> bool:
+        return self.extracted and all(section.complete for section in self.sections)
+
+    def as_tuple(self) -> tuple:
+        return (
+            self.number,
+            self.type,
+            self.date.isoformat(),
+            self.url,
+            [section.as_tuple() for section in self.sections],
+            self.extracted,
+        )
+
+    @classmethod
+    def from_tuple(cls, values: tuple) -> 'Bulletin':
+        number, type, bulletin_date, url, sections, extracted = values
+        return cls(
+            number,
+            type,
+            date.fromisoformat(bulletin_date),
+            url,
+            [Section.from_tuple(section) for section in sections],
+            extracted,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Document:
+    path: str
+    url: str
+    size: int
+    sha256: str
@@ -0,0 +1,86 @@
+import asyncio
+from collections.abc import Callable
+
+from boib.downloaders import BulletinDownloader
+from boib.exporters import MetadataExporter
+from boib.extractors import BulletinExtractor
+from boib.models import Bulletin, DateRange
+from boib.log import logger
+from boib.metrics import QUEUE_DEPTH
+
+
+class Pipeline:
+    DEFAULT_WORKERS = 4
+    DEFAULT_QUEUE_SIZE = 8
+
+    def __init__(
+        self,
+        extractor: BulletinExtractor,
+        downloader: BulletinDownloader | None,
+        workers: int = DEFAULT_WORKERS,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        exporters: list[MetadataExporter] | None = None,
+    ):
+        self.__extractor = extractor
+        self.__downloader = downloader
+        self.__exporters = exporters or []
+        self.__workers = workers
+        self.__queue_size = queue_size
+
+    @property
+    def extractor(self) -> BulletinExtractor:
+        return self.__extractor
+
+    @property
+    def downloader(self) -> BulletinDownloader | None:
+        return self.__downloader
+
+    async def run(self, date_range: DateRange, skip: Callable[[str], bool] | None = None) -> list[Bulletin]:
+        # Bulletins are handed to the download workers as soon as they are
+        # extracted. The bounded queue makes extraction wait for the workers
+        # instead of buffering the whole period in memory. The bulletins fully
+        # extracted whose documents were all downloaded are returned
+        queue: asyncio.Queue[Bulletin | None] = asyncio.Queue(maxsize=self.__queue_size)
+        completed = []
+
+        # Without a downloader only the metadata is exported
+        workers = self.__workers if self.__downloader is not None else 0
+
+        async with asyncio.TaskGroup() as task_group:
+            for worker_id in range(workers):
+                task_group.create_task(self.__work(worker_id, queue, completed))
+
+            async for bulletin in self.__extractor.extract_range_iter(date_range, skip):
+                # Exporters see the bulletins in calendar order, before the
+                # workers pick them up
+                for exporter in self.__exporters:
+                    await exporter.export(bulletin)
+
+                # Bulletins whose page could not be fetched have nothing to
+                # download, they are crawled again on the next run
+                if not bulletin.extracted:
+                    continue
+
+                if workers:
+                    await queue.put(bulletin)
+                    QUEUE_DEPTH.set(queue.qsize(), queue='bulletins')
+                elif bulletin.complete:
+                    completed.append(bulletin)
+
+            for _ in range(workers):
+                await queue.put(None)
+
+        return completed
+
+    async def __work(self, worker_id: int, queue: asyncio.Queue, completed: list[Bulletin]):
+        while True:
+            bulletin = await queue.get()
+            QUEUE_DEPTH.set(queue.qsize(), queue='bulletins')
+            if bulletin is None:
+                logger.debug(f'Download worker {worker_id} finished')
+                return
+
+            # Incomplete bulletins are still downloaded, their sections that
+            # failed are crawled again on the next run
+            if await self.__downloader.download(bulletin) and bulletin.complete:
+                completed.append(bulletin)
@@ -0,0 +1,31 @@
+from abc import ABC, abstractmethod
+
+from boib.models import Article, Bulletin, Document
+
+
+class DocumentProcessor(ABC):
+    # Post-download stage deriving new documents from a downloaded one
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    @abstractmethod
+    def accepts(self, document: Document) -> bool:
+        pass
+
+    @abstractmethod
+    async def process(self, bulletin: Bulletin, article: Article, document: Document) -> list[Document]:
+        pass
+
+    @abstractmethod
+    def get_paths(self, document: Document) -> list[str]:
+        # Paths of the documents `process` derives from the document, to tell
+        # the documents already processed apart
+        pass
+
+
+class DocumentNotProcessableError(Exception):
+    pass
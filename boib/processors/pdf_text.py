@@ -0,0 +1,124 @@
+import asyncio
+from concurrent.futures import Executor
+from dataclasses import dataclass
+import hashlib
+import io
+import os
+import time
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+
+from boib.filesystems import Filesystem
+from boib.log import logger
+from boib.models import Article, Bulletin, Document
+from boib.processors import DocumentNotProcessableError, DocumentProcessor
+
+
+@dataclass
+class ExtractionStats:
+    documents: int = 0
+    failures: int = 0
+    pages: int = 0
+    pdf_bytes: int = 0
+    text_bytes: int = 0
+    cpu_seconds: float = 0.0
+
+
+class PDFTextProcessor(DocumentProcessor):
+    # Extracts the text of downloaded PDFs into a `.txt` next to them. The
+    # extraction is CPU bound, so it runs in a process pool while the event
+    # loop keeps downloading
+    def __init__(self, filesystem: Filesystem, executor: Executor):
+        if pypdf is None:
+            raise RuntimeError('PDF text extraction requires pypdf, install it with `pip install pypdf`')
+
+        self.__filesystem = filesystem
+        self.__executor = executor
+        self.__stats = ExtractionStats()
+        self.__started_at = None
+
+    async def __aenter__(self):
+        self.__started_at = time.monotonic()
+        return self
+
+    async def __aexit__(self, *args):
+        self.__log_stats()
+
+    @property
+    def stats(self) -> ExtractionStats:
+        return self.__stats
+
+    def accepts(self, document: Document) -> bool:
+        return document.path.endswith('.pdf')
+
+    async def process(self, bulletin: Bulletin, article: Article, document: Document) -> list[Document]:
+        # PDFs stored as local files are read by the worker processes, the
+        # others are read here and sent to them
+        local_path = self.__filesystem.get_local_path(document.path)
+        if local_path is not None:
+            extract_text, source = self.extract_text_from_file, local_path
+        else:
+            extract_text, source = self.extract_text, await self.__filesystem.read(document.path)
+
+        loop = asyncio.get_running_loop()
+        try:
+            text, pages, cpu_seconds = await loop.run_in_executor(self.__executor, extract_text, source)
+        except DocumentNotProcessableError:
+            self.__stats.failures += 1
+            raise
+
+        path, = self.get_paths(document)
+        text_content = bytes(text, 'utf-8')
+        await self.__filesystem.write(path, text_content)
+
+        self.__stats.documents += 1
+        self.__stats.pages += pages
+        self.__stats.pdf_bytes += document.size
+        self.__stats.text_bytes += len(text_content)
+        self.__stats.cpu_seconds += cpu_seconds
+
+        return [
+            Document(
+                path=path,
+                url=document.url,
+                size=len(text_content),
+                sha256=hashlib.sha256(text_content).hexdigest(),
+            )
+        ]
+
+    def get_paths(self, document: Document) -> list[str]:
+        return [f'{os.path.splitext(document.path)[0]}.txt']
+
+    @classmethod
+    def extract_text_from_file(cls, path: str) -> tuple[str, int, float]:
+        with open(path, 'rb') as f:
+            return cls.extract_text(f.read())
+
+    @staticmethod
+    def extract_text(content: bytes) -> tuple[str, int, float]:
+        started_at = time.process_time()
+
+        # Malformed PDFs make pypdf raise about anything, the worker reports
+        # them as a single picklable error
+        try:
+            reader = pypdf.PdfReader(io.BytesIO(content))
+            pages = [page.extract_text() or '' for page in reader.pages]
+        except Exception as e:
+            raise DocumentNotProcessableError(repr(e)) from None
+
+        return '\n\n'.join(pages), len(pages), time.process_time() - started_at
+
+    def __log_stats(self):
+        if not self.__stats.documents and not self.__stats.failures:
+            return
+
+        elapsed = max(time.monotonic() - self.__started_at, 1e-9)
+        logger.info(
+            f'Extracted text from {self.__stats.documents} PDFs ({self.__stats.failures} failed), '
+            f'{self.__stats.pages} pages, {self.__stats.pdf_bytes / 1024 / 1024:.1f} MiB in {elapsed:.1f}s: '
+            f'{self.__stats.documents / elapsed:.1f} PDFs/s, {self.__stats.pages / elapsed:.1f} pages/s, '
+            f'{self.__stats.cpu_seconds:.1f} CPU seconds'
+        )
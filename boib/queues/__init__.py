@@ -0,0 +1,69 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+
+class WorkItemStatus:
+    PENDING = 'PENDING'
+    DONE = 'DONE'
+    FAILED = 'FAILED'
+
+
+class WorkItemKind:
+    BULLETIN = 'BULLETIN'
+    ARTICLE = 'ARTICLE'
+
+
+@dataclass
+class WorkItem:
+    key: str
+    kind: str
+    payload: dict
+    attempts: int
+
+
+class WorkQueue(ABC):
+    # Queue of work shared by every worker, wherever it runs. Items are keyed,
+    # enqueuing a key already known is a no-op, so planning twice or
+    # processing an item twice doesn't duplicate work. A leased item that is
+    # not acked within the visibility timeout, e.g. because its worker died,
+    # is handed to another worker
+    DEFAULT_VISIBILITY_TIMEOUT = 600.0
+    DEFAULT_MAX_ATTEMPTS = 3
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.max_attempts = max_attempts
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    @abstractmethod
+    async def put(self, items: list[tuple[str, str, dict]]) -> int:
+        # Enqueues (key, kind, payload) items, returns how many were new
+        pass
+
+    @abstractmethod
+    async def lease(self, visibility_timeout: float = DEFAULT_VISIBILITY_TIMEOUT) -> WorkItem | None:
+        # The next visible item, hidden from the other workers for
+        # `visibility_timeout` seconds. None when there is none right now
+        pass
+
+    @abstractmethod
+    async def ack(self, item: WorkItem):
+        pass
+
+    @abstractmethod
+    async def fail(self, item: WorkItem, error: str):
+        # Makes the item visible again, or marks it as failed once it used up
+        # its attempts
+        pass
+
+    @abstractmethod
+    async def stats(self) -> dict[str, int]:
+        # Items by status, leased items count as pending
+        pass
+
+    async def is_drained(self) -> bool:
+        return not (await self.stats()).get(WorkItemStatus.PENDING)
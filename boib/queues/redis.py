@@ -0,0 +1,160 @@
+import json
+import time
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+from boib.queues import WorkItem, WorkItemStatus, WorkQueue
+
+
+class RedisWorkQueue(WorkQueue):
+    # Queue in a Redis compatible server, shared by workers on any node. Every
+    # state change runs in a Lua script, so it is atomic whatever the number
+    # of workers. Visible items are kept in a list and leased ones in a sorted
+    # set by deadline, expired leases are pushed back on the next lease, or
+    # failed when they were the last attempt
+    DEFAULT_NAME = 'boib'
+
+    __PUT = '''
+        local items, statuses, counts, pending = KEYS[1], KEYS[2], KEYS[3], KEYS[4]
+        local added = 0
+        for i = 1, #ARGV - 1, 2 do
+            if redis.call('HSETNX', items, ARGV[i], ARGV[i + 1]) == 1 then
+                redis.call('HSET', statuses, ARGV[i], ARGV[#ARGV])
+                redis.call('RPUSH', pending, ARGV[i])
+                added = added + 1
+            end
+        end
+        redis.call('HINCRBY', counts, ARGV[#ARGV], added)
+        return added
+    '''
+
+    __LEASE = '''
+        local items, statuses, attempts, pending, leased = KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5]
+        local counts, errors = KEYS[6], KEYS[7]
+        local now, deadline, status = tonumber(ARGV[1]), tonumber(ARGV[2]), ARGV[3]
+        local max_attempts, failed_status = tonumber(ARGV[4]), ARGV[5]
+        for _, key in ipairs(redis.call('ZRANGEBYSCORE', leased, '-inf', now)) do
+            redis.call('ZREM', leased, key)
+            redis.call('RPUSH', pending, key)
+        end
+        while true do
+            local key = redis.call('LPOP', pending)
+            if not key then
+                return nil
+            end
+            if redis.call('HGET', statuses, key) == status then
+                if tonumber(redis.call('HGET', attempts, key) or '0') >= max_attempts then
+                    redis.call('HSET', statuses, key, failed_status)
+                    redis.call('HINCRBY', counts, status, -1)
+                    redis.call('HINCRBY', counts, failed_status, 1)
+                    if redis.call('HEXISTS', errors, key) == 0 then
+                        redis.call('HSET', errors, key, 'Lease expired')
+                    end
+                else
+                    redis.call('ZADD', leased, deadline, key)
+                    local count = redis.call('HINCRBY', attempts, key, 1)
+                    return {key, redis.call('HGET', items, key), count}
+                end
+            end
+        end
+    '''
+
+    __FINISH = '''
+        local statuses, counts, pending, leased, errors = KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5]
+        local key, status, pending_status, error = ARGV[1], ARGV[2], ARGV[3], ARGV[4]
+        local lease_held = redis.call('ZREM', leased, key) == 1
+        local previous = redis.call('HGET', statuses, key)
+        if previous ~= pending_status then
+            return 0
+        end
+        if status == pending_status then
+            if lease_held then
+                redis.call('RPUSH', pending, key)
+            end
+        else
+            redis.call('HSET', statuses, key, status)
+            redis.call('HINCRBY', counts, previous, -1)
+            redis.call('HINCRBY', counts, status, 1)
+        end
+        if error ~= '' then
+            redis.call('HSET', errors, key, error)
+        else
+            redis.call('HDEL', errors, key)
+        end
+        return 1
+    '''
+
+    def __init__(self, url: str, name: str = DEFAULT_NAME, max_attempts: int = WorkQueue.DEFAULT_MAX_ATTEMPTS):
+        if redis is None:
+            raise RuntimeError('Redis work queues require redis, install it with `pip install redis`')
+
+        super().__init__(max_attempts)
+        self.__url = url
+        self.__keys = {
+            key: f'{name}:{key}'
+            for key in ('items', 'statuses', 'attempts', 'counts', 'pending', 'leased', 'errors')
+        }
+        self.__client = None
+
+    async def __aenter__(self):
+        self.__client = redis.from_url(self.__url, decode_responses=True)
+        self.__put = self.__client.register_script(self.__PUT)
+        self.__lease = self.__client.register_script(self.__LEASE)
+        self.__finish = self.__client.register_script(self.__FINISH)
+        return self
+
+    async def __aexit__(self, *args):
+        await self.__client.aclose()
+        self.__client = None
+
+    async def put(self, items: list[tuple[str, str, dict]]) -> int:
+        if not items:
+            return 0
+
+        args = [
+            value
+            for key, kind, payload in items
+            for value in (key, json.dumps({'kind': kind, 'payload': payload}))
+        ]
+
+        return await self.__put(
+            keys=self.__get_keys('items', 'statuses', 'counts', 'pending'),
+            args=[*args, WorkItemStatus.PENDING],
+        )
+
+    async def lease(self, visibility_timeout: float = WorkQueue.DEFAULT_VISIBILITY_TIMEOUT) -> WorkItem | None:
+        now = time.time()
+        result = await self.__lease(
+            keys=self.__get_keys('items', 'statuses', 'attempts', 'pending', 'leased', 'counts', 'errors'),
+            args=[now, now + visibility_timeout, WorkItemStatus.PENDING, self.max_attempts, WorkItemStatus.FAILED],
+        )
+
+        if result is None:
+            return None
+
+        key, item, attempts = result
+        item = json.loads(item)
+        return WorkItem(key, item['kind'], item['payload'], int(attempts))
+
+    async def ack(self, item: WorkItem):
+        await self.__finish_item(item, WorkItemStatus.DONE, '')
+
+    async def fail(self, item: WorkItem, error: str):
+        status = WorkItemStatus.FAILED if item.attempts >= self.max_attempts else WorkItemStatus.PENDING
+        await self.__finish_item(item, status, error)
+
+    async def stats(self) -> dict[str, int]:
+        counts = await self.__client.hgetall(self.__keys['counts'])
+        return {status: int(count) for status, count in counts.items() if int(count)}
+
+    async def __finish_item(self, item: WorkItem, status: str, error: str):
+        await self.__finish(
+            keys=self.__get_keys('statuses', 'counts', 'pending', 'leased', 'errors'),
+            args=[item.key, status, WorkItemStatus.PENDING, error],
+        )
+
+    def __get_keys(self, *names: str) -> list[str]:
+        return [self.__keys[name] for name in names]
@@ -0,0 +1,151 @@
+import asyncio
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+import json
+import sqlite3
+import time
+from typing import TypeVar
+
+from boib.queues import WorkItem, WorkItemStatus, WorkQueue
+
+
+T = TypeVar('T')
+
+
+class SQLiteWorkQueue(WorkQueue):
+    # Queue in a SQLite file, shared by the workers of a node or of nodes
+    # mounting the same local disk. Leases are taken in an immediate
+    # transaction so two processes never lease the same item. Waiting for the
+    # lock of another process can take up to the busy timeout, so every call
+    # runs in a thread, one at a time, instead of blocking the event loop
+    DEFAULT_BUSY_TIMEOUT = 30.0
+
+    __SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS items (
+            key TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            visible_at REAL NOT NULL,
+            error TEXT
+        );
+
+        CREATE INDEX IF NOT EXISTS items_visible
+            ON items (status, visible_at);
+    '''
+
+    def __init__(self, path: str, max_attempts: int = WorkQueue.DEFAULT_MAX_ATTEMPTS):
+        super().__init__(max_attempts)
+        self.__path = path
+        self.__connection = None
+        self.__lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.__run(self.__open)
+        return self
+
+    async def __aexit__(self, *args):
+        await self.__run(self.__connection.close)
+        self.__connection = None
+
+    async def put(self, items: list[tuple[str, str, dict]]) -> int:
+        return await self.__run(self.__put, items)
+
+    async def lease(self, visibility_timeout: float = WorkQueue.DEFAULT_VISIBILITY_TIMEOUT) -> WorkItem | None:
+        return await self.__run(self.__lease, visibility_timeout)
+
+    async def ack(self, item: WorkItem):
+        await self.__run(self.__finish, item, WorkItemStatus.DONE, None)
+
+    async def fail(self, item: WorkItem, error: str):
+        status = WorkItemStatus.FAILED if item.attempts >= self.max_attempts else WorkItemStatus.PENDING
+        await self.__run(self.__finish, item, status, error)
+
+    async def stats(self) -> dict[str, int]:
+        return await self.__run(self.__stats)
+
+    async def __run(self, function: Callable[..., T], *args) -> T:
+        async with self.__lock:
+            return await asyncio.to_thread(function, *args)
+
+    # The methods below run in a thread
+
+    def __open(self):
+        # Used from the threads of asyncio.to_thread, never two at a time
+        self.__connection = sqlite3.connect(
+            self.__path,
+            timeout=self.DEFAULT_BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self.__connection.execute('PRAGMA journal_mode=WAL')
+        self.__connection.executescript(self.__SCHEMA)
+
+    def __put(self, items: list[tuple[str, str, dict]]) -> int:
+        now = time.time()
+
+        with self.__transaction():
+            cursor = self.__connection.executemany(
+                'INSERT OR IGNORE INTO items (key, kind, payload, status, visible_at) VALUES (?, ?, ?, ?, ?)',
+                [(key, kind, json.dumps(payload), WorkItemStatus.PENDING, now) for key, kind, payload in items],
+            )
+
+        return cursor.rowcount
+
+    def __lease(self, visibility_timeout: float) -> WorkItem | None:
+        now = time.time()
+
+        with self.__transaction():
+            # Items whose worker died on every attempt are never acked nor
+            # failed, they are failed here once their last lease expires
+            self.__connection.execute(
+                '''
+                UPDATE items SET status = ?, error = COALESCE(error, 'Lease expired')
+                WHERE status = ? AND visible_at <= ? AND attempts >= ?
+                ''',
+                (WorkItemStatus.FAILED, WorkItemStatus.PENDING, now, self.max_attempts),
+            )
+
+            row = self.__connection.execute(
+                '''
+                UPDATE items SET visible_at = ?, attempts = attempts + 1
+                WHERE key = (
+                    SELECT key FROM items
+                    WHERE status = ? AND visible_at <= ?
+                    ORDER BY visible_at
+                    LIMIT 1
+                )
+                RETURNING key, kind, payload, attempts
+                ''',
+                (now + visibility_timeout, WorkItemStatus.PENDING, now),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        key, kind, payload, attempts = row
+        return WorkItem(key, kind, json.loads(payload), attempts)
+
+    def __finish(self, item: WorkItem, status: str, error: str | None):
+        with self.__transaction():
+            self.__connection.execute(
+                'UPDATE items SET status = ?, visible_at = ?, error = ? WHERE key = ? AND status = ?',
+                (status, time.time(), error, item.key, WorkItemStatus.PENDING),
+            )
+
+    def __stats(self) -> dict[str, int]:
+        return dict(self.__connection.execute('SELECT status, COUNT(*) FROM items GROUP BY status').fetchall())
+
+    @contextmanager
+    def __transaction(self) -> Iterator[None]:
+        # Autocommit connection, BEGIN IMMEDIATE takes the write lock up front
+        # so concurrent leases wait for each other instead of failing
+        self.__connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self.__connection.execute('ROLLBACK')
+            raise
+
+        self.__connection.execute('COMMIT')
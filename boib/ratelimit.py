@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import httpx
+
+from boib.metrics import RATE_LIMIT_WAIT
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.__rate = rate
+        self.__capacity = capacity or max(rate, 1.0)
+        self.__tokens = self.__capacity
+        self.__updated_at = time.monotonic()
+        self.__lock = asyncio.Lock()
+
+    async def acquire(self):
+        # The lock makes waiters queue up in order instead of all of them
+        # waking up at once when a token becomes available
+        async with self.__lock:
+            while True:
+                self.__refill()
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.__tokens) / self.__rate)
+
+    def __refill(self):
+        now = time.monotonic()
+        elapsed = now - self.__updated_at
+        self.__tokens = min(self.__capacity, self.__tokens + elapsed * self.__rate)
+        self.__updated_at = now
+
+
+class HostRateLimiter:
+    DEFAULT_RATES = {
+        'www.caib.es': 5.0,
+        'intranet.caib.es': 5.0,
+    }
+
+    def __init__(self, rates: dict[str, float] | None = None, burst: float | None = None):
+        rates = self.DEFAULT_RATES if rates is None else rates
+        self.__buckets = {
+            host: TokenBucket(rate, burst) for host, rate in rates.items() if rate > 0
+        }
+
+    async def acquire(self, host: str):
+        bucket = self.__buckets.get(host)
+        if bucket is not None:
+            await bucket.acquire()
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    # Every request that actually reaches the network, redirects included,
+    # spends a token of its host. Responses served by an outer cache don't
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, rate_limiter: HostRateLimiter):
+        self.__transport = transport
+        self.__rate_limiter = rate_limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started_at = time.monotonic()
+        await self.__rate_limiter.acquire(request.url.host)
+        RATE_LIMIT_WAIT.inc(time.monotonic() - started_at, host=request.url.host)
+
+        return await self.__transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self.__transport.aclose()
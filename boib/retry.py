@@ -0,0 +1,192 @@
+import asyncio
+from datetime import datetime, timezone
+import email.utils
+import json
+import random
+import time
+
+import httpx
+
+from boib.log import logger
+from boib.metrics import HTTP_RETRIES
+
+
+class RetryPolicy:
+    DEFAULT_MAX_ATTEMPTS = 5
+    DEFAULT_BACKOFF_BASE = 1.0
+    DEFAULT_BACKOFF_MAX = 60.0
+
+    RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+    RETRYABLE_EXCEPTIONS = (
+        httpx.ConnectError,
+        httpx.ConnectTimeout,
+        httpx.ReadTimeout,
+        httpx.ReadError,
+        httpx.WriteError,
+        httpx.RemoteProtocolError,
+        httpx.PoolTimeout,
+    )
+    IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+    def __init__(
+        self,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        backoff_base: float = DEFAULT_BACKOFF_BASE,
+        backoff_max: float = DEFAULT_BACKOFF_MAX,
+    ):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def get_delay(self, attempt: int, response: httpx.Response | None = None) -> float:
+        if response is not None:
+            retry_after = self.__parse_retry_after(response.headers.get('retry-after'))
+            if retry_after is not None:
+                return min(retry_after, self.backoff_max)
+
+        # Full jitter, so clients backing off at the same time spread out
+        # instead of retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def __parse_retry_after(self, value: str | None) -> float | None:
+        if value is None:
+            return None
+
+        if value.isdigit():
+            return float(value)
+
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitOpenError(httpx.TransportError):
+    pass
+
+
+class CircuitBreaker:
+    DEFAULT_FAILURE_THRESHOLD = 10
+    DEFAULT_COOLDOWN = 60.0
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, cooldown: float = DEFAULT_COOLDOWN):
+        self.__failure_threshold = failure_threshold
+        self.__cooldown = cooldown
+        self.__failures: dict[str, int] = {}
+        self.__open_until: dict[str, float] = {}
+
+    def check(self, request: httpx.Request):
+        # While a host circuit is open its requests fail without being sent,
+        # so a host that is down isn't hammered until the end of the run. The
+        # work they belong to is left for the next run
+        host = request.url.host
+        if time.monotonic() < self.__open_until.get(host, 0):
+            raise CircuitOpenError(f'Circuit open for {host}', request=request)
+
+    def record_success(self, host: str):
+        self.__failures[host] = 0
+        self.__open_until.pop(host, None)
+
+    def record_failure(self, host: str):
+        # Once the cooldown is over the circuit is half open, the first
+        # failure opens it again
+        failures = self.__failures.get(host, 0) + 1
+        self.__failures[host] = failures
+
+        if failures >= self.__failure_threshold or host in self.__open_until:
+            logger.warning(f'Opening circuit for {host} for {self.__cooldown}s after {failures} consecutive failures')
+            self.__open_until[host] = time.monotonic() + self.__cooldown
+            self.__failures[host] = 0
+
+
+class DeadLetters:
+
+    def __init__(self):
+        self.__entries = []
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def record(self, url: str, reason: str, attempts: int):
+        logger.error(f'Giving up on {url} after {attempts} attempts: {reason}')
+        self.__entries.append({
+            'url': url,
+            'reason': reason,
+            'attempts': attempts,
+            'failed_at': datetime.now(timezone.utc).isoformat(),
+        })
+
+    async def write(self, path: str):
+        await asyncio.to_thread(self.__write, path)
+
+    def __write(self, path: str):
+        with open(path, 'a') as f:
+            for entry in self.__entries:
+                f.write(json.dumps(entry) + '\n')
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        dead_letters: DeadLetters | None = None,
+    ):
+        self.__transport = transport
+        self.__policy = policy or RetryPolicy()
+        self.__circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.__dead_letters = dead_letters
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        max_attempts = self.__policy.max_attempts if request.method in RetryPolicy.IDEMPOTENT_METHODS else 1
+
+        for attempt in range(1, max_attempts + 1):
+            try:
+                self.__circuit_breaker.check(request)
+            except CircuitOpenError as e:
+                self.__give_up(request, repr(e), attempt - 1)
+                raise
+
+            try:
+                response = await self.__transport.handle_async_request(request)
+            except RetryPolicy.RETRYABLE_EXCEPTIONS as e:
+                self.__circuit_breaker.record_failure(host)
+                if attempt == max_attempts:
+                    self.__give_up(request, repr(e), attempt)
+                    raise
+
+                delay = self.__policy.get_delay(attempt)
+                HTTP_RETRIES.inc(host=host)
+                logger.warning(f'Retrying {request.url} in {delay:.1f}s after {e!r} (attempt {attempt})')
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code not in RetryPolicy.RETRYABLE_STATUS_CODES:
+                self.__circuit_breaker.record_success(host)
+                if response.status_code >= 400:
+                    self.__give_up(request, f'HTTP {response.status_code}', attempt)
+
+                return response
+
+            self.__circuit_breaker.record_failure(host)
+            if attempt == max_attempts:
+                self.__give_up(request, f'HTTP {response.status_code}', attempt)
+                return response
+
+            delay = self.__policy.get_delay(attempt, response)
+            HTTP_RETRIES.inc(host=host)
+            await response.aclose()
+            logger.warning(f'Retrying {request.url} in {delay:.1f}s after HTTP {response.status_code} (attempt {attempt})')
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self.__transport.aclose()
+
+    def __give_up(self, request: httpx.Request, reason: str, attempts: int):
+        if self.__dead_letters is not None:
+            self.__dead_letters.record(str(request.url), reason, attempts)
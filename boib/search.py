@@ -0,0 +1,218 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import date
+import sqlite3
+
+from boib.filesystems import Filesystem
+from boib.log import logger
+from boib.manifest import Manifest
+
+
+@dataclass
+class SearchResult:
+    path: str
+    bulletin_number: str
+    article_number: int | None
+    bulletin_date: str
+    section: str | None
+    organization: str | None
+    summary: str | None
+    snippet: str | None
+
+
+class SearchIndex:
+    # Full-text index over the downloaded article text, built from the
+    # manifest. Metadata lives in a regular table so date and section filters
+    # use plain indexes, the text in an FTS5 table sharing its rowid
+    DEFAULT_BATCH_SIZE = 500
+    DEFAULT_READ_CONCURRENCY = 32
+    DEFAULT_LIMIT = 20
+    TEXT_EXTENSION = '.txt'
+
+    __SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS entries (
+            id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL UNIQUE,
+            sha256 TEXT NOT NULL,
+            bulletin_number TEXT NOT NULL,
+            article_number INTEGER,
+            bulletin_date TEXT NOT NULL,
+            section TEXT,
+            organization TEXT,
+            summary TEXT
+        );
+
+        CREATE INDEX IF NOT EXISTS entries_date ON entries (bulletin_date);
+        CREATE INDEX IF NOT EXISTS entries_section ON entries (section, bulletin_date);
+
+        CREATE VIRTUAL TABLE IF NOT EXISTS entries_text USING fts5(
+            content,
+            organization,
+            summary,
+            tokenize = 'unicode61 remove_diacritics 2'
+        );
+    '''
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__connection = None
+
+    def open(self):
+        self.__connection = sqlite3.connect(self.__path)
+        self.__connection.execute('PRAGMA journal_mode=WAL')
+        self.__connection.execute('PRAGMA synchronous=NORMAL')
+        self.__connection.executescript(self.__SCHEMA)
+
+    def close(self):
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    async def __aenter__(self):
+        self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+    async def update(
+        self,
+        manifest: Manifest,
+        filesystem: Filesystem,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        read_concurrency: int = DEFAULT_READ_CONCURRENCY,
+    ) -> int:
+        # Only documents that are new or whose content changed since the last
+        # run are read and indexed
+        indexed = dict(self.__connection.execute('SELECT path, sha256 FROM entries'))
+        semaphore = asyncio.Semaphore(read_concurrency)
+
+        pending = [
+            (document, metadata)
+            for document, metadata in await manifest.get_documents(self.TEXT_EXTENSION)
+            if indexed.get(document.path) != document.sha256
+        ]
+        logger.info(f'Indexing {len(pending)} documents')
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            texts = await asyncio.gather(*(
+                self.__read(filesystem, semaphore, document.path)
+                for document, _ in batch
+            ))
+
+            with self.__connection:
+                for (document, metadata), text in zip(batch, texts):
+                    if text is not None:
+                        self.__upsert(document, metadata, text)
+
+            logger.debug(f'Indexed {start + len(batch)}/{len(pending)} documents')
+
+        return len(pending)
+
+    def search(
+        self,
+        query: str | None = None,
+        organization: str | None = None,
+        sections: tuple[str] = (),
+        start: date | None = None,
+        end: date | None = None,
+        limit: int = DEFAULT_LIMIT,
+    ) -> list[SearchResult]:
+        conditions = []
+        params = []
+
+        match = ' AND '.join(
+            expression for expression in (
+                f'({query})' if query else None,
+                f'organization : {quote(organization)}' if organization else None,
+            )
+            if expression
+        )
+
+        if match:
+            conditions.append('entries_text MATCH ?')
+            params.append(match)
+
+        if start is not None:
+            conditions.append('e.bulletin_date >= ?')
+            params.append(start.isoformat())
+
+        if end is not None:
+            conditions.append('e.bulletin_date <= ?')
+            params.append(end.isoformat())
+
+        if sections:
+            conditions.append(f'e.section IN ({", ".join("?" * len(sections))})')
+            params.extend(sections)
+
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+
+        # Without a text query there is nothing to rank, newest come first
+        if match:
+            snippet = "snippet(entries_text, 0, '[', ']', '...', 16)"
+            order = 'entries_text.rank'
+        else:
+            snippet = 'NULL'
+            order = 'e.bulletin_date DESC'
+
+        rows = self.__connection.execute(
+            f'''
+            SELECT e.path, e.bulletin_number, e.article_number, e.bulletin_date,
+                   e.section, e.organization, e.summary, {snippet}
+            FROM entries e
+            JOIN entries_text ON entries_text.rowid = e.id
+            {where}
+            ORDER BY {order}
+            LIMIT ?
+            ''',
+            (*params, limit),
+        ).fetchall()
+
+        return [SearchResult(*row) for row in rows]
+
+    def __upsert(self, document, metadata, text: str):
+        row = self.__connection.execute('SELECT id FROM entries WHERE path = ?', (document.path,)).fetchone()
+        if row is not None:
+            self.__connection.execute('DELETE FROM entries_text WHERE rowid = ?', row)
+            self.__connection.execute('DELETE FROM entries WHERE id = ?', row)
+
+        cursor = self.__connection.execute(
+            '''
+            INSERT INTO entries
+                (path, sha256, bulletin_number, article_number, bulletin_date,
+                 section, organization, summary)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            (
+                document.path,
+                document.sha256,
+                metadata.bulletin_number,
+                metadata.article_number,
+                metadata.bulletin_date,
+                metadata.section,
+                metadata.organization,
+                metadata.summary,
+            ),
+        )
+
+        self.__connection.execute(
+            'INSERT INTO entries_text (rowid, content, organization, summary) VALUES (?, ?, ?, ?)',
+            (cursor.lastrowid, text, metadata.organization, metadata.summary),
+        )
+
+    async def __read(self, filesystem: Filesystem, semaphore: asyncio.Semaphore, path: str) -> str | None:
+        async with semaphore:
+            try:
+                content = await filesystem.read(path)
+            except FileNotFoundError:
+                logger.warning(f'Skipping {path}, it is in the manifest but not in the filesystem')
+                return None
+
+        return content.decode('utf-8', errors='replace')
+
+
+def quote(value: str) -> str:
+    # FTS5 phrase, so the value is matched as a whole and its punctuation is
+    # not taken as query syntax
+    return '"' + value.replace('"', '""') + '"'
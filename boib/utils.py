@@ -1,9 +1,25 @@
-from bs4 import BeautifulSoup
+import importlib.util
+
+from bs4 import BeautifulSoup, SoupStrainer
 import httpx
 
+from boib.cache import CachingTransport, HTTPCache
+from boib.metrics import MetricsTransport, timed
+from boib.ratelimit import HostRateLimiter, RateLimitedTransport
+from boib.retry import CircuitBreaker, DeadLetters, RetryPolicy, RetryTransport
+from boib.warc import WARCTransport, WARCWriter
+
+HTML_PARSERS = ['lxml', 'html.parser']
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 10
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 60.0
+
+# lxml when it is installed, resolved on first use
+__html_parser = None
+
 __HTTPX_CLIENT_OPTIONS = {
-    'transport': httpx.AsyncHTTPTransport(local_address='0.0.0.0'),
-    'timeout': 3600,
     'headers': {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
@@ -35,18 +51,120 @@ def month_to_number(month: str):
     return months.index(month) + 1
 
 
-def get_async_client(**options): 
+def get_async_client(
+    http2: bool = False,
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    rate_limiter: HostRateLimiter | None = None,
+    cache: HTTPCache | None = None,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+    retry_policy: RetryPolicy | None = None,
+    circuit_breaker: CircuitBreaker | None = None,
+    dead_letters: DeadLetters | None = None,
+    warc: WARCWriter | None = None,
+    **options,
+):
     client_options = {**__HTTPX_CLIENT_OPTIONS, **options}
 
+    # A hung connection fails after the read timeout instead of pinning its
+    # worker. Waiting for a pooled connection is bounded by the semaphores
+    # upstream, so it has no timeout
+    client_options.setdefault('timeout', httpx.Timeout(
+        connect=connect_timeout,
+        read=read_timeout,
+        write=read_timeout,
+        pool=None,
+    ))
+
+    if http2:
+        # Connection-specific headers are forbidden in HTTP/2
+        client_options['headers'] = {
+            key: value for key, value in client_options['headers'].items() if key != 'Connection'
+        }
+
+    # Pool limits and HTTP/2 are transport settings, so the transport has to be
+    # built for each client instead of being shared between them
+    if 'transport' not in client_options:
+        client_options['transport'] = httpx.AsyncHTTPTransport(
+            local_address='0.0.0.0',
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        )
+
+    # Metrics are taken next to the network so every attempt is measured
+    client_options['transport'] = MetricsTransport(client_options['transport'])
+
+    # Every retry spends a rate limit token, and cached responses never reach
+    # either of them, so the cache wraps the retries which wrap the limiter
+    if rate_limiter is not None:
+        client_options['transport'] = RateLimitedTransport(client_options['transport'], rate_limiter)
+
+    client_options['transport'] = RetryTransport(
+        client_options['transport'],
+        retry_policy,
+        circuit_breaker,
+        dead_letters,
+    )
+
+    if cache is not None:
+        client_options['transport'] = CachingTransport(client_options['transport'], cache)
+
+    # Recorded as the crawler reads them, whether they came from the cache or
+    # the network
+    if warc is not None:
+        client_options['transport'] = WARCTransport(client_options['transport'], warc)
+
     return httpx.AsyncClient(**client_options)
 
 
-async def get_soup(url: str) -> BeautifulSoup:
-    async with get_async_client() as client:
-        response = await client.get(url)
-        response.raise_for_status()
+def get_html_parser() -> str:
+    global __html_parser
+
+    if __html_parser is None:
+        __html_parser = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+    return __html_parser
+
+
+def set_html_parser(parser: str):
+    global __html_parser
+
+    if parser not in HTML_PARSERS:
+        raise ValueError(f'Unknown HTML parser: {parser}')
+
+    __html_parser = parser
+
+
+def parse_html(
+    text: str,
+    parse_only: SoupStrainer | None = None,
+    parser: str | None = None,
+) -> BeautifulSoup:
+    with timed('parse'):
+        return BeautifulSoup(text, parser or get_html_parser(), parse_only=parse_only)
+
+
+async def get_page(url: str, client: httpx.AsyncClient | None = None) -> str:
+    if client is None:
+        async with get_async_client() as client:
+            return await get_page(url, client)
+
+    response = await client.get(url)
+    response.raise_for_status()
+
+    return response.text
+
 
-        return BeautifulSoup(response.text, 'html.parser')
+async def get_soup(
+    url: str,
+    client: httpx.AsyncClient | None = None,
+    parse_only: SoupStrainer | None = None,
+) -> BeautifulSoup:
+    return parse_html(await get_page(url, client), parse_only)
 
 
 def url_is_absolute(url: str) -> bool:
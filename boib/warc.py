@@ -0,0 +1,157 @@
+import asyncio
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+import gzip
+import io
+import os
+import shutil
+import tempfile
+from typing import BinaryIO
+import uuid
+
+import httpx
+
+from boib.log import logger
+
+
+class WARCWriter:
+    # Appends the HTTP exchanges of a crawl to a WARC file, one gzip member per
+    # record as replay tools expect, so the crawl can be replayed or the pages
+    # parsed again later without hitting the site
+    VERSION = 'WARC/1.1'
+    # Response bodies are spooled to disk past this size while they stream
+    SPOOL_SIZE = 1024 * 1024
+    # Bodies are recorded decoded from the transfer encoding
+    __DROPPED_HEADERS = {'transfer-encoding'}
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__file = None
+        self.__lock = asyncio.Lock()
+        self.__records = 0
+
+    async def __aenter__(self):
+        directory = os.path.dirname(self.__path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.__file = open(self.__path, 'ab')
+        self.__write_record('warcinfo', None, 'application/warc-fields', b'software: boib-extractor\r\nformat: WARC File Format 1.1\r\n', io.BytesIO(), 0)
+        return self
+
+    async def __aexit__(self, *args):
+        self.__file.close()
+        self.__file = None
+        logger.info(f'Recorded {self.__records} responses in {self.__path}')
+
+    def spool(self) -> BinaryIO:
+        return tempfile.SpooledTemporaryFile(self.SPOOL_SIZE)
+
+    async def record(self, request: httpx.Request, response: httpx.Response, body: BinaryIO, size: int):
+        # The body is read from the start of the file, which is left open
+        request_block = self.__format_head(
+            f'{request.method} {request.url.raw_path.decode("ascii")} HTTP/1.1',
+            request.headers.multi_items(),
+        )
+        http_version = response.extensions.get('http_version', b'HTTP/1.1').decode('ascii')
+        reason_phrase = response.extensions.get('reason_phrase', response.reason_phrase.encode('ascii')).decode('ascii')
+        response_head = self.__format_head(
+            f'{http_version} {response.status_code} {reason_phrase}',
+            [(key, value) for key, value in response.headers.multi_items() if key.lower() not in self.__DROPPED_HEADERS],
+        )
+
+        url = str(request.url)
+        async with self.__lock:
+            # Compressed and written off the event loop, documents can be large
+            await asyncio.to_thread(self.__write_exchange, url, request_block, response_head, body, size)
+            self.__records += 1
+
+    def __write_exchange(self, url: str, request_block: bytes, response_head: bytes, body: BinaryIO, size: int):
+        body.seek(0)
+        response_id = self.__write_record('response', url, 'application/http; msgtype=response', response_head, body, size)
+        self.__write_record('request', url, 'application/http; msgtype=request', request_block, io.BytesIO(), 0, response_id)
+        self.__file.flush()
+
+    def __write_record(
+        self,
+        record_type: str,
+        url: str | None,
+        content_type: str,
+        head: bytes,
+        body: BinaryIO,
+        size: int,
+        concurrent_to: str | None = None,
+    ) -> str:
+        # The block is the head followed by the body, copied in chunks
+        record_id = f'<urn:uuid:{uuid.uuid4()}>'
+        headers = [
+            ('WARC-Type', record_type),
+            ('WARC-Record-ID', record_id),
+            ('WARC-Date', datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')),
+        ]
+        if url is not None:
+            headers.append(('WARC-Target-URI', url))
+        if concurrent_to is not None:
+            headers.append(('WARC-Concurrent-To', concurrent_to))
+        headers += [('Content-Type', content_type), ('Content-Length', str(len(head) + size))]
+
+        with gzip.GzipFile(fileobj=self.__file, mode='wb') as member:
+            member.write(self.__format_head(self.VERSION, headers) + head)
+            shutil.copyfileobj(body, member)
+            member.write(b'\r\n\r\n')
+
+        return record_id
+
+    @staticmethod
+    def __format_head(first_line: str, headers: list[tuple[str, str]]) -> bytes:
+        lines = [first_line, *(f'{key}: {value}' for key, value in headers)]
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8')
+
+
+class WARCTransport(httpx.AsyncBaseTransport):
+    # Records every response the crawler reads, cached ones included, with its
+    # raw body as it came from the server
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, writer: WARCWriter):
+        self.__transport = transport
+        self.__writer = writer
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.__transport.handle_async_request(request)
+
+        # Responses built in memory, e.g. by the cache, are read on creation
+        # and their stream can be iterated again
+        if response.is_stream_consumed:
+            body = b''.join([chunk async for chunk in response.stream])
+            await self.__writer.record(request, response, io.BytesIO(body), len(body))
+            return response
+
+        response.stream = RecordingStream(response.stream, self.__writer, request, response)
+        return response
+
+    async def aclose(self):
+        await self.__transport.aclose()
+
+
+class RecordingStream(httpx.AsyncByteStream):
+    # Only responses read to the end are recorded. The body is spooled to
+    # the writer as it streams
+
+    def __init__(self, stream: httpx.AsyncByteStream, writer: WARCWriter, request: httpx.Request, response: httpx.Response):
+        self.__stream = stream
+        self.__writer = writer
+        self.__request = request
+        self.__response = response
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with self.__writer.spool() as body:
+            size = 0
+            async for chunk in self.__stream:
+                body.write(chunk)
+                size += len(chunk)
+                yield chunk
+
+            await self.__writer.record(self.__request, self.__response, body, size)
+
+    async def aclose(self):
+        await self.__stream.aclose()
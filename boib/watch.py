@@ -0,0 +1,65 @@
+import asyncio
+from datetime import date
+
+import httpx
+
+from boib.log import logger
+from boib.manifest import Manifest
+from boib.models import DateRange
+from boib.pipeline import Pipeline
+
+
+class Watcher:
+    # Long running poll of the calendar, downloading only the bulletins that
+    # were not downloaded yet. The pipeline, and its HTTP pool, are reused
+    # between polls
+    DEFAULT_INTERVAL = 300
+
+    def __init__(
+        self,
+        pipeline: Pipeline,
+        since: date,
+        interval: float = DEFAULT_INTERVAL,
+        manifest: Manifest | None = None,
+    ):
+        self.__pipeline = pipeline
+        self.__since = since
+        self.__interval = interval
+        self.__manifest = manifest
+        # Bulletins downloaded in previous runs are loaded from the manifest
+        # on the first poll
+        self.__completed = None
+
+    async def run(self):
+        logger.info(f'Watching for bulletins published since {self.__since} every {self.__interval}s')
+
+        while True:
+            try:
+                await self.poll()
+            except httpx.HTTPError as e:
+                logger.error(f'Poll failed, retrying in {self.__interval}s: {e!r}')
+
+            await asyncio.sleep(self.__interval)
+
+    async def poll(self):
+        today = date.today()
+
+        # Bulletins are only crawled once the calendar changed. Bulletins that
+        # failed to download are retried along with the next ones published
+        if not await self.__pipeline.extractor.calendar_changed(today.year):
+            logger.debug('Calendar unchanged, nothing to download')
+            return
+
+        if self.__completed is None:
+            self.__completed = await self.__manifest.completed_bulletins() if self.__manifest is not None else set()
+
+        date_range = DateRange(self.__since, today)
+        bulletins = await self.__pipeline.run(date_range, skip=self.__completed.__contains__)
+
+        for bulletin in bulletins:
+            self.__completed.add(bulletin.url)
+            if self.__manifest is not None:
+                await self.__manifest.record_bulletin(bulletin)
+
+        if bulletins:
+            logger.info(f'Downloaded {len(bulletins)} new bulletins')
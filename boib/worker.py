@@ -0,0 +1,131 @@
+import asyncio
+from collections.abc import Callable
+from dataclasses import replace
+
+import httpx
+
+from boib.downloaders import BulletinDownloader
+from boib.extractors import BulletinExtractor
+from boib.log import logger
+from boib.manifest import article_key
+from boib.models import Article, Bulletin
+from boib.queues import WorkItem, WorkItemKind, WorkQueue
+
+
+class Worker:
+    # Processes the items of a shared work queue. Bulletin items are
+    # extracted, with their section pages, and fan out into one article item
+    # per article, which are downloaded. Several workers, on this node or
+    # others, can process the same queue as long as they write to the same
+    # filesystem
+    DEFAULT_POLL_INTERVAL = 5.0
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        extractor: BulletinExtractor,
+        downloader: BulletinDownloader,
+        workers: int = 1,
+        visibility_timeout: float = WorkQueue.DEFAULT_VISIBILITY_TIMEOUT,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        exit_when_drained: bool = False,
+    ):
+        self.__queue = queue
+        self.__extractor = extractor
+        self.__downloader = downloader
+        self.__workers = workers
+        self.__visibility_timeout = visibility_timeout
+        self.__poll_interval = poll_interval
+        self.__exit_when_drained = exit_when_drained
+
+    async def run(self):
+        async with asyncio.TaskGroup() as task_group:
+            for worker_id in range(self.__workers):
+                task_group.create_task(self.__work(worker_id))
+
+        logger.info(f'Queue drained: {await self.__queue.stats()}')
+
+    async def __work(self, worker_id: int):
+        while True:
+            item = await self.__queue.lease(self.__visibility_timeout)
+            if item is None:
+                # Leased items may still be failed and come back, the queue is
+                # only drained once nothing is pending
+                if self.__exit_when_drained and await self.__queue.is_drained():
+                    logger.debug(f'Worker {worker_id} finished')
+                    return
+
+                await asyncio.sleep(self.__poll_interval)
+                continue
+
+            # Whatever goes wrong with an item fails that item only, the
+            # worker goes on with the next one
+            try:
+                completed = await self.__process(item)
+            except (httpx.HTTPError, SectionsNotExtractedError) as e:
+                logger.error(f'Could not process {item.key} (attempt {item.attempts}): {e!r}')
+                await self.__queue.fail(item, repr(e))
+                continue
+            except Exception as e:
+                logger.exception(f'Unexpected error processing {item.key} (attempt {item.attempts}): {e!r}')
+                await self.__queue.fail(item, repr(e))
+                continue
+
+            if completed:
+                await self.__queue.ack(item)
+            else:
+                await self.__queue.fail(item, 'Documents not available')
+
+    async def __process(self, item: WorkItem) -> bool:
+        # True when the item is done, False to fail it and retry it later
+        bulletin = Bulletin.from_tuple(item.payload['bulletin'])
+
+        if item.kind == WorkItemKind.BULLETIN:
+            bulletin = await self.__extractor.extract_bulletin(bulletin)
+            added = await self.__queue.put(article_items(bulletin, self.__downloader.get_url))
+            logger.info(f'Extracted bulletin {bulletin.number} ({bulletin.date}), {added} new articles queued')
+
+            # The articles extracted are queued anyway, the item is retried
+            # for the sections that failed and only their articles are new
+            if not bulletin.complete:
+                raise SectionsNotExtractedError(f'Sections of bulletin {bulletin.number} could not be extracted')
+
+            return True
+
+        if item.kind == WorkItemKind.ARTICLE:
+            # Downloaded as a bulletin with a single article, so the manifest
+            # skips it if it was downloaded already
+            return await self.__downloader.download(bulletin)
+
+        raise ValueError(f'Unknown work item kind {item.kind}')
+
+
+def bulletin_items(bulletins: list[Bulletin]) -> list[tuple[str, str, dict]]:
+    return [
+        (f'bulletin:{bulletin.url}', WorkItemKind.BULLETIN, {'bulletin': bulletin.as_tuple()})
+        for bulletin in bulletins
+    ]
+
+
+def article_items(
+    bulletin: Bulletin,
+    get_url: Callable[[Article], str | None],
+) -> list[tuple[str, str, dict]]:
+    # Articles are keyed, as in the manifest, by their bulletin and the URL of
+    # the document the downloader fetches: registry numbers repeat across
+    # bulletins and a run of another document type is new work. Articles
+    # without such a document fall back to their manifest key. Each item
+    # holds its bulletin with a single section and article
+    return [
+        (
+            f'article:{bulletin.number}:{get_url(article) or article_key(article)}',
+            WorkItemKind.ARTICLE,
+            {'bulletin': replace(bulletin, sections=[replace(section, articles=[article])]).as_tuple()},
+        )
+        for section in bulletin.sections
+        for article in section.articles
+    ]
+
+
+class SectionsNotExtractedError(Exception):
+    pass
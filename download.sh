@@ -1,34 +1,38 @@
 #!/bin/bash
 
-WAIT_TIME=${WAIT_TIME:-60}
+# Extra options passed to the fetch, e.g. FETCH_OPTIONS="--rate-limit www.caib.es=2"
+FETCH_OPTIONS=${FETCH_OPTIONS:-}
 
 get_datetime() {
     date '+%Y-%m-%d %H:%M:%S'
 }
 
 if [ $# -lt 1 ]; then
-    echo "Usage: $0 <year> [month1 month2 ...]"
-    echo "Example: $0 2024 1 2 3    # Downloads bulletins for January, February and March 2024"
+    echo "Usage: $0 <year> [to-year]"
+    echo "       $0 <from YYYY-MM-DD> <to YYYY-MM-DD>"
+    echo "Example: $0 2019 2024               # Downloads bulletins from 2019 to 2024"
+    echo "Example: $0 2024-01-01 2024-03-31   # Downloads bulletins for January, February and March 2024"
     exit 1
 fi
 
-year=$1
-shift
+from=$1
+to=${2:-$1}
 
-if [ $# -eq 0 ]; then
-    months=$(seq 1 12)
-else
-    months="$@"
+if [[ $from =~ ^[0-9]{4}$ ]]; then
+    from="$from-01-01"
+fi
+
+if [[ $to =~ ^[0-9]{4}$ ]]; then
+    to="$to-12-31"
 fi
 
 trap 'echo -e "\nDownload script stopped by user"; exit 0' INT
 
-for month in $months; do
-    current_time=$(get_datetime)
-    echo "[$current_time] Running download for $year-$month..."
-    docker-compose run --rm app fetch "$year" "$month"
+# The whole range is fetched by a single process, which reads each yearly
+# calendar once and keeps its connections and caches warm across months
+current_time=$(get_datetime)
+echo "[$current_time] Running download from $from to $to..."
+docker-compose run --rm app fetch --from "$from" --to "$to" $FETCH_OPTIONS
 
-    current_time=$(get_datetime)
-    echo "[$current_time] Download completed for $year-$month. Waiting ${WAIT_TIME} seconds..."
-    sleep "$WAIT_TIME"
-done
+current_time=$(get_datetime)
+echo "[$current_time] Download completed from $from to $to."
@@ -0,0 +1,102 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import date
+import threading
+
+import httpx
+import pytest
+
+from benchmarks.server import DEFAULT_HOST, FixtureServer, LocalTransport
+from boib.filesystems.local import LocalFilesystem
+from boib.manifest import Manifest
+from boib.models import Article, Bulletin, BulletinType, Section, SectionType
+from boib.retry import RetryPolicy
+from boib.utils import get_async_client
+
+
+@pytest.fixture
+def server():
+    # The fixture server runs on its own event loop in a background thread,
+    # so every test drives the code under test with its own `asyncio.run`
+    fixture_server = FixtureServer()
+    loop = asyncio.new_event_loop()
+    tcp_server = loop.run_until_complete(fixture_server.serve(DEFAULT_HOST, 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    fixture_server.port = tcp_server.sockets[0].getsockname()[1]
+    yield fixture_server
+
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    tcp_server.close()
+    loop.run_until_complete(tcp_server.wait_closed())
+    loop.close()
+
+
+@pytest.fixture
+def make_client(server):
+    # Clients send every request to the fixture server, whatever its URL
+    def make_client(**options) -> httpx.AsyncClient:
+        transport = LocalTransport(httpx.AsyncHTTPTransport(), port=server.port)
+        return get_async_client(transport=transport, **options)
+
+    return make_client
+
+
+@dataclass
+class Crawl:
+    filesystem: LocalFilesystem
+    manifest: Manifest
+    client: httpx.AsyncClient
+
+
+@pytest.fixture
+def crawl(make_client, tmp_path):
+    # Runs `function` on its own event loop with what a crawl shares: the
+    # data directory under `tmp_path/data`, its manifest and a client to the
+    # fixture server that doesn't retry
+    def crawl(function: Callable[[Crawl], Awaitable], **client_options):
+        client_options.setdefault('retry_policy', RetryPolicy(max_attempts=1))
+
+        async def main():
+            async with (
+                LocalFilesystem(str(tmp_path / 'data')) as filesystem,
+                Manifest(str(tmp_path / 'manifest.sqlite3'), filesystem) as manifest,
+                make_client(**client_options) as client,
+            ):
+                return await function(Crawl(filesystem, manifest, client))
+
+        return asyncio.run(main())
+
+    return crawl
+
+
+@pytest.fixture
+def bulletin() -> Bulletin:
+    # A bulletin already extracted, with articles whose documents are served
+    # by the fixture server
+    articles = [
+        Article(
+            number,
+            'UNIVERSITAT DE LES ILLES BALEARS',
+            f'Article {number}',
+            pdf_url=f'https://www.caib.es/eboibfront/pdf/ca/2024/1/{number}',
+            html_url=f'https://www.caib.es/eboibfront/html/ca/2024/1/{number}',
+        )
+        for number in (1180000, 1180001, 1180002)
+    ]
+    section = Section(
+        SectionType.PERSONNEL,
+        'https://intranet.caib.es/eboibfront/ca/2024/12010/650001/autoritats-i-personal',
+        articles,
+    )
+
+    return Bulletin(
+        12010,
+        BulletinType.ORDINARY,
+        date(2024, 1, 2),
+        'https://intranet.caib.es/eboibfront/ca/2024/12010/',
+        [section],
+    )
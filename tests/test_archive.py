@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('zstandard')
+
+from boib.downloaders import BulletinDownloader
+from boib.downloaders.pdf import PDFArticleDownloader
+from boib.filesystems.archive import ArchiveFilesystem, ArchiveGrouping
+from boib.filesystems.local import LocalFilesystem
+from boib.manifest import Manifest
+
+
+def test_documents_are_read_back_through_the_index(tmp_path):
+    async def main():
+        async with ArchiveFilesystem(LocalFilesystem(str(tmp_path))) as filesystem:
+            await filesystem.write('2024/1/2/12010/1.txt', b'first')
+            await filesystem.write('2024/1/2/12010/2.txt', b'second')
+            await filesystem.write('metadata/jsonl/2024.jsonl', b'{}')
+
+            # Buffered documents are readable before their archive is written
+            assert await filesystem.read('2024/1/2/12010/2.txt') == b'second'
+
+        async with ArchiveFilesystem(LocalFilesystem(str(tmp_path))) as filesystem:
+            return (
+                await filesystem.read('2024/1/2/12010/1.txt'),
+                await filesystem.read('2024/1/2/12010/2.txt'),
+                await filesystem.exists('2024/1/2/12010/3.txt'),
+            )
+
+    first, second, exists = asyncio.run(main())
+
+    assert (first, second, exists) == (b'first', b'second', False)
+    assert (tmp_path / 'metadata' / 'jsonl' / '2024.jsonl').read_bytes() == b'{}'
+    assert not (tmp_path / '2024' / '1' / '2' / '12010').exists()
+
+    index = json.loads((tmp_path / '2024' / '1' / '2' / '12010.zst.idx').read_text())
+    assert sorted(index) == ['1.txt', '2.txt']
+    assert index['2.txt'][2] == len(b'second')
+
+
+def test_archives_are_merged_when_rewritten(tmp_path):
+    async def main():
+        grouping = ArchiveGrouping.DAY
+        async with ArchiveFilesystem(LocalFilesystem(str(tmp_path)), grouping) as filesystem:
+            await filesystem.write('2024/1/2/12010/1.txt', b'first')
+            await filesystem.write('2024/1/2/12010/2.txt', b'second')
+
+        async with ArchiveFilesystem(LocalFilesystem(str(tmp_path)), grouping) as filesystem:
+            await filesystem.write('2024/1/2/12011/1.txt', b'extraordinary')
+            await filesystem.write('2024/1/2/12010/2.txt', b'replaced')
+            await filesystem.delete('2024/1/2/12010/1.txt')
+
+            with pytest.raises(FileNotFoundError):
+                await filesystem.delete('2024/1/2/12010/3.txt')
+
+        async with ArchiveFilesystem(LocalFilesystem(str(tmp_path)), grouping) as filesystem:
+            return (
+                await filesystem.exists('2024/1/2/12010/1.txt'),
+                await filesystem.read('2024/1/2/12010/2.txt'),
+                await filesystem.read('2024/1/2/12011/1.txt'),
+            )
+
+    assert asyncio.run(main()) == (False, b'replaced', b'extraordinary')
+
+    index = json.loads((tmp_path / '2024' / '1' / '2.zst.idx').read_text())
+    assert sorted(index) == ['12010/2.txt', '12011/1.txt']
+
+
+def test_evicted_archives_are_written(tmp_path):
+    async def main():
+        filesystem = ArchiveFilesystem(LocalFilesystem(str(tmp_path)), max_open_archives=1)
+        async with filesystem:
+            await filesystem.write('2024/1/2/12010/1.txt', b'first')
+            await filesystem.write('2024/1/4/12020/1.txt', b'second')
+
+            # The first archive was evicted and written when the second one
+            # was opened
+            assert (tmp_path / '2024' / '1' / '2' / '12010.zst.idx').exists()
+            assert not (tmp_path / '2024' / '1' / '4' / '12020.zst.idx').exists()
+            return await filesystem.read('2024/1/2/12010/1.txt')
+
+    assert asyncio.run(main()) == b'first'
+    assert (tmp_path / '2024' / '1' / '4' / '12020.zst.idx').exists()
+
+
+def test_documents_added_later_are_appended(tmp_path):
+    archive_path = tmp_path / '2024' / '1' / '2' / '12010.zst'
+
+    async def write(documents: dict[str, bytes]):
+        async with ArchiveFilesystem(LocalFilesystem(str(tmp_path))) as filesystem:
+            for path, content in documents.items():
+                await filesystem.write(path, content)
+
+    asyncio.run(write({'2024/1/2/12010/1.txt': b'first', '2024/1/2/12010/2.txt': b'second'}))
+    archived = archive_path.read_bytes()
+
+    asyncio.run(write({'2024/1/2/12010/3.txt': b'third', '2024/1/2/12010/1.txt': b'replaced'}))
+
+    # The frames already archived are kept as they were, the replaced one is
+    # no longer referenced by the index
+    assert archive_path.read_bytes().startswith(archived)
+    index = json.loads((tmp_path / '2024' / '1' / '2' / '12010.zst.idx').read_text())
+    assert sorted(index) == ['1.txt', '2.txt', '3.txt']
+    assert index['1.txt'][0] >= len(archived)
+    assert index['2.txt'][0] < len(archived)
+
+    async def read():
+        async with ArchiveFilesystem(LocalFilesystem(str(tmp_path))) as filesystem:
+            return [await filesystem.read(f'2024/1/2/12010/{number}.txt') for number in (1, 2, 3)]
+
+    assert asyncio.run(read()) == [b'replaced', b'second', b'third']
+
+
+def test_archived_documents_are_skipped_by_the_manifest(server, crawl, tmp_path, bulletin):
+    async def download(context):
+        async with (
+            ArchiveFilesystem(LocalFilesystem(str(tmp_path / 'data'))) as filesystem,
+            Manifest(str(tmp_path / 'archive.sqlite3'), filesystem) as manifest,
+        ):
+            downloader = BulletinDownloader(PDFArticleDownloader(filesystem, context.client), manifest=manifest)
+            assert await downloader.download(bulletin)
+            return await filesystem.read('2024/1/2/12010/1180000.pdf')
+
+    content = crawl(download)
+    crawl(download)
+
+    assert content.startswith(b'%PDF')
+    assert server.requests == 3
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime
+import os
+
+from boib.cache import HTTPCache
+
+CALENDAR_URL = 'https://intranet.caib.es/eboibfront/ca/2024'
+SECTION_URL = 'https://intranet.caib.es/eboibfront/ca/2024/12010/650001/autoritats-i-personal'
+ARTICLE_URL = 'https://www.caib.es/eboibfront/html/ca/2024/1/1180000'
+
+
+def fetch(make_client, cache: HTTPCache, url: str, times: int = 1) -> list[bytes]:
+    async def main():
+        async with make_client(cache=cache) as client:
+            responses = [await client.get(url) for _ in range(times)]
+
+        assert all(response.status_code == 200 for response in responses)
+        return [response.content for response in responses]
+
+    return asyncio.run(main())
+
+
+def test_fresh_pages_are_served_from_cache(server, make_client, tmp_path):
+    cache = HTTPCache(str(tmp_path), ttl=60)
+
+    first, second = fetch(make_client, cache, SECTION_URL, times=2)
+
+    assert first == second
+    assert server.requests == 1
+
+
+def test_stale_pages_are_revalidated(server, make_client, tmp_path):
+    # Pages of the current year are only fresh for the TTL
+    url = f'https://intranet.caib.es/eboibfront/ca/{datetime.now().year}'
+    cache = HTTPCache(str(tmp_path), ttl=0)
+
+    first, = fetch(make_client, cache, url)
+    meta, _ = asyncio.run(cache.get(url))
+    second, = fetch(make_client, cache, url)
+
+    assert first == second
+    assert server.requests == 2
+
+    # The second request was conditional, answered with a 304 and the page
+    # served from the cache, which was refreshed
+    revalidated_meta, body = asyncio.run(cache.get(url))
+    assert body == first
+    assert dict(meta['headers'])['etag']
+    assert revalidated_meta['stored_at'] > meta['stored_at']
+
+
+def test_pages_of_past_years_are_immutable_once_the_year_ended(tmp_path):
+    cache = HTTPCache(str(tmp_path), ttl=0)
+    in_2024 = datetime(2024, 12, 31, 23).timestamp()
+    in_2025 = datetime(2025, 1, 1, 1).timestamp()
+
+    assert not cache.is_fresh(CALENDAR_URL, {'stored_at': in_2024})
+    assert cache.is_fresh(CALENDAR_URL, {'stored_at': in_2025})
+    assert cache.is_fresh(SECTION_URL, {'stored_at': in_2025})
+
+
+def test_documents_are_not_cached(server, make_client, tmp_path):
+    cache = HTTPCache(str(tmp_path), ttl=60)
+
+    fetch(make_client, cache, ARTICLE_URL, times=2)
+
+    assert not cache.accepts(ARTICLE_URL)
+    assert not cache.accepts('https://intranet.caib.es/eboibfront/pdf/ca/2024/1/1180000')
+    assert server.requests == 2
+    assert not os.listdir(tmp_path)
+
+
+def test_concurrent_fetches_of_a_page(server, make_client, tmp_path):
+    cache = HTTPCache(str(tmp_path), ttl=60)
+
+    async def main():
+        async with make_client(cache=cache) as client:
+            return await asyncio.gather(*(client.get(SECTION_URL) for _ in range(20)))
+
+    responses = asyncio.run(main())
+
+    assert all(response.status_code == 200 for response in responses)
+    assert len({response.content for response in responses}) == 1
+    # No temporary file is left behind
+    files = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert sorted(name.rsplit('.', 1)[1] for name in files) == ['body', 'json']
+
+
+def test_unusable_cache_is_not_fatal(server, make_client, tmp_path):
+    # The cache directory is a file, so nothing can be written to it
+    path = tmp_path / 'cache'
+    path.write_text('')
+    cache = HTTPCache(str(path), ttl=60)
+
+    fetch(make_client, cache, CALENDAR_URL, times=2)
+
+    assert server.requests == 2
+
+
+def test_corrupted_entries_are_fetched_again(server, make_client, tmp_path):
+    cache = HTTPCache(str(tmp_path), ttl=60)
+    fetch(make_client, cache, CALENDAR_URL)
+
+    for directory, _, names in os.walk(tmp_path):
+        for name in names:
+            if name.endswith('.json'):
+                with open(os.path.join(directory, name), 'w') as f:
+                    f.write('{')
+
+    fetch(make_client, cache, CALENDAR_URL)
+
+    assert server.requests == 2
@@ -0,0 +1,43 @@
+from datetime import date, datetime
+
+import click
+from click.testing import CliRunner
+import pytest
+
+from boib import cli
+from boib.cli import get_date_range
+from boib.models import DateRange
+
+
+def test_date_range():
+    assert get_date_range(2024, None, None, None, None) == DateRange(date(2024, 1, 1), date(2024, 12, 31))
+    assert get_date_range(2024, 2, None, None, None) == DateRange(date(2024, 2, 1), date(2024, 2, 29))
+    assert get_date_range(None, None, None, datetime(2023, 12, 1), datetime(2024, 1, 31)) == DateRange(
+        date(2023, 12, 1), date(2024, 1, 31),
+    )
+    assert get_date_range(None, None, None, datetime(2024, 1, 1), None).end == date.today()
+
+
+@pytest.mark.parametrize('year, start, end', [
+    (2024, datetime(2024, 1, 1), None),
+    (None, None, None),
+    (None, datetime(2024, 2, 1), datetime(2024, 1, 1)),
+])
+def test_invalid_date_range(year, start, end):
+    with pytest.raises(click.UsageError):
+        get_date_range(year, None, None, start, end)
+
+
+@pytest.mark.parametrize('args, package', [
+    (['fetch', '--pdf-text', '2024'], 'pypdf'),
+    (['fetch', '--archive', 'day', '2024'], 'zstandard'),
+    (['fetch', '--export', 'parquet', '2024'], 'pyarrow'),
+    (['plan', '--queue', 'redis://localhost', '2024'], 'redis'),
+])
+def test_options_require_their_optional_dependencies(monkeypatch, args, package):
+    monkeypatch.setattr(cli, 'find_spec', lambda name: None)
+
+    result = CliRunner().invoke(cli.cli, args)
+
+    assert result.exit_code == 2
+    assert f'requires {package}, install it with `pip install {package}`' in result.output
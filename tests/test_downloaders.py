@@ -0,0 +1,79 @@
+import asyncio
+from dataclasses import replace
+import os
+import uuid
+
+from boib.downloaders import ArticleDownloader, BulletinDownloader, get_article_path
+from boib.downloaders.pdf import PDFArticleDownloader
+from boib.filesystems.local import LocalFilesystem
+from boib.models import Article, Bulletin, Document
+
+
+class BrokenFilesystem(LocalFilesystem):
+
+    async def write_stream(self, path, chunks):
+        if path.endswith('1180001.pdf'):
+            raise OSError('No space left on device')
+
+        await super().write_stream(path, chunks)
+
+
+def test_downloads_are_bounded(crawl, bulletin):
+    in_flight = []
+
+    class CountingArticleDownloader(ArticleDownloader):
+        def __init__(self, article_downloader: ArticleDownloader):
+            self.__article_downloader = article_downloader
+
+        async def download(self, bulletin: Bulletin, article: Article) -> Document:
+            in_flight.append(len(in_flight) + 1)
+            await asyncio.sleep(0.05)
+            try:
+                return await self.__article_downloader.download(bulletin, article)
+            finally:
+                in_flight.append(in_flight.pop() - 1)
+
+        def get_url(self, article: Article) -> str | None:
+            return self.__article_downloader.get_url(article)
+
+    async def download(crawl):
+        article_downloader = CountingArticleDownloader(PDFArticleDownloader(crawl.filesystem, crawl.client))
+        return await BulletinDownloader(article_downloader, concurrency=2).download(bulletin)
+
+    assert crawl(download)
+    assert max(in_flight) == 2
+
+
+def test_unexpected_errors_fail_their_article_only(server, crawl, tmp_path, bulletin):
+    async def download(crawl):
+        async with BrokenFilesystem(str(tmp_path / 'data')) as filesystem:
+            article_downloader = PDFArticleDownloader(filesystem, crawl.client)
+            downloaded = await BulletinDownloader(article_downloader, manifest=crawl.manifest).download(bulletin)
+
+        return downloaded, [
+            await crawl.manifest.is_completed(bulletin, article) for article in bulletin.sections[0].articles
+        ]
+
+    downloaded, completed = crawl(download)
+
+    assert not downloaded
+    assert completed == [True, False, True]
+    assert server.requests == 3
+
+
+def test_articles_without_number_are_named_after_their_url(crawl, tmp_path, bulletin):
+    url = 'https://intranet.caib.es/eboibfront/pdf/ca/2024/1/1190000'
+    article = Article(None, None, None, pdf_url=url)
+    bulletin = replace(bulletin, sections=[replace(bulletin.sections[0], articles=[article])])
+
+    async def download(crawl):
+        downloader = BulletinDownloader(PDFArticleDownloader(crawl.filesystem, crawl.client))
+        for _ in range(2):
+            assert await downloader.download(bulletin)
+
+    crawl(download)
+
+    # Downloading it again writes to the same path
+    path, = tmp_path.glob('data/2024/1/2/12010/*.pdf')
+    assert path.name == f'{uuid.uuid5(uuid.NAMESPACE_URL, url)}.pdf'
+    assert path.name == os.path.basename(get_article_path(bulletin, article, url, 'pdf'))
@@ -0,0 +1,87 @@
+from dataclasses import replace
+from datetime import date
+import json
+
+import pytest
+
+from boib.exporters.jsonl import JSONLExporter
+from boib.extractors.caib import CAIBBulletinExtractor
+from boib.models import Bulletin, DateRange
+from boib.pipeline import Pipeline
+
+EXPORT_PATH = 'data/metadata/jsonl/year=2024/month=01/{}.jsonl'
+
+
+def export(crawl, date_range: DateRange):
+    # Only the metadata, without downloading the documents
+    async def main(context):
+        async with JSONLExporter(context.filesystem) as exporter:
+            pipeline = Pipeline(CAIBBulletinExtractor(client=context.client), None, exporters=[exporter])
+            await pipeline.run(date_range)
+
+    crawl(main)
+
+
+def test_days_are_exported_to_partitions(crawl, tmp_path):
+    export(crawl, DateRange(date(2024, 1, 1), date(2024, 1, 6)))
+
+    exported = sorted(path.name for path in tmp_path.glob('data/metadata/**/*.jsonl'))
+    assert exported == ['2024-01-02.jsonl', '2024-01-04.jsonl', '2024-01-06.jsonl']
+
+    bulletin, = [json.loads(line) for line in (tmp_path / EXPORT_PATH.format('2024-01-02')).open()]
+    assert bulletin['date'] == '2024-01-02'
+    assert bulletin['url'] == 'https://intranet.caib.es/eboibfront/ca/2024/12010/'
+    assert [len(section['articles']) for section in bulletin['sections']] == [40, 40, 40, 36]
+
+
+def test_bulletins_not_extracted_are_not_exported(crawl, server, tmp_path):
+    server.fail(r'/12020/$')
+
+    export(crawl, DateRange(date(2024, 1, 1), date(2024, 1, 6)))
+
+    assert (tmp_path / EXPORT_PATH.format('2024-01-02')).exists()
+    assert not (tmp_path / EXPORT_PATH.format('2024-01-04')).exists()
+    assert (tmp_path / EXPORT_PATH.format('2024-01-06')).exists()
+
+
+def test_partial_days_never_overwrite_an_export(crawl, tmp_path, bulletin):
+    path = tmp_path / EXPORT_PATH.format('2024-01-02')
+
+    def export_bulletin(bulletin: Bulletin, fail: bool = False):
+        async def main(context):
+            async with JSONLExporter(context.filesystem) as exporter:
+                await exporter.export(bulletin)
+                if fail:
+                    raise RuntimeError('Interrupted')
+
+        crawl(main)
+
+    export_bulletin(bulletin)
+    exported = path.read_bytes()
+    assert b'1180002' in exported
+
+    # Neither an interrupted run nor an incomplete section replace it
+    section, = bulletin.sections
+    partial = replace(bulletin, sections=[replace(section, articles=section.articles[:-1])])
+    with pytest.raises(RuntimeError):
+        export_bulletin(partial, fail=True)
+    assert path.read_bytes() == exported
+
+    export_bulletin(replace(partial, sections=[replace(partial.sections[0], complete=False)]))
+    assert path.read_bytes() == exported
+
+
+def test_parquet_has_a_row_per_article(crawl, tmp_path, bulletin):
+    parquet = pytest.importorskip('pyarrow.parquet')
+    from boib.exporters.parquet import ParquetExporter
+
+    async def main(context):
+        async with ParquetExporter(context.filesystem) as exporter:
+            await exporter.export(bulletin)
+
+    crawl(main)
+
+    table = parquet.read_table(tmp_path / 'data/metadata/parquet/year=2024/month=01/2024-01-02.parquet')
+    assert table.column('article_number').to_pylist() == [1180000, 1180001, 1180002]
+    assert set(table.column('bulletin_date').to_pylist()) == {date(2024, 1, 2)}
+    assert set(table.column('section_type').to_pylist()) == {'PERSONNEL'}
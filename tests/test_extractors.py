@@ -0,0 +1,84 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+import multiprocessing
+
+from boib.extractors.caib import CAIBBulletinExtractor
+from boib.models import Bulletin, BulletinType, DateRange, SectionType
+
+JANUARY = DateRange(date(2024, 1, 1), date(2024, 1, 31))
+# Bulletins whose number ends in 9 are served with the legacy layout
+LEGACY_URL = 'https://intranet.caib.es/eboibfront/ca/2024/12019/'
+
+
+def extract(crawl, executor=None):
+    async def main(context):
+        extractor = CAIBBulletinExtractor(client=context.client, executor=executor)
+        bulletins = [bulletin async for bulletin in extractor.extract_range_iter(JANUARY)]
+        legacy = await extractor.extract_bulletin(
+            Bulletin(None, BulletinType.ORDINARY, date(2024, 1, 3), LEGACY_URL, []),
+        )
+        return bulletins, legacy
+
+    return crawl(main)
+
+
+def test_pages_parsed_in_processes(crawl):
+    inline = extract(crawl)
+    # Spawned processes don't inherit anything, so every parser and its
+    # results have to pickle
+    with ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn')) as executor:
+        in_processes = extract(crawl, executor)
+
+    assert in_processes == inline
+
+    bulletins, legacy = inline
+    assert len(bulletins) == 14
+    assert all(bulletin.extracted for bulletin in bulletins)
+    assert [bulletin.date for bulletin in bulletins] == sorted(bulletin.date for bulletin in bulletins)
+
+    # Legacy bulletins list their only article on their own page
+    section, = legacy.sections
+    assert section.type is SectionType.LEGACY
+    assert section.url == LEGACY_URL
+    assert len(section.articles) == 1
+
+
+def test_range_across_years(crawl, server):
+    date_range = DateRange(date(2023, 12, 20), date(2024, 1, 5))
+
+    async def main(context):
+        extractor = CAIBBulletinExtractor(client=context.client)
+        planned = await extractor.plan(date_range)
+        # Bulletins already completed are skipped without being fetched
+        skipped = {planned[0].url}
+        bulletins = [
+            bulletin async for bulletin in extractor.extract_range_iter(date_range, skip=skipped.__contains__)
+        ]
+        return planned, bulletins
+
+    planned, bulletins = crawl(main)
+
+    # Every yearly calendar is fetched once per plan
+    calendars = [path for path in server.paths if path.count('/') == 3]
+    assert calendars == ['/eboibfront/ca/2023', '/eboibfront/ca/2024'] * 2
+
+    dates = [bulletin.date for bulletin in planned]
+    assert dates == sorted(dates)
+    assert {bulletin.date.year for bulletin in planned} == {2023, 2024}
+    assert all(bulletin.date in date_range for bulletin in planned)
+    assert [bulletin.url for bulletin in bulletins] == [bulletin.url for bulletin in planned[1:]]
+
+
+def test_unknown_bulletin_layouts_are_not_extracted(crawl):
+    # An article page, with neither sections nor a legacy article list
+    url = 'https://www.caib.es/eboibfront/html/ca/2024/1/1180000'
+
+    async def main(context):
+        extractor = CAIBBulletinExtractor(client=context.client)
+        return await extractor.extract_bulletin(Bulletin(None, BulletinType.ORDINARY, date(2024, 1, 2), url, []))
+
+    bulletin = crawl(main)
+
+    assert not bulletin.extracted
+    assert not bulletin.complete
+    assert bulletin.sections == []
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import shutil
+
+import pytest
+
+from boib.downloaders import BulletinDownloader
+from boib.downloaders.pdf import PDFArticleDownloader
+from boib.filesystems.content_addressed import ContentAddressedFilesystem
+from boib.filesystems.local import FsyncPolicy, LocalFilesystem
+
+
+def list_blobs(path) -> list[str]:
+    return sorted(name for _, _, names in os.walk(path / 'blobs') for name in names)
+
+
+def test_identical_documents_are_stored_once(crawl, tmp_path, bulletin):
+    # Every article of the fixture server has the same PDF
+    async def main(context):
+        async with ContentAddressedFilesystem(LocalFilesystem(str(tmp_path / 'data'))) as filesystem:
+            downloader = BulletinDownloader(PDFArticleDownloader(filesystem, context.client))
+            assert await downloader.download(bulletin)
+
+            return [await filesystem.read(path) for path in sorted(tmp_path.glob('data/2024/**/*.pdf'))]
+
+    documents = crawl(main)
+
+    assert len(documents) == 3
+    assert documents[0].startswith(b'%PDF')
+    assert len(set(documents)) == 1
+
+    blob, = list_blobs(tmp_path / 'data')
+    assert blob.endswith('.pdf')
+    assert all(os.path.islink(path) for path in tmp_path.glob('data/2024/**/*.pdf'))
+
+
+def test_rewriting_a_path_links_it_to_its_new_content(tmp_path):
+    async def main():
+        async with ContentAddressedFilesystem(LocalFilesystem(str(tmp_path))) as filesystem:
+            await filesystem.write('a.txt', b'first')
+            await filesystem.write('b.txt', b'first')
+            await filesystem.write('a.txt', b'second')
+
+            return await filesystem.read('a.txt'), await filesystem.read('b.txt')
+
+    assert asyncio.run(main()) == (b'second', b'first')
+    # The first content is still linked from b.txt
+    assert len(list_blobs(tmp_path)) == 2
+
+
+def list_files(path) -> list[str]:
+    return sorted(
+        os.path.relpath(os.path.join(directory, name), path)
+        for directory, _, names in os.walk(path)
+        for name in names
+    )
+
+
+@pytest.mark.parametrize('policy, fsyncs', [(FsyncPolicy.NONE, 0), (FsyncPolicy.FILE, 1), (FsyncPolicy.FULL, 2)])
+def test_fsync_policies(tmp_path, monkeypatch, policy, fsyncs):
+    synced = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, 'fsync', lambda fd: synced.append(fd) or fsync(fd))
+
+    async def main():
+        async with LocalFilesystem(str(tmp_path), fsync=policy) as filesystem:
+            await filesystem.write('2024/1/2/document.txt', b'content')
+
+    asyncio.run(main())
+
+    assert len(synced) == fsyncs
+    assert (tmp_path / '2024/1/2/document.txt').read_bytes() == b'content'
+
+
+def test_interrupted_streams_leave_nothing_behind(tmp_path):
+    async def chunks():
+        yield b'partial'
+        raise RuntimeError('Interrupted')
+
+    async def main():
+        async with LocalFilesystem(str(tmp_path)) as filesystem:
+            await filesystem.write('document.pdf', b'previous')
+            with pytest.raises(RuntimeError):
+                await filesystem.write_stream('document.pdf', chunks())
+
+    asyncio.run(main())
+
+    # The previous document is kept whole, without a temporary file
+    assert list_files(tmp_path) == ['document.pdf']
+    assert (tmp_path / 'document.pdf').read_bytes() == b'previous'
+
+
+def test_streams_larger_than_the_write_buffer(tmp_path, monkeypatch):
+    monkeypatch.setattr(LocalFilesystem, 'WRITE_BUFFER_SIZE', 10)
+    chunk_sizes = [4] * 6
+
+    async def chunks():
+        for size in chunk_sizes:
+            yield b'x' * size
+
+    async def main():
+        async with LocalFilesystem(str(tmp_path)) as filesystem:
+            await filesystem.write_stream('document.pdf', chunks())
+
+    asyncio.run(main())
+
+    assert (tmp_path / 'document.pdf').read_bytes() == b'x' * sum(chunk_sizes)
+
+
+def test_links_are_relative(tmp_path):
+    async def main():
+        async with LocalFilesystem(str(tmp_path / 'data')) as filesystem:
+            await filesystem.write('blobs/blob.pdf', b'content')
+            await filesystem.write('2024/1/2/document.pdf', b'replaced')
+            await filesystem.link('blobs/blob.pdf', '2024/1/2/document.pdf')
+
+    asyncio.run(main())
+
+    # The link replaced the file and still resolves once the data directory
+    # is moved
+    shutil.move(tmp_path / 'data', tmp_path / 'moved')
+    link = tmp_path / 'moved/2024/1/2/document.pdf'
+    assert os.readlink(link) == '../../../blobs/blob.pdf'
+    assert link.read_bytes() == b'content'
+    assert list_files(tmp_path / 'moved') == ['2024/1/2/document.pdf', 'blobs/blob.pdf']
+
+
+def test_removed_directories_are_created_again(tmp_path):
+    async def main():
+        async with LocalFilesystem(str(tmp_path)) as filesystem:
+            await filesystem.write('2024/1/first.txt', b'first')
+            shutil.rmtree(tmp_path / '2024')
+            await filesystem.write('2024/1/second.txt', b'second')
+
+    asyncio.run(main())
+
+    assert list_files(tmp_path) == ['2024/1/second.txt']
@@ -0,0 +1,86 @@
+from datetime import date
+import re
+
+from boib.extractors.caib import CAIBBulletinExtractor
+from boib.filters import ExtractionFilter
+from boib.models import Article, BulletinType, DateRange, SectionType, URLType
+
+JANUARY = DateRange(date(2024, 1, 1), date(2024, 1, 31))
+ARTICLE = Article(
+    1180000,
+    'UNIVERSITAT DE LES ILLES BALEARS',
+    'Summary',
+    pdf_url='https://www.caib.es/eboibfront/pdf/ca/2024/1/1180000',
+    html_url='https://www.caib.es/eboibfront/html/ca/2024/1/1180000',
+)
+LEGACY_ARTICLE = Article(None, None, 'Summary', pdf_url='https://www.caib.es/eboibfront/pdf/ca/2010/1/1')
+
+
+def extract(crawl, extraction_filter: ExtractionFilter, date_range: DateRange) -> list:
+    async def main(context):
+        extractor = CAIBBulletinExtractor(client=context.client, extraction_filter=extraction_filter)
+        return [bulletin async for bulletin in extractor.extract_range_iter(date_range)]
+
+    return crawl(main)
+
+
+def test_empty_filter_keeps_everything():
+    extraction_filter = ExtractionFilter()
+
+    assert extraction_filter.is_empty
+    assert extraction_filter.accepts_section(SectionType.LEGACY)
+    assert extraction_filter.filter_articles([ARTICLE, LEGACY_ARTICLE]) == [ARTICLE, LEGACY_ARTICLE]
+
+
+def test_number_and_organization_filters():
+    assert ExtractionFilter(min_number=1180000, max_number=1180000).filter_article(ARTICLE) == ARTICLE
+    assert ExtractionFilter(min_number=1180001).filter_article(ARTICLE) is None
+    assert ExtractionFilter(max_number=1179999).filter_article(ARTICLE) is None
+    assert ExtractionFilter(organization=re.compile('universitat', re.IGNORECASE)).filter_article(ARTICLE) == ARTICLE
+    assert ExtractionFilter(organization=re.compile('AJUNTAMENT')).filter_article(ARTICLE) is None
+
+    # Articles without a registry number or an organization can't match
+    assert ExtractionFilter(min_number=1).filter_article(LEGACY_ARTICLE) is None
+    assert ExtractionFilter(organization=re.compile('.')).filter_article(LEGACY_ARTICLE) is None
+
+
+def test_document_type_filter_drops_the_other_urls():
+    pdf_article = ExtractionFilter(url_types=frozenset({URLType.PDF})).filter_article(ARTICLE)
+
+    assert pdf_article.urls == {URLType.PDF: ARTICLE.pdf_url}
+    assert ExtractionFilter(url_types=frozenset({URLType.HTML})).filter_article(LEGACY_ARTICLE) is None
+
+
+def test_bulletins_left_out_are_never_fetched(server, crawl):
+    extraction_filter = ExtractionFilter(
+        bulletin_types=frozenset({BulletinType.EXTRAORDINARY}),
+        section_types=frozenset({SectionType.GENERAL}),
+    )
+
+    bulletins = extract(crawl, extraction_filter, JANUARY)
+
+    assert [bulletin.url for bulletin in bulletins] == ['https://intranet.caib.es/eboibfront/ca/2024/12101/']
+    # Every fixture bulletin links the sections of bulletin 12010
+    assert server.paths == [
+        '/eboibfront/ca/2024',
+        '/eboibfront/ca/2024/12101/',
+        '/eboibfront/ca/2024/12010/650000/disposicions-generals',
+    ]
+
+
+def test_sections_left_out_are_never_fetched(server, crawl):
+    extraction_filter = ExtractionFilter(
+        section_types=frozenset({SectionType.PERSONNEL}),
+        organization=re.compile('universitat', re.IGNORECASE),
+        max_number=1180010,
+    )
+
+    bulletin, = extract(crawl, extraction_filter, DateRange(date(2024, 1, 2), date(2024, 1, 2)))
+
+    assert not any(path.endswith('/anuncis') for path in server.paths)
+    assert [section.type for section in bulletin.sections] == [SectionType.PERSONNEL]
+    assert bulletin.sections[0].articles
+    assert all(
+        article.number <= 1180010 and 'UNIVERSITAT' in article.organization
+        for article in bulletin.sections[0].articles
+    )
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import sqlite3
+import threading
+
+from boib.downloaders import BulletinDownloader
+from boib.downloaders.html import HTMLArticleDownloader
+from boib.downloaders.pdf import PDFArticleDownloader
+from boib.models import Bulletin
+
+
+def download(crawl, bulletin: Bulletin, downloader_class=PDFArticleDownloader) -> bool:
+    async def download(crawl):
+        article_downloader = downloader_class(crawl.filesystem, crawl.client)
+        return await BulletinDownloader(article_downloader, manifest=crawl.manifest).download(bulletin)
+
+    return crawl(download)
+
+
+def test_completed_articles_are_skipped(server, crawl, bulletin):
+    assert download(crawl, bulletin)
+    assert server.requests == 3
+
+    assert download(crawl, bulletin)
+    assert server.requests == 3
+
+
+def test_deleted_documents_are_downloaded_again(server, crawl, tmp_path, bulletin):
+    download(crawl, bulletin)
+    os.remove(tmp_path / 'data' / '2024' / '1' / '2' / '12010' / '1180001.pdf')
+
+    assert download(crawl, bulletin)
+
+    assert server.paths[3:] == ['/eboibfront/pdf/ca/2024/1/1180001']
+    assert (tmp_path / 'data' / '2024' / '1' / '2' / '12010' / '1180001.pdf').exists()
+
+
+def test_failed_articles_are_retried(server, crawl, bulletin):
+    server.fail(r'/1180002$', times=1)
+
+    assert not download(crawl, bulletin)
+    assert download(crawl, bulletin)
+
+    assert server.paths[3:] == ['/eboibfront/pdf/ca/2024/1/1180002']
+
+
+def test_completion_is_kept_by_document(server, crawl, bulletin):
+    # Articles downloaded as PDF are still downloaded as HTML
+    download(crawl, bulletin, PDFArticleDownloader)
+    download(crawl, bulletin, HTMLArticleDownloader)
+
+    assert server.requests == 6
+    assert all(path.startswith('/eboibfront/html/') for path in server.paths[3:])
+
+    download(crawl, bulletin, HTMLArticleDownloader)
+    download(crawl, bulletin, PDFArticleDownloader)
+
+    assert server.requests == 6
+
+
+def test_locked_manifest_does_not_block_the_event_loop(crawl, tmp_path, bulletin):
+    download(crawl, bulletin)
+
+    # Another process holds the write lock for a while
+    connection = sqlite3.connect(tmp_path / 'manifest.sqlite3', check_same_thread=False, isolation_level=None)
+    connection.execute('BEGIN IMMEDIATE')
+    threading.Timer(0.3, connection.rollback).start()
+
+    async def record(crawl):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        await crawl.manifest.record_bulletin(bulletin)
+        ticker.cancel()
+
+        return ticks, await crawl.manifest.completed_bulletins()
+
+    ticks, completed = crawl(record)
+    connection.close()
+
+    assert ticks >= 10
+    assert completed == {bulletin.url}
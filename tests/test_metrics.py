@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from boib.metrics import (
+    HTTP_REQUESTS,
+    HTTP_RESPONSE_BYTES,
+    STAGE_ERRORS,
+    Histogram,
+    Metrics,
+    exporting,
+    timed,
+)
+
+SECTION_URL = 'https://intranet.caib.es/eboibfront/ca/2024/12010/650001/autoritats-i-personal'
+
+
+def test_render():
+    metrics = Metrics()
+    requests = metrics.counter('requests_total', 'Requests')
+    depth = metrics.gauge('depth', 'Depth')
+    duration = metrics.histogram('duration_seconds', 'Duration', buckets=(0.1, 1.0))
+
+    requests.inc(host='a "b"')
+    requests.inc(2, host='a "b"')
+    depth.set(5, queue='bulletins')
+    depth.dec(queue='bulletins')
+    for value in (0.05, 0.5, 0.5, 3):
+        duration.observe(value, stage='parse')
+
+    assert metrics.render().splitlines() == [
+        '# HELP requests_total Requests',
+        '# TYPE requests_total counter',
+        'requests_total{host="a \\"b\\""} 3',
+        '# HELP depth Depth',
+        '# TYPE depth gauge',
+        'depth{queue="bulletins"} 4',
+        '# HELP duration_seconds Duration',
+        '# TYPE duration_seconds histogram',
+        'duration_seconds_bucket{stage="parse",le="0.1"} 1',
+        'duration_seconds_bucket{stage="parse",le="1"} 3',
+        'duration_seconds_bucket{stage="parse",le="+Inf"} 4',
+        'duration_seconds_sum{stage="parse"} 4.05',
+        'duration_seconds_count{stage="parse"} 4',
+    ]
+
+
+def test_histogram_quantiles():
+    histogram = Histogram('duration_seconds', 'Duration', buckets=(0.1, 1.0))
+    for value in [0.05] * 6 + [0.5] * 3 + [5]:
+        histogram.observe(value)
+
+    (count, total, p50, p95), = histogram.stats().values()
+
+    assert count == 10
+    assert total == pytest.approx(6.8)
+    # Upper bounds of the buckets the percentiles fall in
+    assert (p50, p95) == (0.1, float('inf'))
+
+
+def test_failed_stages_are_counted():
+    errors = STAGE_ERRORS.get(stage='test')
+
+    with pytest.raises(ValueError), timed('test'):
+        raise ValueError()
+
+    assert STAGE_ERRORS.get(stage='test') == errors + 1
+
+
+def test_requests_are_measured(make_client, tmp_path):
+    path = tmp_path / 'metrics.prom'
+    requests = HTTP_REQUESTS.get(host='intranet.caib.es', status='200')
+    received = HTTP_RESPONSE_BYTES.get(host='intranet.caib.es')
+
+    async def main():
+        async with exporting(str(path), interval=60), make_client() as client:
+            return await client.get(SECTION_URL)
+
+    response = asyncio.run(main())
+
+    assert HTTP_REQUESTS.get(host='intranet.caib.es', status='200') == requests + 1
+    assert HTTP_RESPONSE_BYTES.get(host='intranet.caib.es') == received + len(response.content)
+    # Written once more on exit
+    assert 'boib_http_requests_total{host="intranet.caib.es",status="200"}' in path.read_text()
@@ -0,0 +1,33 @@
+from dataclasses import FrozenInstanceError, replace
+import pickle
+
+import pytest
+
+from boib.models import Article, Bulletin, URLType
+
+
+def test_bulletins_round_trip_as_tuples(bulletin):
+    bulletin = replace(bulletin, sections=[replace(bulletin.sections[0], complete=False)], extracted=False)
+
+    assert Bulletin.from_tuple(bulletin.as_tuple()) == bulletin
+    assert pickle.loads(pickle.dumps(bulletin)) == bulletin
+
+
+def test_models_are_frozen(bulletin):
+    section, = bulletin.sections
+
+    with pytest.raises(FrozenInstanceError):
+        bulletin.extracted = False
+    with pytest.raises(FrozenInstanceError):
+        section.complete = False
+    with pytest.raises(FrozenInstanceError):
+        section.articles[0].number = None
+
+
+def test_articles_share_their_organization():
+    first = Article(1, ''.join(['CONSELL ', 'DE MALLORCA']), 'First', pdf_url='https://example.com/1')
+    second = Article(2, ''.join(['CONSELL ', 'DE MALLORCA']), 'Second', html_url='https://example.com/2')
+
+    assert first.organization is second.organization
+    assert first.urls == {URLType.PDF: 'https://example.com/1'}
+    assert second.urls == {URLType.HTML: 'https://example.com/2'}
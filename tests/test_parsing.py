@@ -0,0 +1,43 @@
+import importlib.util
+import os
+
+from click.testing import CliRunner
+import pytest
+
+from benchmarks.server import FIXTURES_DIR
+from boib import cli, utils
+from boib.extractors.caib import CAIBArticleExtractor
+
+PARSERS = ['html.parser'] + (['lxml'] if importlib.util.find_spec('lxml') else [])
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name)) as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('name, count', [('section.html', 40), ('section_grouped.html', 36)])
+@pytest.mark.parametrize('parser', PARSERS)
+def test_parsers_extract_the_same_articles(parser, name, count):
+    page = read_fixture(name)
+
+    articles = CAIBArticleExtractor.parse_articles(page, parser)
+
+    assert len(articles) == count
+    assert articles == CAIBArticleExtractor.parse_articles(page, 'html.parser')
+
+
+def test_default_parser_without_lxml(monkeypatch):
+    monkeypatch.setattr(utils, '__html_parser', None)
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda name: None)
+
+    assert utils.get_html_parser() == 'html.parser'
+
+
+def test_lxml_parser_requires_lxml(monkeypatch):
+    monkeypatch.setattr(cli, 'find_spec', lambda name: None)
+
+    result = CliRunner().invoke(cli.cli, ['fetch', '--parser', 'lxml', '2024'])
+
+    assert result.exit_code == 2
+    assert 'requires lxml' in result.output
@@ -0,0 +1,53 @@
+from datetime import date
+
+from boib.downloaders import BulletinDownloader
+from boib.downloaders.pdf import PDFArticleDownloader
+from boib.exporters.jsonl import JSONLExporter
+from boib.extractors.caib import CAIBBulletinExtractor
+from boib.filters import ExtractionFilter
+from boib.models import DateRange, URLType
+from boib.pipeline import Pipeline
+
+# A couple of PDFs per section keep the downloads short
+EXTRACTION_FILTER = ExtractionFilter(max_number=1180001, url_types=frozenset({URLType.PDF}))
+EXPORT_PATH = 'data/metadata/jsonl/year=2024/month=01/{}.jsonl'
+
+
+def run(crawl, date_range: DateRange) -> list[str]:
+    async def main(context):
+        async with JSONLExporter(context.filesystem) as exporter:
+            pipeline = Pipeline(
+                CAIBBulletinExtractor(client=context.client, extraction_filter=EXTRACTION_FILTER),
+                BulletinDownloader(PDFArticleDownloader(context.filesystem, context.client), manifest=context.manifest),
+                exporters=[exporter],
+            )
+            completed = await pipeline.run(date_range)
+
+        return [bulletin.url for bulletin in completed]
+
+    return crawl(main)
+
+
+def test_bulletins_with_failed_sections_are_not_completed(crawl, server, tmp_path):
+    server.fail(r'/autoritats-i-personal$', times=1)
+    day = DateRange(date(2024, 1, 2), date(2024, 1, 2))
+
+    assert run(crawl, day) == []
+    # The articles of the other sections are downloaded anyway
+    assert list(tmp_path.glob('data/2024/1/2/*/1180000.pdf'))
+    assert not (tmp_path / EXPORT_PATH.format('2024-01-02')).exists()
+
+    assert run(crawl, day) == ['https://intranet.caib.es/eboibfront/ca/2024/12010/']
+    assert (tmp_path / EXPORT_PATH.format('2024-01-02')).exists()
+
+
+def test_bulletins_not_extracted_are_not_downloaded(crawl, server, tmp_path):
+    server.fail(r'/12020/$')
+
+    completed = run(crawl, DateRange(date(2024, 1, 2), date(2024, 1, 6)))
+
+    assert sorted(completed) == [
+        'https://intranet.caib.es/eboibfront/ca/2024/12010/',
+        'https://intranet.caib.es/eboibfront/ca/2024/12030/',
+    ]
+    assert not (tmp_path / 'data' / '2024' / '1' / '4').exists()
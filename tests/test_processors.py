@@ -0,0 +1,66 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import pytest
+
+from boib.downloaders import BulletinDownloader
+from boib.downloaders.pdf import PDFArticleDownloader
+from boib.filesystems.local import LocalFilesystem
+from boib.processors.pdf_text import PDFTextProcessor
+
+pytest.importorskip('pypdf')
+
+
+class RemoteFilesystem(LocalFilesystem):
+    # Without local paths, PDFs are read and sent to the worker processes
+
+    def get_local_path(self, path):
+        return None
+
+
+@pytest.fixture(scope='module')
+def executor():
+    # Spawned processes don't inherit anything, what is sent to them has to
+    # pickle
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        yield executor
+
+
+def download(crawl, bulletin, executor=None, filesystem_class=LocalFilesystem):
+    async def main(context):
+        async with filesystem_class(context.filesystem.get_local_path('')) as filesystem:
+            processors = [PDFTextProcessor(filesystem, executor)] if executor is not None else []
+            downloader = BulletinDownloader(
+                PDFArticleDownloader(filesystem, context.client),
+                manifest=context.manifest,
+                processors=processors,
+            )
+            assert await downloader.download(bulletin)
+
+            documents = await context.manifest.get_documents('.txt')
+            return processors[0].stats.documents if processors else 0, [document.path for document, _ in documents]
+
+    return crawl(main)
+
+
+@pytest.mark.parametrize('filesystem_class', [LocalFilesystem, RemoteFilesystem])
+def test_text_is_extracted(crawl, tmp_path, bulletin, executor, filesystem_class):
+    processed, paths = download(crawl, bulletin, executor, filesystem_class)
+
+    assert processed == 3
+    assert sorted(path.rsplit('/', 1)[1] for path in paths) == ['1180000.txt', '1180001.txt', '1180002.txt']
+    text = (tmp_path / 'data' / paths[0]).read_text()
+    assert text == PDFTextProcessor.extract_text((tmp_path / 'data' / paths[0]).with_suffix('.pdf').read_bytes())[0]
+
+
+def test_documents_downloaded_before_are_processed(crawl, server, bulletin, executor):
+    assert download(crawl, bulletin) == (0, [])
+    requests = server.requests
+
+    # Skipped articles without text get it, once
+    processed, paths = download(crawl, bulletin, executor)
+    assert processed == 3
+    assert len(paths) == 3
+
+    assert download(crawl, bulletin, executor) == (0, paths)
+    assert server.requests == requests
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from boib.queues import WorkItemKind, WorkItemStatus, WorkQueue
+from boib.queues.sqlite import SQLiteWorkQueue
+
+ITEMS = [
+    ('bulletin:1', WorkItemKind.BULLETIN, {'bulletin': 1}),
+    ('bulletin:2', WorkItemKind.BULLETIN, {'bulletin': 2}),
+]
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def make_queue(request, tmp_path, monkeypatch):
+    # Every queue made by a test shares the same backing store, like the
+    # workers of a crawl do
+    if request.param == 'sqlite':
+        return lambda max_attempts=WorkQueue.DEFAULT_MAX_ATTEMPTS: SQLiteWorkQueue(
+            str(tmp_path / 'queue.sqlite3'),
+            max_attempts,
+        )
+
+    fakeredis = pytest.importorskip('fakeredis')
+    import boib.queues.redis
+    from boib.queues.redis import RedisWorkQueue
+
+    server = fakeredis.FakeServer()
+
+    class FakeRedisModule:
+        @staticmethod
+        def from_url(url, **options):
+            return fakeredis.FakeAsyncRedis(server=server, **options)
+
+    monkeypatch.setattr(boib.queues.redis, 'redis', FakeRedisModule)
+    return lambda max_attempts=WorkQueue.DEFAULT_MAX_ATTEMPTS: RedisWorkQueue(
+        'redis://localhost:6379/0',
+        max_attempts=max_attempts,
+    )
+
+
+def test_items_are_keyed(make_queue):
+    async def main():
+        async with make_queue() as queue:
+            return await queue.put(ITEMS), await queue.put(ITEMS[:1]), await queue.stats()
+
+    added, added_again, stats = asyncio.run(main())
+
+    assert added == 2
+    assert added_again == 0
+    assert stats == {WorkItemStatus.PENDING: 2}
+
+
+def test_leased_items_are_hidden_until_acked(make_queue):
+    async def main():
+        async with make_queue() as queue, make_queue() as other_queue:
+            await queue.put(ITEMS)
+
+            first = await queue.lease()
+            second = await other_queue.lease()
+            assert await other_queue.lease() is None
+            assert not await queue.is_drained()
+
+            await queue.ack(first)
+            await other_queue.ack(second)
+            return first, second, await queue.stats(), await queue.is_drained()
+
+    first, second, stats, drained = asyncio.run(main())
+
+    assert {first.key, second.key} == {'bulletin:1', 'bulletin:2'}
+    assert first.kind == WorkItemKind.BULLETIN
+    assert first.payload in ({'bulletin': 1}, {'bulletin': 2})
+    assert first.attempts == 1
+    assert stats == {WorkItemStatus.DONE: 2}
+    assert drained
+
+
+def test_failed_items_are_retried_up_to_max_attempts(make_queue):
+    async def main():
+        async with make_queue(max_attempts=2) as queue:
+            await queue.put(ITEMS[:1])
+
+            item = await queue.lease()
+            await queue.fail(item, 'Error')
+            retried = await queue.lease()
+            await queue.fail(retried, 'Error')
+
+            return retried, await queue.lease(), await queue.stats(), await queue.is_drained()
+
+    retried, leased, stats, drained = asyncio.run(main())
+
+    assert retried.key == 'bulletin:1'
+    assert retried.attempts == 2
+    assert leased is None
+    assert stats == {WorkItemStatus.FAILED: 1}
+    assert drained
+
+
+def test_expired_leases_are_handed_to_another_worker(make_queue):
+    async def main():
+        async with make_queue() as queue, make_queue() as other_queue:
+            await queue.put(ITEMS[:1])
+
+            item = await queue.lease(visibility_timeout=0.1)
+            assert await other_queue.lease() is None
+            await asyncio.sleep(0.2)
+            released = await other_queue.lease()
+
+            # The first worker did finish the item after all, the ack or
+            # failure of the second one is ignored
+            await queue.ack(item)
+            await other_queue.fail(released, 'Error')
+
+            return released, await queue.lease(), await queue.stats()
+
+    released, leased, stats = asyncio.run(main())
+
+    assert released.key == 'bulletin:1'
+    assert released.attempts == 2
+    assert leased is None
+    assert stats == {WorkItemStatus.DONE: 1}
+
+
+def test_items_whose_workers_keep_dying_fail(make_queue):
+    # A poison item that kills every worker leasing it is never acked nor
+    # failed, its lease just expires
+    async def main():
+        async with make_queue(max_attempts=2) as queue:
+            await queue.put(ITEMS[:1])
+
+            for _ in range(2):
+                assert await queue.lease(visibility_timeout=0.05) is not None
+                await asyncio.sleep(0.1)
+
+            return await queue.lease(), await queue.stats(), await queue.is_drained()
+
+    leased, stats, drained = asyncio.run(main())
+
+    assert leased is None
+    assert stats == {WorkItemStatus.FAILED: 1}
+    assert drained
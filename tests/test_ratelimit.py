@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from boib.ratelimit import HostRateLimiter, TokenBucket
+
+
+def test_token_bucket_spends_its_burst_then_waits():
+    async def main():
+        bucket = TokenBucket(rate=20, capacity=5)
+
+        started_at = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        burst = time.monotonic() - started_at
+
+        for _ in range(5):
+            await bucket.acquire()
+        return burst, time.monotonic() - started_at
+
+    burst, elapsed = asyncio.run(main())
+
+    assert burst < 0.05
+    # Five more tokens at 20 per second
+    assert elapsed >= 0.2
+
+
+def test_rate_limited_client(server, make_client):
+    rate_limiter = HostRateLimiter({'intranet.caib.es': 10}, burst=1)
+
+    async def main():
+        async with make_client(rate_limiter=rate_limiter) as client:
+            started_at = time.monotonic()
+            await asyncio.gather(*(
+                client.get('https://intranet.caib.es/eboibfront/ca/2024') for _ in range(4)
+            ))
+            return time.monotonic() - started_at
+
+    elapsed = asyncio.run(main())
+
+    assert server.requests == 4
+    assert elapsed >= 0.3
+
+
+def test_hosts_without_rate_are_not_limited():
+    rate_limiter = HostRateLimiter({'intranet.caib.es': 1, 'www.caib.es': 0})
+
+    async def main():
+        started_at = time.monotonic()
+        for _ in range(50):
+            await rate_limiter.acquire('www.caib.es')
+            await rate_limiter.acquire('example.com')
+        return time.monotonic() - started_at
+
+    assert asyncio.run(main()) < 0.05
@@ -0,0 +1,149 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import email.utils
+
+import httpx
+import pytest
+
+from boib.retry import CircuitBreaker, CircuitOpenError, DeadLetters, RetryPolicy, RetryTransport
+
+CALENDAR_URL = 'https://intranet.caib.es/eboibfront/ca/2024'
+POLICY = RetryPolicy(max_attempts=3, backoff_base=0.01, backoff_max=0.05)
+
+
+def test_retries_until_success(server, make_client):
+    server.fail(r'/2024$', times=2)
+    dead_letters = DeadLetters()
+
+    async def main():
+        async with make_client(retry_policy=POLICY, dead_letters=dead_letters) as client:
+            return await client.get(CALENDAR_URL)
+
+    response = asyncio.run(main())
+
+    assert response.status_code == 200
+    assert server.requests == 3
+    assert len(dead_letters) == 0
+
+
+def test_gives_up_after_max_attempts(server, make_client, tmp_path):
+    server.fail(r'/2024$')
+    dead_letters = DeadLetters()
+
+    async def main():
+        async with make_client(retry_policy=POLICY, dead_letters=dead_letters) as client:
+            return await client.get(CALENDAR_URL)
+
+    response = asyncio.run(main())
+
+    assert response.status_code == 503
+    assert server.requests == POLICY.max_attempts
+
+    path = tmp_path / 'dead-letters.jsonl'
+    asyncio.run(dead_letters.write(str(path)))
+    assert '"url": "https://intranet.caib.es/eboibfront/ca/2024"' in path.read_text()
+    assert '"attempts": 3' in path.read_text()
+
+
+def test_client_errors_are_not_retried(server, make_client):
+    server.fail(r'/2024$', status=404)
+    dead_letters = DeadLetters()
+
+    async def main():
+        async with make_client(retry_policy=POLICY, dead_letters=dead_letters) as client:
+            return await client.get(CALENDAR_URL)
+
+    assert asyncio.run(main()).status_code == 404
+    assert server.requests == 1
+    assert len(dead_letters) == 1
+
+
+def test_connection_errors_are_retried():
+    async def main():
+        # Nothing listens on the port of a closed server
+        closed = await asyncio.start_server(lambda reader, writer: None, '127.0.0.1', 0)
+        port = closed.sockets[0].getsockname()[1]
+        closed.close()
+        await closed.wait_closed()
+
+        dead_letters = DeadLetters()
+        transport = RetryTransport(httpx.AsyncHTTPTransport(), POLICY, dead_letters=dead_letters)
+        async with httpx.AsyncClient(transport=transport) as client:
+            with pytest.raises(httpx.ConnectError):
+                await client.get(f'http://127.0.0.1:{port}/')
+
+        return dead_letters
+
+    dead_letters = asyncio.run(main())
+
+    assert len(dead_letters) == 1
+
+
+def test_circuit_fails_fast_while_open(server, make_client):
+    server.fail(r'/2024$', times=3)
+    circuit_breaker = CircuitBreaker(failure_threshold=2, cooldown=0.2)
+    dead_letters = DeadLetters()
+
+    async def main():
+        async with make_client(
+            retry_policy=RetryPolicy(max_attempts=5, backoff_base=0.0),
+            circuit_breaker=circuit_breaker,
+            dead_letters=dead_letters,
+        ) as client:
+            # Opened after the second failure, the third attempt isn't sent
+            with pytest.raises(CircuitOpenError):
+                await client.get(CALENDAR_URL)
+            requests = server.requests
+
+            with pytest.raises(CircuitOpenError):
+                await client.get(CALENDAR_URL)
+            assert server.requests == requests
+
+            # Half open once the cooldown is over, a single failure opens it
+            # again and a success closes it
+            await asyncio.sleep(0.3)
+            with pytest.raises(CircuitOpenError):
+                await client.get(CALENDAR_URL)
+            await asyncio.sleep(0.3)
+            response = await client.get(CALENDAR_URL)
+
+            return requests, response
+
+    requests, response = asyncio.run(main())
+
+    assert requests == 2
+    assert response.status_code == 200
+    assert server.requests == 4
+    assert len(dead_letters) == 3
+
+
+def test_circuit_closes_on_success():
+    circuit_breaker = CircuitBreaker(failure_threshold=2, cooldown=10)
+    circuit_breaker.record_failure('intranet.caib.es')
+    circuit_breaker.record_success('intranet.caib.es')
+    circuit_breaker.record_failure('intranet.caib.es')
+
+    circuit_breaker.check(httpx.Request('GET', CALENDAR_URL))
+
+
+def test_retry_after():
+    policy = RetryPolicy(backoff_max=30)
+    request = httpx.Request('GET', CALENDAR_URL)
+
+    def response(retry_after: str) -> httpx.Response:
+        return httpx.Response(429, headers={'Retry-After': retry_after}, request=request)
+
+    assert policy.get_delay(1, response('7')) == 7
+    assert policy.get_delay(1, response('120')) == 30
+
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=10)
+    assert 8 <= policy.get_delay(1, response(email.utils.format_datetime(retry_at, usegmt=True))) <= 10
+
+    # Unparseable values fall back to the jittered backoff
+    assert 0 <= policy.get_delay(3, response('soon')) <= policy.backoff_base * 4
+
+
+def test_backoff_is_bounded():
+    policy = RetryPolicy(backoff_base=1, backoff_max=5)
+
+    assert all(0 <= policy.get_delay(attempt) <= 5 for attempt in range(1, 20))
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import uuid
+
+import pytest
+
+aioboto3 = pytest.importorskip('aioboto3')
+moto_server = pytest.importorskip('moto.server')
+
+from boib.filesystems.s3 import S3Filesystem
+
+CREDENTIALS = {
+    'aws_access_key_id': 'testing',
+    'aws_secret_access_key': 'testing',
+    'region_name': 'us-east-1',
+}
+PREFIX = 'boib'
+
+
+@pytest.fixture(scope='module')
+def endpoint_url():
+    server = moto_server.ThreadedMotoServer(ip_address='127.0.0.1', port=0)
+    server.start()
+    _, port = server.get_host_and_port()
+    yield f'http://127.0.0.1:{port}'
+    server.stop()
+
+
+@pytest.fixture
+def s3(endpoint_url):
+    # A new bucket for every test, the server is shared by the module
+    bucket_name = f'boib-{uuid.uuid4().hex}'
+
+    def s3(function):
+        async def main():
+            session = aioboto3.Session(**CREDENTIALS)
+            async with session.client('s3', endpoint_url=endpoint_url) as client:
+                await client.create_bucket(Bucket=bucket_name)
+                filesystem = S3Filesystem(bucket_name, endpoint_url=endpoint_url, prefix=PREFIX, **CREDENTIALS)
+                return await function(filesystem, client, bucket_name)
+
+        return asyncio.run(main())
+
+    return s3
+
+
+async def generate(data: bytes, chunk_size: int = 1024 * 1024):
+    for offset in range(0, len(data), chunk_size):
+        yield data[offset:offset + chunk_size]
+
+
+def test_operations(s3):
+    async def main(filesystem, client, bucket_name):
+        async with filesystem:
+            assert not await filesystem.exists('a.pdf')
+            await filesystem.write('a.pdf', b'0123456789')
+            await filesystem.link('a.pdf', 'b.pdf')
+
+            assert await filesystem.exists('a.pdf')
+            assert await filesystem.read('b.pdf') == b'0123456789'
+            assert await filesystem.read_range('b.pdf', 2, 3) == b'234'
+
+            await filesystem.move('b.pdf', 'c.pdf')
+            assert not await filesystem.exists('b.pdf')
+            with pytest.raises(FileNotFoundError):
+                await filesystem.read('b.pdf')
+            with pytest.raises(FileNotFoundError):
+                await filesystem.read_range('b.pdf', 0, 1)
+
+            # Appending rewrites the object
+            assert await filesystem.append('d.log', b'01') == 0
+            assert await filesystem.append('d.log', b'23') == 2
+            assert await filesystem.read('d.log') == b'0123'
+
+        objects = await client.list_objects_v2(Bucket=bucket_name)
+        return sorted(item['Key'] for item in objects['Contents'])
+
+    assert s3(main) == ['boib/a.pdf', 'boib/c.pdf', 'boib/d.log']
+
+
+def test_client_is_reused(s3, monkeypatch):
+    created = []
+    client = aioboto3.Session.client
+
+    def counting_client(self, *args, **kwargs):
+        created.append(args)
+        return client(self, *args, **kwargs)
+
+    async def main(filesystem, _, __):
+        monkeypatch.setattr(aioboto3.Session, 'client', counting_client)
+
+        async with filesystem:
+            await filesystem.write('a.pdf', b'a')
+            await filesystem.exists('a.pdf')
+            await filesystem.read('a.pdf')
+        reused = len(created)
+
+        # Outside of `async with` every operation opens its own client
+        await filesystem.exists('a.pdf')
+        await filesystem.read('a.pdf')
+
+        return reused, len(created)
+
+    assert s3(main) == (1, 3)
+
+
+def test_uploads_are_bounded(s3, endpoint_url):
+    active = 0
+    max_active = 0
+
+    async def slow(data: bytes):
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.05)
+        yield data
+        active -= 1
+
+    async def main(_, __, bucket_name):
+        filesystem = S3Filesystem(
+            bucket_name, endpoint_url=endpoint_url, upload_concurrency=2, **CREDENTIALS,
+        )
+        async with filesystem:
+            await asyncio.gather(*(
+                filesystem.write_stream(f'{number}.pdf', slow(b'%PDF'))
+                for number in range(6)
+            ))
+            return [await filesystem.read(f'{number}.pdf') for number in range(6)]
+
+    assert s3(main) == [b'%PDF'] * 6
+    assert max_active == 2
+
+
+def test_multipart_upload(s3):
+    # Two full parts and a last shorter one
+    data = bytes(range(256)) * (S3Filesystem.MULTIPART_CHUNK_SIZE // 128 + 4096)
+
+    async def main(filesystem, client, bucket_name):
+        async with filesystem:
+            await filesystem.write_stream('large.pdf', generate(data))
+            boundary = S3Filesystem.MULTIPART_CHUNK_SIZE - 5
+            read_range = await filesystem.read_range('large.pdf', boundary, 10)
+            stored = await filesystem.read('large.pdf')
+
+        head = await client.head_object(Bucket=bucket_name, Key=f'{PREFIX}/large.pdf')
+        return read_range, stored, head['ETag']
+
+    read_range, stored, etag = s3(main)
+
+    boundary = S3Filesystem.MULTIPART_CHUNK_SIZE - 5
+    assert read_range == data[boundary:boundary + 10]
+    assert hashlib.sha256(stored).digest() == hashlib.sha256(data).digest()
+    # ETags of multipart uploads end with their number of parts
+    assert etag.strip('"').endswith('-3')
+
+
+def test_failed_multipart_upload_is_aborted(s3):
+    async def failing():
+        async for chunk in generate(b'\0' * (S3Filesystem.MULTIPART_CHUNK_SIZE + 1)):
+            yield chunk
+        raise ConnectionError('Connection lost')
+
+    async def main(filesystem, client, bucket_name):
+        async with filesystem:
+            with pytest.raises(ConnectionError):
+                await filesystem.write_stream('large.pdf', failing())
+            exists = await filesystem.exists('large.pdf')
+
+        uploads = await client.list_multipart_uploads(Bucket=bucket_name)
+        return exists, uploads.get('Uploads', [])
+
+    assert s3(main) == (False, [])
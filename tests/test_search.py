@@ -0,0 +1,91 @@
+from dataclasses import replace
+from datetime import date
+import hashlib
+
+from boib.models import Document, SectionType
+from boib.search import SearchIndex
+
+TEXTS = {
+    1180000: 'Convocatòria de places de professorat',
+    1180001: 'Nomenament del rector',
+    1180002: 'Subvencions per a entitats esportives',
+}
+
+
+async def add_text(context, bulletin, section, article, text: str):
+    content = text.encode('utf-8')
+    path = f'{bulletin.date.isoformat()}/{article.number}.txt'
+    await context.filesystem.write(path, content)
+    document = Document(path, article.pdf_url, len(content), hashlib.sha256(content).hexdigest())
+    await context.manifest.record_completed(bulletin, section, article, document)
+
+
+def test_index_and_search(crawl, tmp_path, bulletin):
+    section, = bulletin.sections
+    # The same articles in a later bulletin of another section
+    later = replace(
+        bulletin,
+        number=12020,
+        date=date(2024, 1, 4),
+        sections=[replace(section, type=SectionType.OTHERS)],
+    )
+
+    async def main(context):
+        for current in (bulletin, later):
+            current_section, = current.sections
+            for article in current_section.articles:
+                await add_text(context, current, current_section, article, TEXTS[article.number])
+
+        async with SearchIndex(str(tmp_path / 'search.sqlite3')) as search_index:
+            indexed = await search_index.update(context.manifest, context.filesystem)
+            # Nothing changed since
+            reindexed = await search_index.update(context.manifest, context.filesystem)
+
+            return indexed, reindexed, {
+                # Accents are ignored
+                'query': search_index.search('convocatoria'),
+                'organization': search_index.search(organization='UNIVERSITAT DE LES ILLES BALEARS'),
+                'filters': search_index.search(start=date(2024, 1, 1)),
+                'dates': search_index.search('rector', start=date(2024, 1, 3)),
+                'sections': search_index.search('rector OR subvencions', sections=('PERSONNEL',)),
+            }
+
+    indexed, reindexed, results = crawl(main)
+
+    assert (indexed, reindexed) == (6, 0)
+
+    assert [result.bulletin_date for result in results['query']] == ['2024-01-02', '2024-01-04']
+    assert all(result.article_number == 1180000 for result in results['query'])
+    assert '[Convocatòria]' in results['query'][0].snippet
+
+    assert len(results['organization']) == 6
+    # Without a text query the newest come first
+    dates = [result.bulletin_date for result in results['filters']]
+    assert dates == ['2024-01-04'] * 3 + ['2024-01-02'] * 3
+
+    assert [(result.bulletin_number, result.article_number) for result in results['dates']] == [('12020', 1180001)]
+    assert sorted(result.article_number for result in results['sections']) == [1180001, 1180002]
+    assert {result.section for result in results['sections']} == {'PERSONNEL'}
+
+
+def test_changed_documents_are_reindexed(crawl, tmp_path, bulletin):
+    section, = bulletin.sections
+    article = section.articles[0]
+
+    def index(text: str):
+        async def main(context):
+            await add_text(context, bulletin, section, article, text)
+            async with SearchIndex(str(tmp_path / 'search.sqlite3')) as search_index:
+                indexed = await search_index.update(context.manifest, context.filesystem)
+                return indexed, search_index.search('professorat'), search_index.search('alumnat')
+
+        return crawl(main)
+
+    indexed, found, _ = index(TEXTS[1180000])
+    assert indexed == 1
+    assert len(found) == 1
+
+    indexed, found, changed = index('Convocatòria de places per a alumnat')
+    assert indexed == 1
+    assert found == []
+    assert [result.article_number for result in changed] == [1180000]
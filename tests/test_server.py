@@ -0,0 +1,42 @@
+import asyncio
+
+import httpx
+
+from boib.retry import RetryPolicy
+
+CALENDAR_URL = 'https://intranet.caib.es/eboibfront/ca/2024'
+
+
+def get(make_client, url: str, times: int = 1, **headers) -> list[httpx.Response]:
+    async def main():
+        async with make_client(retry_policy=RetryPolicy(max_attempts=1)) as client:
+            return [await client.get(url, headers=headers) for _ in range(times)]
+
+    return asyncio.run(main())
+
+
+def test_fixtures_are_revalidated(server, make_client):
+    response, = get(make_client, CALENDAR_URL)
+    revalidated, = get(make_client, CALENDAR_URL, **{'If-None-Match': response.headers['etag']})
+
+    assert response.status_code == 200
+    assert b'calendario_anual_mes' in response.content
+    assert revalidated.status_code == 304
+    assert revalidated.content == b''
+
+
+def test_failures_are_injected(server, make_client):
+    server.fail(r'/2024$', status=500, times=2)
+
+    responses = get(make_client, CALENDAR_URL, times=3)
+
+    assert [response.status_code for response in responses] == [500, 500, 200]
+    assert server.paths == ['/eboibfront/ca/2024'] * 3
+
+
+def test_unknown_paths(server, make_client):
+    response, = get(make_client, 'https://intranet.caib.es/unknown')
+
+    # The request keeps its URL, only the connection goes to the server
+    assert response.status_code == 404
+    assert str(response.request.url) == 'https://intranet.caib.es/unknown'
@@ -0,0 +1,55 @@
+import asyncio
+import gzip
+
+from boib.warc import WARCWriter
+
+PDF_URL = 'https://www.caib.es/eboibfront/pdf/ca/2024/1/1180000'
+
+
+def read_records(path) -> list[bytes]:
+    # Every record is its own gzip member
+    records = []
+    with open(path, 'rb') as f:
+        content = f.read()
+
+    while content:
+        decompressor = gzip.zlib.decompressobj(16 + gzip.zlib.MAX_WBITS)
+        records.append(decompressor.decompress(content))
+        content = decompressor.unused_data
+
+    return records
+
+
+def test_streamed_responses_are_recorded(server, make_client, tmp_path):
+    path = tmp_path / 'crawl.warc.gz'
+
+    async def main():
+        async with WARCWriter(str(path)) as writer, make_client(warc=writer) as client:
+            async with client.stream('GET', PDF_URL) as response:
+                return b''.join([chunk async for chunk in response.aiter_bytes()])
+
+    body = asyncio.run(main())
+
+    warcinfo, response, request = read_records(path)
+    assert warcinfo.startswith(b'WARC/1.1\r\nWARC-Type: warcinfo\r\n')
+    assert b'WARC-Type: response\r\n' in response
+    assert f'WARC-Target-URI: {PDF_URL}\r\n'.encode() in response
+    assert b'WARC-Type: request\r\n' in request
+
+    warc_head, http_head, recorded = response.split(b'\r\n\r\n', 2)
+    assert f'Content-Length: {len(http_head) + 4 + len(body)}'.encode() in warc_head
+    assert recorded == body + b'\r\n\r\n'
+
+
+def test_failed_requests_are_recorded(server, make_client, tmp_path):
+    server.fail(r'/1180000$', status=404)
+    path = tmp_path / 'crawl.warc.gz'
+
+    async def main():
+        async with WARCWriter(str(path)) as writer, make_client(warc=writer) as client:
+            return await client.get(PDF_URL)
+
+    assert asyncio.run(main()).status_code == 404
+
+    _, response, _ = read_records(path)
+    assert b'HTTP/1.1 404 Error\r\n' in response
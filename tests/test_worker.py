@@ -0,0 +1,84 @@
+from dataclasses import replace
+from datetime import date
+
+from boib.downloaders import ArticleDownloader, BulletinDownloader
+from boib.downloaders.html import HTMLArticleDownloader
+from boib.downloaders.pdf import PDFArticleDownloader
+from boib.extractors.caib import CAIBBulletinExtractor
+from boib.filters import ExtractionFilter
+from boib.models import Article, Bulletin, DateRange, Document, URLType
+from boib.queues import WorkItemStatus
+from boib.queues.sqlite import SQLiteWorkQueue
+from boib.worker import Worker, article_items, bulletin_items
+
+EXTRACTION_FILTER = ExtractionFilter(max_number=1180001, url_types=frozenset({URLType.PDF}))
+
+
+def work(crawl, tmp_path, items, article_downloader=None) -> dict[str, int]:
+    async def main(run):
+        async with SQLiteWorkQueue(str(tmp_path / 'queue.sqlite3'), max_attempts=2) as queue:
+            extractor = CAIBBulletinExtractor(client=run.client, extraction_filter=EXTRACTION_FILTER)
+            await queue.put(await items(extractor))
+
+            worker = Worker(
+                queue,
+                extractor,
+                BulletinDownloader(article_downloader or PDFArticleDownloader(run.filesystem, run.client)),
+                workers=2,
+                poll_interval=0.01,
+                exit_when_drained=True,
+            )
+            await worker.run()
+            return await queue.stats()
+
+    return crawl(main)
+
+
+def test_bulletin_items_with_failed_sections_fail(server, crawl, tmp_path):
+    server.fail(r'/anuncis$')
+
+    async def items(extractor):
+        return bulletin_items(await extractor.plan(DateRange(date(2024, 1, 2), date(2024, 1, 2))))
+
+    stats = work(crawl, tmp_path, items)
+
+    # The bulletin was extracted twice, its articles were queued and
+    # downloaded once
+    assert stats == {WorkItemStatus.FAILED: 1, WorkItemStatus.DONE: 2}
+    assert server.paths.count('/eboibfront/ca/2024/12010/') == 2
+    assert server.paths.count('/eboibfront/pdf/ca/2024/1/1180000') == 1
+
+
+def test_unexpected_errors_fail_their_item_only(crawl, tmp_path, bulletin):
+    class FailingArticleDownloader(ArticleDownloader):
+        async def download(self, bulletin: Bulletin, article: Article) -> Document:
+            if article.number == 1180001:
+                raise RuntimeError('Unexpected')
+
+            return Document(f'{article.number}.pdf', article.pdf_url, 0, '')
+
+        def get_url(self, article: Article) -> str | None:
+            return article.pdf_url
+
+    article_downloader = FailingArticleDownloader()
+
+    async def items(extractor):
+        return article_items(bulletin, article_downloader.get_url)
+
+    stats = work(crawl, tmp_path, items, article_downloader)
+
+    assert stats == {WorkItemStatus.FAILED: 1, WorkItemStatus.DONE: 2}
+
+
+def test_article_items_are_keyed_by_bulletin_and_document(bulletin):
+    pdf_downloader = PDFArticleDownloader(None)
+    html_downloader = HTMLArticleDownloader(None)
+    # The same registry numbers, published in another bulletin
+    other_bulletin = replace(bulletin, number=12020, url='https://intranet.caib.es/eboibfront/ca/2024/12020/')
+
+    pdf_keys = [key for key, _, _ in article_items(bulletin, pdf_downloader.get_url)]
+    html_keys = [key for key, _, _ in article_items(bulletin, html_downloader.get_url)]
+    other_keys = [key for key, _, _ in article_items(other_bulletin, pdf_downloader.get_url)]
+
+    assert pdf_keys[0] == 'article:12010:https://www.caib.es/eboibfront/pdf/ca/2024/1/1180000'
+    assert len(set(pdf_keys) | set(html_keys) | set(other_keys)) == 9